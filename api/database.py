@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine, Column, String, Integer, DateTime
+from sqlalchemy import event, create_engine, Column, String, Integer, DateTime, LargeBinary, ForeignKey, FetchedValue, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, relationship, object_session
 import datetime
 import os
 
+from core.db import init_db
+from core.artifacts import RELEASE_ARTIFACT_SQL, artifact_hash, encode_artifact, decode_artifact
+
 DB_DIR = "data"
 os.makedirs(DB_DIR, exist_ok=True)
 SQLALCHEMY_DATABASE_URL = f"sqlite:///./{DB_DIR}/project.db"
@@ -16,6 +19,38 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 # Models
+class Artifact(Base):
+    """Compressed, content-addressed text blob (generated code, execution logs)."""
+    __tablename__ = "artifacts"
+
+    hash = Column(String, primary_key=True)
+    codec = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+    @property
+    def text(self):
+        return decode_artifact(self.codec, self.data)
+
+    @classmethod
+    def for_text(cls, session, text):
+        """
+        Return the stored artifact for `text`, creating it if this content is new.
+        Without a session (detached requirement) a new artifact is built; the before_flush
+        hook below swaps it for the stored one if the content already exists.
+        """
+        if not text:
+            return None
+        if session is not None:
+            digest = artifact_hash(text)
+            existing = session.get(cls, digest)
+            if existing is None:
+                existing = next((obj for obj in session.new if isinstance(obj, cls) and obj.hash == digest), None)
+            if existing is not None:
+                return existing
+        digest, codec, size, blob = encode_artifact(text)
+        return cls(hash=digest, codec=codec, size=size, data=blob)
+
 class Requirement(Base):
     __tablename__ = "requirements"
 
@@ -30,11 +65,84 @@ class Requirement(Base):
     source_type = Column(String, default="Original")
     verification_method = Column(String, default="")
     rationale = Column(String, default="")
-    generated_code = Column(String, default="")
+    generated_code_ref = Column(String, ForeignKey("artifacts.hash"))
     verification_status = Column(String, default="")
-    execution_log = Column(String, default="")
+    execution_log_ref = Column(String, ForeignKey("artifacts.hash"))
     last_run_timestamp = Column(DateTime)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # Set by database triggers on every write; the ORM re-reads it after a flush
+    change_seq = Column(Integer, server_default=FetchedValue(), server_onupdate=FetchedValue(), index=True)
+
+    # Artifacts are only fetched when these attributes are accessed (single-requirement views)
+    generated_code_artifact = relationship(Artifact, foreign_keys=[generated_code_ref], lazy="select")
+    execution_log_artifact = relationship(Artifact, foreign_keys=[execution_log_ref], lazy="select")
+
+    @property
+    def has_generated_code(self):
+        return self.generated_code_ref is not None
+
+    @property
+    def has_execution_log(self):
+        return self.execution_log_ref is not None
+
+    @property
+    def generated_code(self):
+        return self.generated_code_artifact.text if self.generated_code_artifact else ""
+
+    @generated_code.setter
+    def generated_code(self, text):
+        self.generated_code_artifact = Artifact.for_text(object_session(self), text)
+
+    @property
+    def execution_log(self):
+        return self.execution_log_artifact.text if self.execution_log_artifact else ""
+
+    @execution_log.setter
+    def execution_log(self, text):
+        self.execution_log_artifact = Artifact.for_text(object_session(self), text)
+
+_ARTIFACT_RELATIONSHIPS = ("generated_code_artifact", "execution_log_artifact")
+
+@event.listens_for(SessionLocal, "before_flush")
+def _deduplicate_new_artifacts(session, flush_context, instances):
+    """Point requirements at already stored (or already pending) artifacts of the same content."""
+    new_artifacts = [obj for obj in session.new if isinstance(obj, Artifact)]
+    if not new_artifacts:
+        return
+    kept, replaced = {}, {}
+    with session.no_autoflush:
+        for artifact in new_artifacts:
+            keep = kept.get(artifact.hash)
+            if keep is None:
+                keep = kept[artifact.hash] = session.get(Artifact, artifact.hash) or artifact
+            if keep is not artifact:
+                replaced[artifact] = keep
+                session.expunge(artifact)
+        if not replaced:
+            return
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, Requirement):
+                for name in _ARTIFACT_RELATIONSHIPS:
+                    target = getattr(obj, name)
+                    if target in replaced:
+                        setattr(obj, name, replaced[target])
+
+def release_artifacts(session, *digests):
+    """
+    Delete artifacts requirements no longer reference (see core.artifacts.release_artifact).
+    Call after the referencing rows were changed and flushed, before the commit.
+    """
+    for digest in set(digests):
+        if digest:
+            session.execute(text(RELEASE_ARTIFACT_SQL), {"hash": digest})
+
+class RequirementTombstone(Base):
+    """Deleted requirement, kept so delta sync clients can drop it from their mirror."""
+    __tablename__ = "requirement_tombstones"
+
+    id = Column(String, primary_key=True)
+    source_file = Column(String)
+    change_seq = Column(Integer, nullable=False, index=True)
 
 class Project(Base):
     __tablename__ = "projects"
@@ -48,12 +156,17 @@ class SystemLog(Base):
     __tablename__ = "system_logs"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     level = Column(String, default="INFO")
     message = Column(String)
 
-# Initialize database
-Base.metadata.create_all(bind=engine)
+# Initialize database. The schema is owned by core.migrations (versioned via
+# PRAGMA user_version); the models above only map onto it, so there is no create_all.
+init_db()
+
+def get_change_cursor(session) -> int:
+    """Latest change sequence number (see core.migrations.create_change_tracking)."""
+    return session.execute(text("SELECT seq FROM change_counter WHERE id = 1")).scalar() or 0
 
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,188 @@
+import collections
+import functools
+import gzip
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+# Data endpoints: clients may store responses but must revalidate (cheap 304s when unchanged)
+NO_CACHE = "no-cache"
+# Markdown docs only change on deploy
+DOCS_CACHE = "public, max-age=60"
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+CACHE_MAX_ENTRIES = int(os.environ.get("ASV_RESPONSE_CACHE_ENTRIES", "256"))
+CACHE_MAX_BYTES = int(os.environ.get("ASV_RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+class ResponseCache:
+    """
+    In-process LRU of serialized response bodies, keyed by URL and tagged with their ETag.
+
+    An entry is only served while its ETag still matches the current data version, so a
+    write from any process (API or job worker) invalidates it without explicit purges.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "collections.OrderedDict[str, Tuple[str, bytes]]" = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != etag:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, etag: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (etag, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+response_cache = ResponseCache()
+
+def make_etag(key: str, version: Any) -> str:
+    """Strong ETag for the representation of `key` at data `version`."""
+    return '"' + hashlib.sha1(f"{key}|{version}".encode("utf-8")).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header (weak comparison, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+@functools.lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+def serialize(value: Any, model=None) -> bytes:
+    """
+    Dump `value` to JSON. With a `model` (a response_model type, ORM objects allowed) the value
+    is validated first; without one it must already be plain JSON data and goes straight to orjson.
+    """
+    if model is None:
+        return orjson.dumps(value)
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True), by_alias=True)
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Pick 'br', 'gzip' or 'identity' from an Accept-Encoding header."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    for coding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+def cached_response(
+    request: Request,
+    version: Any,
+    build: Callable[[], Any],
+    model=None,
+    cache_control: str = NO_CACHE,
+    headers: Optional[dict] = None
+) -> Response:
+    """
+    Serve a GET endpoint through ETag validation and the response cache.
+
+    Args:
+        request (Request): The incoming request (URL, If-None-Match, Accept-Encoding).
+        version (Any): Cheap token that changes whenever the response would (change counter, mtime).
+        build (Callable[[], Any]): Produces the payload; only called on a cache miss.
+        model: The endpoint's response_model, used to validate and serialize the payload.
+        cache_control (str): Cache-Control header value.
+        headers (Optional[dict]): Extra headers for both 200 and 304 responses.
+
+    Returns:
+        Response: 304 if the client's copy is current, otherwise the (possibly cached) JSON body,
+        compressed with the best encoding the client accepts. Compressed variants are cached too,
+        so compression runs once per data version.
+    """
+    key = str(request.url.path) + "?" + str(request.url.query)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    identity_etag = make_etag(key, version)
+    # Each content-coding is a different representation and needs its own strong ETag
+    etag = identity_etag if encoding == "identity" else make_etag(f"{key}|{encoding}", version)
+
+    base_headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding", **(headers or {})}
+
+    # Small bodies are sent uncompressed, so the client may hold either representation
+    if_none_match = request.headers.get("if-none-match")
+    for candidate, coding in ((etag, encoding), (identity_etag, "identity")):
+        if etag_matches(if_none_match, candidate):
+            not_modified = {"ETag": candidate, **base_headers}
+            if coding != "identity":
+                not_modified["Content-Encoding"] = coding
+            return Response(status_code=304, headers=not_modified)
+
+    body = response_cache.get(f"{key}|{encoding}", etag) if encoding != "identity" else None
+    if body is None:
+        raw = response_cache.get(key, identity_etag)
+        if raw is None:
+            raw = serialize(build(), model)
+            response_cache.put(key, identity_etag, raw)
+        if encoding != "identity" and len(raw) >= COMPRESS_MIN_BYTES:
+            body = compress(raw, encoding)
+            response_cache.put(f"{key}|{encoding}", etag, body)
+        else:
+            body, encoding, etag = raw, "identity", identity_etag
+
+    response_headers = {"ETag": etag, **base_headers}
+    if encoding != "identity":
+        response_headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=response_headers)
@@ -1,18 +1,57 @@
-from fastapi import FastAPI, Depends, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, Depends, File, UploadFile, HTTPException, Form, Query, Request, Response
+from fastapi.responses import FileResponse, PlainTextResponse
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import shutil
+import time
+from datetime import datetime
 
-from api.database import get_db, DB_DIR
+from api.database import get_db, get_change_cursor, DB_DIR
 import api.database as models
 from api import schemas
-from core.ingestion import extract_requirements_from_pdf
-from core.verification_engine import VerificationEngine
+from api.http_cache import cached_response, DOCS_CACHE
+from api.profiling import ProfilingMiddleware, require_admin, list_profiles, profile_path
+from core.db import (
+    get_system_logs, search_requirements, get_project_stats,
+    get_change_version, get_table_version, get_log_version, get_requirement_summaries
+)
+from core.jobs import (
+    WorkerPool, enqueue_job, get_job, cancel_job, get_queue_metrics, metrics_dir, clear_metrics_snapshots
+)
+from core.metrics import REGISTRY, HTTP_REQUEST_SECONDS, CONTENT_TYPE as METRICS_CONTENT_TYPE
+# core.ingestion and core.verification_engine load google.generativeai and pypdf (most of
+# the API's import time); endpoints that need them import them on first use.
 
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="ASV Core API")
+# Worker processes for the job queue. Set to 0 when workers run separately (python -m core.jobs).
+JOB_WORKERS = int(os.environ.get("ASV_JOB_WORKERS", "2"))
+# Seconds between checks on the worker processes
+WORKER_CHECK_INTERVAL = float(os.environ.get("ASV_WORKER_CHECK_INTERVAL", "5"))
+
+async def watch_workers(pool: WorkerPool):
+    """Replace workers that died, dropping their metric snapshots from /metrics."""
+    while True:
+        await asyncio.sleep(WORKER_CHECK_INTERVAL)
+        # Spawning a process blocks for a moment; keep it off the event loop
+        await asyncio.to_thread(pool.maintain)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Snapshots of an earlier run's workers would be summed into /metrics forever
+    clear_metrics_snapshots()
+    pool = WorkerPool(JOB_WORKERS)
+    pool.start()
+    watcher = asyncio.create_task(watch_workers(pool))
+    yield
+    watcher.cancel()
+    pool.stop()
+
+app = FastAPI(title="ASV Core API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,7 +59,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Change-Cursor", "ETag", "X-Profile-Id"],
 )
+# Opt-in per request (X-Profile: 1 + X-Admin-Token); inert unless ASV_ADMIN_TOKEN is set
+app.add_middleware(ProfilingMiddleware)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (/requirements/{req_id}), never the raw path
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method, route=getattr(route, "path", "unmatched"), status=status
+        )
 
 # Documentation directory - configurable for Docker vs local
 DOCS_DIR = os.environ.get("DOCS_DIR", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -29,9 +87,37 @@ DOCS_DIR = os.environ.get("DOCS_DIR", os.path.dirname(os.path.dirname(os.path.ab
 def health_check():
     return {"status": "healthy", "service": "ASV Core API", "version": "2.0"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition: this process's metrics plus the job workers' latest snapshots."""
+    return PlainTextResponse(REGISTRY.render(snapshot_dir=metrics_dir()), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def get_profiles():
+    return list_profiles()
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def download_profile(profile_id: str, format: str = Query("speedscope", pattern="^(speedscope|pstats)$")):
+    """Download a request profile: speedscope JSON (open in speedscope.app) or a pstats dump."""
+    path = profile_path(profile_id, format)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=os.path.basename(path))
+
 @app.get("/projects", response_model=List[schemas.ProjectResponse])
-def get_projects(db: Session = Depends(get_db)):
-    return db.query(models.Project).order_by(models.Project.last_updated.desc()).all()
+def get_projects(request: Request, db: Session = Depends(get_db)):
+    return cached_response(
+        request, get_table_version("projects"),
+        lambda: db.query(models.Project).order_by(models.Project.last_updated.desc()).all(),
+        List[schemas.ProjectResponse]
+    )
+
+@app.get("/projects/{filename}/stats", response_model=schemas.ProjectStatsResponse)
+def project_stats(filename: str):
+    stats = get_project_stats(filename)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return stats
 
 @app.delete("/projects/{filename}")
 def delete_project(filename: str, db: Session = Depends(get_db)):
@@ -44,18 +130,83 @@ def delete_project(filename: str, db: Session = Depends(get_db)):
     
     # Delete the project
     db.delete(project)
+    
+    # Drop artifacts no other requirement references (shared content is deduplicated)
+    code_refs = db.query(models.Requirement.generated_code_ref).filter(models.Requirement.generated_code_ref.isnot(None))
+    log_refs = db.query(models.Requirement.execution_log_ref).filter(models.Requirement.execution_log_ref.isnot(None))
+    db.query(models.Artifact).filter(
+        models.Artifact.hash.not_in(code_refs.union(log_refs))
+    ).delete(synchronize_session=False)
     db.commit()
     
     return {"status": "success", "message": f"Deleted project {filename}"}
 
-@app.get("/requirements", response_model=List[schemas.RequirementResponse])
-def get_requirements(source_file: Optional[str] = None, section: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.Requirement)
+@app.get("/requirements", response_model=List[schemas.RequirementSummary])
+def get_requirements(request: Request, source_file: Optional[str] = None, section: Optional[str] = None, db: Session = Depends(get_db)):
+    project = source_file if source_file and source_file != "All Projects" else None
+    # Read before the rows: anything changed meanwhile is simply delivered again by /requirements/changes
+    cursor = get_change_cursor(db)
+
+    # Fast path: rows come from SQL already shaped like RequirementSummary and go straight to
+    # orjson, skipping ORM objects and per-row validation (the largest list in the API)
+    return cached_response(
+        request, get_change_version(project),
+        lambda: get_requirement_summaries(project, section or None),
+        headers={"X-Change-Cursor": str(cursor)}
+    )
+
+@app.get("/requirements/changes", response_model=schemas.RequirementChanges)
+def requirement_changes(
+    since: int = Query(0, ge=0),
+    source_file: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Requirements changed (and IDs deleted) after the `since` cursor, oldest change first."""
+    # Every change up to this value is committed, so it is a safe cursor once the backlog is drained
+    latest = get_change_cursor(db)
+
+    changed = db.query(models.Requirement).filter(models.Requirement.change_seq > since)
+    deleted = db.query(models.RequirementTombstone).filter(models.RequirementTombstone.change_seq > since)
     if source_file and source_file != "All Projects":
-        query = query.filter(models.Requirement.source_file == source_file)
-    if section:
-        query = query.filter(models.Requirement.section == section)
-    return query.all()
+        changed = changed.filter(models.Requirement.source_file == source_file)
+        deleted = deleted.filter(models.RequirementTombstone.source_file == source_file)
+    else:
+        # A requirement that moved to another project left a tombstone there but still exists
+        deleted = deleted.filter(~exists().where(models.Requirement.id == models.RequirementTombstone.id))
+    changed = changed.order_by(models.Requirement.change_seq).limit(limit + 1).all()
+    deleted = deleted.order_by(models.RequirementTombstone.change_seq).limit(limit + 1).all()
+
+    # Merge both streams by sequence number and cut the page at `limit` changes
+    merged = sorted(changed + deleted, key=lambda row: row.change_seq)
+    has_more = len(merged) > limit
+    page = merged[:limit]
+    cursor = page[-1].change_seq if has_more else max(latest, since)
+
+    return {
+        "since": since,
+        "cursor": cursor,
+        "has_more": has_more,
+        "changed": [row for row in page if isinstance(row, models.Requirement)],
+        "deleted": [row.id for row in page if isinstance(row, models.RequirementTombstone)]
+    }
+
+@app.get("/requirements/search", response_model=schemas.RequirementSearchResponse)
+def search(
+    q: str = Query(..., min_length=1),
+    source_file: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    results, has_more = search_requirements(q, source_file=source_file, limit=limit, offset=offset)
+    return {"query": q, "limit": limit, "offset": offset, "has_more": has_more, "results": results}
+
+@app.get("/requirements/{req_id}", response_model=schemas.RequirementResponse)
+def get_requirement(req_id: str, db: Session = Depends(get_db)):
+    req = db.query(models.Requirement).filter(models.Requirement.id == req_id).first()
+    if not req:
+        raise HTTPException(status_code=404, detail="Requirement not found")
+    return req
 
 @app.put("/requirements/{req_id}", response_model=schemas.RequirementResponse)
 def update_requirement(req_id: str, req_update: schemas.RequirementUpdate, db: Session = Depends(get_db)):
@@ -64,15 +215,18 @@ def update_requirement(req_id: str, req_update: schemas.RequirementUpdate, db: S
         raise HTTPException(status_code=404, detail="Requirement not found")
     
     update_data = req_update.model_dump(exclude_unset=True)
+    previous = (req.generated_code_ref, req.execution_log_ref)
     for key, value in update_data.items():
         setattr(req, key, value)
     
+    db.flush()
+    models.release_artifacts(db, *previous)
     db.commit()
     db.refresh(req)
     return req
 
 @app.post("/ingest")
-async def ingest_pdf(
+def ingest_pdf(
     file: UploadFile = File(...), 
     api_key: str = Form(...),
     target_section: Optional[str] = Form(None),
@@ -84,6 +238,8 @@ async def ingest_pdf(
     with open(save_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
         
+    from core.ingestion import extract_requirements_from_pdf
+
     extracted_data, doc_title = extract_requirements_from_pdf(
         save_path, 
         api_key, 
@@ -108,15 +264,12 @@ async def ingest_pdf(
         )
         db.merge(req)
         
-    # Update project metadata
-    count = db.query(models.Requirement).filter(models.Requirement.source_file == safe_filename).count()
+    # Update project metadata. Writing the requirements creates the project row and
+    # updates its counts (database triggers), so only the title is set here.
+    db.flush()
     proj = db.query(models.Project).filter(models.Project.filename == safe_filename).first()
-    if proj:
-        proj.title = doc_title
-        proj.req_count = count
-    else:
-        new_proj = models.Project(filename=safe_filename, title=doc_title, req_count=count)
-        db.add(new_proj)
+    proj.title = doc_title
+    proj.last_updated = datetime.utcnow()
         
     db.commit()
     
@@ -128,6 +281,7 @@ def analyze_requirement(req_id: str, api_key: str = Form(...), db: Session = Dep
     if not req:
         raise HTTPException(status_code=404, detail="Requirement not found")
         
+    from core.verification_engine import VerificationEngine
     engine = VerificationEngine(api_key)
     # Convert SQLAlchemy model to dict for engine
     req_dict = {"ID": req.id, "Requirement": req.text}
@@ -147,10 +301,14 @@ def generate_code(req_id: str, api_key: str = Form(...), db: Session = Depends(g
     if not req:
         raise HTTPException(status_code=404, detail="Requirement not found")
         
+    from core.verification_engine import VerificationEngine
     engine = VerificationEngine(api_key)
     code = engine.generate_test_code(req.text)
     
+    previous = req.generated_code_ref
     req.generated_code = code
+    db.flush()
+    models.release_artifacts(db, previous)
     db.commit()
     
     return {"code": code}
@@ -161,47 +319,119 @@ def execute_test(req_id: str, req_params: schemas.ExecuteRequest, db: Session =
     if not req:
         raise HTTPException(status_code=404, detail="Requirement not found")
         
+    from core.verification_engine import VerificationEngine
     engine = VerificationEngine(req_params.api_key or "DUMMY_KEY_NOT_USED_FOR_EXEC")
     result = engine.execute_test_code(req_params.code)
     
     if result['status'] == 'Fail' and req_params.api_key:
         try:
-            prompt = f"The following pytest code for requirement '{req.text}' failed.\n\nCODE:\n{req_params.code}\n\nLOG:\n{result['log']}\n\nProvide a concise 1-3 sentence explanation of why it failed and what the different approach should be. Do not generate code, just the explanation."
-            analysis = engine.generate_text(prompt)
+            analysis = engine.analyze_failure(req.text, req_params.code, result['log'])
             result['log'] += f"\n\n--- AI FAILURE ANALYSIS ---\n{analysis}"
         except Exception as e:
             print(f"Failed to generate analysis: {e}")
             pass
     
+    previous = req.execution_log_ref
     req.verification_status = result['status']
     req.execution_log = result['log']
-    from datetime import datetime
     req.last_run_timestamp = datetime.utcnow()
+    db.flush()
+    models.release_artifacts(db, previous)
     db.commit()
     
     return result
 
+def _require(db: Session, req_id: str) -> models.Requirement:
+    req = db.query(models.Requirement).filter(models.Requirement.id == req_id).first()
+    if not req:
+        raise HTTPException(status_code=404, detail="Requirement not found")
+    return req
+
+@app.post("/jobs/ingest", response_model=schemas.JobSubmitted, status_code=202)
+def submit_ingest(
+    file: UploadFile = File(...),
+    api_key: str = Form(...),
+    target_section: Optional[str] = Form(None)
+):
+    safe_filename = file.filename
+    save_path = os.path.join(DB_DIR, safe_filename)
+
+    with open(save_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+    payload = {"path": save_path, "filename": safe_filename, "target_section": target_section}
+    return {"job_id": enqueue_job("ingest", payload, secret=api_key, project=safe_filename)}
+
+# Single-requirement jobs default to the interactive lane; batch callers pass lane=bulk
+LANE_QUERY = Query("interactive", pattern="^(interactive|bulk)$")
+
+@app.post("/jobs/analyze/{req_id}", response_model=schemas.JobSubmitted, status_code=202)
+def submit_analyze(req_id: str, api_key: str = Form(...), lane: str = LANE_QUERY, db: Session = Depends(get_db)):
+    req = _require(db, req_id)
+    job_id = enqueue_job("analyze", {"req_id": req_id}, secret=api_key,
+                         lane=lane, project=req.source_file, priority=req.priority)
+    return {"job_id": job_id}
+
+@app.post("/jobs/generate/{req_id}", response_model=schemas.JobSubmitted, status_code=202)
+def submit_generate(req_id: str, api_key: str = Form(...), lane: str = LANE_QUERY, db: Session = Depends(get_db)):
+    req = _require(db, req_id)
+    job_id = enqueue_job("generate", {"req_id": req_id}, secret=api_key,
+                         lane=lane, project=req.source_file, priority=req.priority)
+    return {"job_id": job_id}
+
+@app.post("/jobs/execute/{req_id}", response_model=schemas.JobSubmitted, status_code=202)
+def submit_execute(req_id: str, req_params: schemas.ExecuteRequest, lane: str = LANE_QUERY, db: Session = Depends(get_db)):
+    req = _require(db, req_id)
+    job_id = enqueue_job("execute", {"req_id": req_id, "code": req_params.code}, secret=req_params.api_key,
+                         lane=lane, project=req.source_file, priority=req.priority)
+    return {"job_id": job_id}
+
+@app.get("/jobs/metrics", response_model=Dict[str, schemas.LaneMetrics])
+def job_metrics(window: float = Query(900.0, gt=0)):
+    return get_queue_metrics(window)
+
+@app.get("/jobs/{job_id}", response_model=schemas.JobResponse)
+def job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/jobs/{job_id}/cancel", response_model=schemas.JobResponse)
+def cancel(job_id: str):
+    if cancel_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return get_job(job_id)
+
 @app.get("/logs", response_model=List[schemas.SystemLogResponse])
-def get_logs(limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.SystemLog).order_by(models.SystemLog.timestamp.desc()).limit(limit).all()
+def get_logs(request: Request, limit: int = 100):
+    # The version flushes the log sink, so buffered entries are visible immediately
+    return cached_response(
+        request, get_log_version(), lambda: get_system_logs(limit), List[schemas.SystemLogResponse]
+    )
 
 @app.get("/api/docs", response_model=List[dict])
-def list_docs():
+def list_docs(request: Request):
     if not os.path.exists(DOCS_DIR):
         return []
-    md_files = [f for f in os.listdir(DOCS_DIR) if f.endswith('.md')]
-    
-    # Format for the frontend
-    docs_list = []
-    for f in md_files:
-        docs_list.append({
-            "id": f,
-            "title": f
-        })
-    return docs_list
+
+    def build():
+        md_files = [f for f in os.listdir(DOCS_DIR) if f.endswith('.md')]
+        
+        # Format for the frontend
+        docs_list = []
+        for f in md_files:
+            docs_list.append({
+                "id": f,
+                "title": f
+            })
+        return docs_list
+
+    # Adding, removing or renaming a file updates the directory mtime
+    return cached_response(request, os.stat(DOCS_DIR).st_mtime_ns, build, cache_control=DOCS_CACHE)
 
 @app.get("/api/docs/{filename}")
-def get_doc_content(filename: str):
+def get_doc_content(request: Request, filename: str):
     if not filename.endswith('.md'):
         raise HTTPException(status_code=400, detail="Only markdown files allowed")
         
@@ -209,8 +439,11 @@ def get_doc_content(filename: str):
     
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Document not found")
-        
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        
-    return {"content": content}
+
+    def build():
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        return {"content": content}
+
+    stat = os.stat(file_path)
+    return cached_response(request, (stat.st_mtime_ns, stat.st_size), build, cache_control=DOCS_CACHE)
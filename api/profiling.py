@@ -0,0 +1,238 @@
+import collections
+import hmac
+import json
+import marshal
+import os
+import secrets
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastapi import Header, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+# Profiling is only available when an admin token is configured
+ADMIN_TOKEN = os.environ.get("ASV_ADMIN_TOKEN") or None
+# Sampling period (seconds) while a profiled request runs
+SAMPLE_INTERVAL = float(os.environ.get("ASV_PROFILE_INTERVAL", "0.001"))
+# Stored profiles beyond this count are deleted, oldest first
+PROFILE_KEEP = int(os.environ.get("ASV_PROFILE_KEEP", "50"))
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+ADMIN_HEADER = b"x-admin-token"
+FORMATS = {"speedscope": ".speedscope.json", "pstats": ".pstats"}
+
+def profiles_dir() -> str:
+    from core import db
+    return os.path.join(os.path.dirname(db.DB_PATH), "profiles")
+
+def is_admin(token: Optional[Union[str, bytes]]) -> bool:
+    """
+    Constant-time check of an X-Admin-Token value, as raw header bytes or as the str the ASGI
+    server decoded from them (latin-1). Compared as bytes: compare_digest rejects non-ASCII str.
+    """
+    if ADMIN_TOKEN is None or token is None:
+        return False
+    if isinstance(token, str):
+        try:
+            token = token.encode("latin-1")
+        except UnicodeEncodeError:
+            token = token.encode("utf-8")
+    return hmac.compare_digest(token, ADMIN_TOKEN.encode("utf-8"))
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency for admin endpoints. Hidden (404) unless ASV_ADMIN_TOKEN is set."""
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+Sample = Tuple[Tuple[Frame, ...], float]  # (stack, root first; seconds it stands for)
+
+class StackSampler:
+    """
+    Samples the stacks of a single request from a background thread.
+
+    Sync endpoints run in a worker thread and async ones on the event loop, so every
+    thread is sampled and a stack is kept if it belongs to the request: on the loop
+    thread, if it passes through the request's own middleware frame; elsewhere, if it
+    is inside the route's endpoint function (resolved after routing).
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: List[Tuple[bool, Tuple[Frame, ...], Tuple[Any, ...], float]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread = threading.get_ident()
+        self._anchor = None
+
+    def start(self, anchor_frame):
+        self._anchor = anchor_frame
+        self._thread = threading.Thread(target=self._run, name="asv-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._anchor = None
+
+    def _run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            # A busy thread holding the GIL delays ticks, so weigh samples by real elapsed time
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack, codes, anchored = [], [], False
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    codes.append(code)
+                    anchored = anchored or frame is self._anchor
+                    frame = frame.f_back
+                if thread_id == self._loop_thread and not anchored:
+                    continue
+                # Root first, as profile formats expect
+                self.samples.append((anchored, tuple(reversed(stack)), tuple(codes), weight))
+
+    def request_samples(self, endpoint) -> List[Sample]:
+        """Samples attributable to the request whose route resolved to `endpoint`."""
+        endpoint_code = getattr(getattr(endpoint, "__wrapped__", endpoint), "__code__", None)
+        return [(stack, weight) for anchored, stack, codes, weight in self.samples
+                if anchored or (endpoint_code is not None and endpoint_code in codes)]
+
+def to_speedscope(samples: List[Sample], name: str) -> Dict[str, Any]:
+    """Speedscope 'sampled' profile (https://www.speedscope.app/file-format-schema.json)."""
+    frames: Dict[Frame, int] = {}
+    stacks = [[frames.setdefault(frame, len(frames)) for frame in stack] for stack, _ in samples]
+    weights = [weight for _, weight in samples]
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "asv-profiler",
+        "shared": {"frames": [{"name": fn, "file": file, "line": line} for fn, file, line in frames]},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": stacks,
+            "weights": weights,
+        }],
+    }
+
+def to_pstats(samples: List[Sample]) -> Dict[Tuple, Tuple]:
+    """
+    Estimate a pstats table from samples: call counts are sample counts and times are
+    summed sample weights. Load the dumped file with `pstats.Stats(path)`.
+    """
+    counts = collections.Counter()
+    inline = collections.defaultdict(float)
+    cumulative = collections.defaultdict(float)
+    edges: Dict[Tuple, Dict[Tuple, List[float]]] = collections.defaultdict(dict)
+    for stack, weight in samples:
+        keys = [(file, line, fn) for fn, file, line in stack]
+        inline[keys[-1]] += weight
+        for key in set(keys):
+            counts[key] += 1
+            cumulative[key] += weight
+        for caller, callee in set(zip(keys, keys[1:])):
+            edge = edges[callee].setdefault(caller, [0, 0.0])
+            edge[0] += 1
+            edge[1] += weight
+    stats = {}
+    for key, count in counts.items():
+        callers = {caller: (n, n, 0.0, seconds) for caller, (n, seconds) in edges[key].items()}
+        stats[key] = (count, count, inline[key], cumulative[key], callers)
+    return stats
+
+def save_profile(samples: List[Sample], name: str, profile_id: str):
+    directory = profiles_dir()
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, profile_id + FORMATS["speedscope"]), "w") as f:
+        json.dump(to_speedscope(samples, name), f)
+    with open(os.path.join(directory, profile_id + FORMATS["pstats"]), "wb") as f:
+        marshal.dump(to_pstats(samples), f)
+
+    stored = sorted(
+        (os.path.join(directory, entry) for entry in os.listdir(directory) if entry.endswith(FORMATS["pstats"])),
+        key=os.path.getmtime
+    )
+    for stale in stored[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else []:
+        for suffix in FORMATS.values():
+            path = stale[:-len(FORMATS["pstats"])] + suffix
+            if os.path.exists(path):
+                os.remove(path)
+
+def list_profiles() -> List[Dict[str, Any]]:
+    directory = profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for entry in os.listdir(directory):
+        if entry.endswith(FORMATS["speedscope"]):
+            path = os.path.join(directory, entry)
+            with open(path) as f:
+                name = json.load(f)["name"]
+            profiles.append({"id": entry[:-len(FORMATS["speedscope"])], "name": name, "created": os.path.getmtime(path)})
+    return sorted(profiles, key=lambda p: p["created"], reverse=True)
+
+def profile_path(profile_id: str, fmt: str) -> Optional[str]:
+    if fmt not in FORMATS or not profile_id.isalnum():
+        return None
+    path = os.path.join(profiles_dir(), profile_id + FORMATS[fmt])
+    return path if os.path.exists(path) else None
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a request when it carries `X-Profile: 1` (or `?_profile=1`)
+    and a valid `X-Admin-Token`. The profile ID is returned in the `X-Profile-Id` header and
+    the profile can be downloaded from /admin/profiles/{id}.
+
+    Without ASV_ADMIN_TOKEN the middleware is a single attribute check per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if ADMIN_TOKEN is None or scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = secrets.token_hex(8)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler = StackSampler()
+        sampler.start(sys._getframe())
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            route = scope.get("route")
+            name = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+            samples = sampler.request_samples(getattr(route, "endpoint", None))
+            # Conversion and file writes would otherwise block the event loop for every request
+            await run_in_threadpool(save_profile, samples, name, profile_id)
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        headers = dict(scope["headers"])
+        query = urllib.parse.parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        flagged = headers.get(PROFILE_HEADER) in (b"1", b"true") or query.get(PROFILE_QUERY_PARAM) == ["1"]
+        if not flagged:
+            return False
+        return is_admin(headers.get(ADMIN_HEADER))
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
 from datetime import datetime
 
 class RequirementBase(BaseModel):
@@ -36,6 +36,54 @@ class RequirementResponse(RequirementCreate):
     class Config:
         from_attributes = True
 
+class RequirementSummary(BaseModel):
+    """List view of a requirement: hot metadata only, artifacts are fetched per requirement."""
+    id: str
+    req_id: str
+    req_name: Optional[str] = None
+    text: str
+    section: Optional[str] = None
+    source_file: Optional[str] = None
+    status: str = "Pending"
+    priority: str = "Medium"
+    source_type: str = "Original"
+    verification_method: Optional[str] = ""
+    rationale: Optional[str] = ""
+    verification_status: Optional[str] = ""
+    has_generated_code: bool = False
+    has_execution_log: bool = False
+    created_at: datetime
+    last_run_timestamp: Optional[datetime] = None
+    change_seq: int = 0
+
+    class Config:
+        from_attributes = True
+
+class RequirementChanges(BaseModel):
+    """Requirements written and deleted after `since`; pass `cursor` as the next `since`."""
+    since: int
+    cursor: int
+    has_more: bool
+    changed: List[RequirementSummary]
+    deleted: List[str]
+
+class RequirementSearchHit(BaseModel):
+    id: str
+    req_id: Optional[str] = None
+    req_name: Optional[str] = None
+    source_file: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    snippet: str
+    score: float
+
+class RequirementSearchResponse(BaseModel):
+    query: str
+    limit: int
+    offset: int
+    has_more: bool
+    results: List[RequirementSearchHit]
+
 class ProjectBase(BaseModel):
     filename: str
     title: str
@@ -47,6 +95,22 @@ class ProjectResponse(ProjectBase):
     class Config:
         from_attributes = True
 
+class ProjectStatsResponse(BaseModel):
+    filename: str
+    title: Optional[str] = None
+    total: int
+    last_updated: Optional[datetime] = None
+    status: Dict[str, int]
+    verification_method: Dict[str, int]
+    verification_status: Dict[str, int]
+    # Shortcuts into verification_status
+    passed: int = Field(0, alias="pass")
+    fail: int = 0
+    error: int = 0
+
+    class Config:
+        populate_by_name = True
+
 class SystemLogResponse(BaseModel):
     id: int
     timestamp: datetime
@@ -63,3 +127,33 @@ class ExecuteRequest(BaseModel):
 class IngestRequest(BaseModel):
     target_section: Optional[str] = None
     api_key: Optional[str] = None
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: str = "queued"
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    lane: str
+    status: str
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class LaneMetrics(BaseModel):
+    queued: int
+    running: int
+    flows: int
+    oldest_wait: float
+    started: int
+    wait_mean: float
+    wait_p50: float
+    wait_p95: float
+    wait_max: float
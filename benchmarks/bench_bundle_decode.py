@@ -0,0 +1,81 @@
+"""
+Benchmark: bundle decoding throughput over a capture file.
+
+Writes a capture of back-to-back serialized bundles (--size-mb, default 2048) unless --file
+points at an existing one, then decodes it twice:
+
+  stream   read_bundles() over file.read() chunks of --chunk bytes (BundleStreamParser)
+  mmap     decode_all() over an mmap of the whole file (payloads stay in the page cache)
+
+Usage:
+    python benchmarks/bench_bundle_decode.py --version bpv7 --size-mb 2048 --payload 1024
+    python benchmarks/bench_bundle_decode.py --version bpv6 --file /data/capture.bin
+"""
+import argparse
+import mmap
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.abspath(project_root))
+
+from core.engine.decoder import decode_all, read_bundles
+from examples.nasa_hdtn.buffer_manager import BufferManager
+
+def write_capture(path, manager, version, size, payload_size):
+    create = manager.create_bundle_v6 if version == "bpv6" else manager.create_bundle_v7
+    # One block of distinct bundles, repeated until the file reaches `size`
+    block = b"".join(
+        create((i % 1000, 1), (2000 + i % 97, 2), os.urandom(payload_size)).serialize()
+        for i in range(10000)
+    )
+    written = 0
+    with open(path, "wb") as f:
+        while written < size:
+            f.write(block)
+            written += len(block)
+    return written
+
+def report(label, count, size, seconds):
+    print(f"  {label:7} {count:12,} bundles  {count / seconds:12,.0f} bundles/s  {size / seconds / 1e6:9.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--version", choices=["bpv6", "bpv7"], default="bpv7")
+    parser.add_argument("--file", help="Existing capture to decode instead of generating one")
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--payload", type=int, default=1024, help="Payload size in bytes")
+    parser.add_argument("--chunk", type=int, default=1 << 20, help="Read size for the stream parser")
+    args = parser.parse_args()
+
+    manager = BufferManager()
+    config = manager.config[args.version]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = args.file
+        if path is None:
+            path = os.path.join(tmpdir, "capture.bin")
+            start = time.perf_counter()
+            write_capture(path, manager, args.version, args.size_mb * 1000000, args.payload)
+            print(f"wrote {path} in {time.perf_counter() - start:.1f}s")
+        size = os.path.getsize(path)
+        print(f"{args.version}: {size / 1e6:,.1f} MB capture")
+
+        with open(path, "rb") as f:
+            start = time.perf_counter()
+            count = sum(1 for _ in read_bundles(config, f, args.chunk))
+            report("stream", count, size, time.perf_counter() - start)
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = time.perf_counter()
+            count = 0
+            for bundle in decode_all(config, mapped):
+                count += 1
+                bundle.payload.release()  # the mmap cannot close while views are exported
+            report("mmap", count, size, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark: memory held by BufferManager for --count bundles, BaseBundle vs CompactBundle.
+
+Every bundle shares one payload object, so the numbers are per-bundle overhead: the bundle
+object, its fields and (for BaseBundle) its data dict. Memory is measured with tracemalloc
+as the growth while the bundles are alive in BufferManager.bundles.
+
+Usage:
+    python benchmarks/bench_bundle_memory.py --count 1000000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# Add project root to path
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.abspath(project_root))
+
+from examples.nasa_hdtn.buffer_manager import BufferManager
+
+def measure(compact, create, count, payload):
+    manager = BufferManager(compact=compact)
+    make = getattr(manager, create)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(count):
+        make((300 + i % 1000, 1), (2000 + i % 97, 2), payload)
+    seconds = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--payload", type=int, default=16, help="Payload size in bytes (shared by all bundles)")
+    args = parser.parse_args()
+
+    payload = os.urandom(args.payload)
+    for version, create in (("bpv6", "create_bundle_v6"), ("bpv7", "create_bundle_v7")):
+        print(f"{version}: {args.count:,} bundles")
+        results = {}
+        for label, compact in (("BaseBundle", False), ("CompactBundle", True)):
+            held, seconds = measure(compact, create, args.count, payload)
+            results[label] = held
+            print(f"  {label:14} {held / 1e6:9.1f} MB  {held / args.count:7.1f} B/bundle  "
+                  f"(created in {seconds:.1f}s under tracemalloc)")
+        print(f"  reduction      {results['BaseBundle'] / results['CompactBundle']:.1f}x")
+
+if __name__ == "__main__":
+    main()
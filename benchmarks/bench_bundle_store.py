@@ -0,0 +1,88 @@
+"""
+Benchmark: BundleStore sustained ingest rate, lookup latency and expiry sweeps.
+
+Ingests --count pre-serialized bundles spread over --destinations ipn nodes with a RAM quota
+far below the total, so most bundles are spilled to memory-mapped segments. Then measures:
+
+  get        random bundle by id (RAM- and disk-resident mixed)
+  find       ids for a random destination
+  expire     sweep dropping the oldest half of the bundles by lifetime
+
+Usage:
+    python benchmarks/bench_bundle_store.py --count 1000000 --payload 512 --ram-mb 64
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add project root to path
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.abspath(project_root))
+
+from core.engine.store import BundleStore
+from examples.nasa_hdtn.buffer_manager import BufferManager
+
+def latency(label, samples):
+    samples = sorted(samples)
+    p50 = statistics.median(samples) * 1e6
+    p99 = samples[int(len(samples) * 0.99)] * 1e6
+    print(f"  {label:7} p50 {p50:8.2f}us  p99 {p99:8.2f}us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000000)
+    parser.add_argument("--payload", type=int, default=512, help="Payload size in bytes")
+    parser.add_argument("--destinations", type=int, default=1000)
+    parser.add_argument("--ram-mb", type=int, default=64)
+    parser.add_argument("--disk-mb", type=int, default=16384)
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    manager = BufferManager()
+    # A pool of distinct serialized bundles, reused round-robin so generation is not timed
+    pool = [
+        manager.create_bundle_v7((1, 1), (d, 1), os.urandom(args.payload)).serialize()
+        for d in range(min(args.destinations, 1000))
+    ]
+    manager.bundles.clear()
+
+    with tempfile.TemporaryDirectory() as tmpdir, \
+            BundleStore(tmpdir, ram_quota=args.ram_mb << 20, disk_quota=args.disk_mb << 20) as store:
+        start = time.perf_counter()
+        for i in range(args.count):
+            store.put(pool[i % len(pool)], (i % args.destinations, 1), i)
+        seconds = time.perf_counter() - start
+        size = sum(len(data) for data in pool) / len(pool) * args.count
+        print(f"ingest: {args.count:,} bundles in {seconds:.1f}s -> {args.count / seconds:,.0f} bundles/s, "
+              f"{size / seconds / 1e6:.1f} MB/s")
+        print(f"  {store.stats()}")
+
+        rng = random.Random(0)
+        samples = []
+        for _ in range(args.lookups):
+            bundle_id = rng.randrange(args.count)
+            start = time.perf_counter()
+            store.get(bundle_id)
+            samples.append(time.perf_counter() - start)
+        latency("get", samples)
+
+        samples = []
+        for _ in range(min(args.lookups, 10000)):
+            destination = (rng.randrange(args.destinations), 1)
+            start = time.perf_counter()
+            store.find(destination)
+            samples.append(time.perf_counter() - start)
+        latency("find", samples)
+
+        start = time.perf_counter()
+        expired = store.expire(args.count // 2)
+        seconds = time.perf_counter() - start
+        print(f"  expire  {expired:,} bundles in {seconds:.2f}s ({expired / seconds:,.0f} bundles/s)")
+        print(f"  {store.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: cbor_utils encoders against the previous struct-based helpers.
+
+  uint heads       encode_uint over mixed small/large values (lookup table vs struct.pack per call)
+  ipn EID          [2, [node, service]] via cbor_utils.encode vs hand-concatenated heads
+  primary block    BPv7-style primary block via CBORWriter / encode() vs b"".join of helper output
+  decode           cbor_utils.decode of the primary block
+
+Usage:
+    python benchmarks/bench_cbor.py --count 200000
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.abspath(project_root))
+
+from core.engine import cbor_utils
+from core.engine.cbor_utils import CBORWriter
+
+def legacy_encode_uint(val):
+    """The struct-per-call encoder cbor_utils used before the head lookup table."""
+    if val < 24:
+        return struct.pack('B', val)
+    elif val < 256:
+        return struct.pack('BB', 24, val)
+    elif val < 65536:
+        return struct.pack('>BH', 25, val)
+    elif val < 4294967296:
+        return struct.pack('>BI', 26, val)
+    else:
+        return struct.pack('>BQ', 27, val)
+
+def legacy_eid(node, service):
+    inner = b'\x82' + legacy_encode_uint(node) + legacy_encode_uint(service)
+    return b'\x82' + legacy_encode_uint(2) + inner
+
+def legacy_primary(i):
+    return b"".join((
+        struct.pack('B', 0x80 + 8),
+        legacy_encode_uint(7), legacy_encode_uint(0), legacy_encode_uint(0),
+        legacy_eid(2000 + i % 97, 2), legacy_eid(i % 1000, 1), legacy_eid(0, 0),
+        b'\x82' + legacy_encode_uint(812345678) + legacy_encode_uint(i),
+        legacy_encode_uint(3600),
+    ))
+
+def encode_primary(i):
+    return cbor_utils.encode([7, 0, 0, [2, [2000 + i % 97, 2]], [2, [i % 1000, 1]], [2, [0, 0]], [812345678, i], 3600])
+
+def writer_primary(i):
+    return (CBORWriter()
+            .array_header(8).uint(7).uint(0).uint(0)
+            .encode([2, [2000 + i % 97, 2]]).encode([2, [i % 1000, 1]]).encode([2, [0, 0]])
+            .array_header(2).uint(812345678).uint(i)
+            .uint(3600)
+            .getvalue())
+
+def timed(label, count, run):
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    print(f"  {label:10} {count / seconds:12,.0f} ops/s")
+    return seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args()
+    count = args.count
+    # Mostly small values, as in bundle fields, with every head width represented
+    values = [(i * 7919) % (1 << (i % 40)) if i % 4 == 0 else i % 200 for i in range(count)]
+
+    assert all(legacy_encode_uint(v) == cbor_utils.encode_uint(v) for v in values[:1000])
+    assert all(legacy_primary(i) == writer_primary(i) == encode_primary(i) for i in range(1000))
+
+    print("uint heads")
+    old = timed("struct", count, lambda: [legacy_encode_uint(v) for v in values])
+    new = timed("table", count, lambda: [cbor_utils.encode_uint(v) for v in values])
+    print(f"  speedup    {old / new:.2f}x")
+
+    print("ipn EID")
+    old = timed("concat", count, lambda: [legacy_eid(i % 1000, 1) for i in range(count)])
+    new = timed("encode", count, lambda: [cbor_utils.encode([2, [i % 1000, 1]]) for i in range(count)])
+    print(f"  speedup    {old / new:.2f}x")
+
+    print("primary block")
+    old = timed("join", count, lambda: [legacy_primary(i) for i in range(count)])
+    new = timed("writer", count, lambda: [writer_primary(i) for i in range(count)])
+    print(f"  speedup    {old / new:.2f}x")
+    new = timed("encode", count, lambda: [encode_primary(i) for i in range(count)])
+    print(f"  speedup    {old / new:.2f}x")
+
+    print("decode")
+    blocks = [writer_primary(i) for i in range(count)]
+    timed("decode", count, lambda: [cbor_utils.decode(block) for block in blocks])
+
+if __name__ == "__main__":
+    main()
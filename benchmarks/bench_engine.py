@@ -0,0 +1,311 @@
+"""
+Benchmark suite: core/engine serialization cost, saved as JSON and checked against a baseline.
+
+Cases (select with --filter, a substring of the case name):
+
+  sdnv.encode / sdnv.decode           per value, over a mix of 1- to 10-byte SDNVs
+  cbor.encode_uint / cbor.encode      per value / per BPv7 primary block
+  serialize.<version>.<payload>       BaseBundle.serialize(), payloads from 0 B to 16 MiB
+  manager.<version>[.compact]         BufferManager.create_bundle_v6 / _v7, per bundle
+
+Each case is timed over --repeat samples of at least --min-time seconds, with the garbage
+collector paused as timeit does; the best sample is the figure compared, being the least
+disturbed by other load on the machine. Peak memory
+is the tracemalloc peak of a separate, untimed run: a payload copy or a per-bundle overhead
+shows up there even when the timing noise hides it.
+
+Results are written to --output. With a baseline (--baseline, default
+benchmarks/baselines/bench_engine.json) every case present in both is compared, and the run
+exits with status 1 if any case is more than --threshold slower or larger than the
+baseline. Baselines are machine-specific: record one with --update-baseline on the machine
+that runs the comparison.
+
+Usage:
+    python benchmarks/bench_engine.py
+    python benchmarks/bench_engine.py --quick --filter serialize --threshold 0.5
+    python benchmarks/bench_engine.py --update-baseline
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+# Add project root to path
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.abspath(project_root))
+
+from core.engine import cbor_utils
+from core.engine.base_bundle import BaseBundle
+from core.engine.sdnv import decode_sdnv, encode_sdnv
+from examples.nasa_hdtn.buffer_manager import BufferManager
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'bench_engine.json')
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'bench_engine.json')
+
+PAYLOAD_SIZES = [0, 64, 1 << 10, 64 << 10, 1 << 20, 16 << 20]
+QUICK_PAYLOAD_SIZES = [0, 1 << 10, 1 << 20]
+# Peak memory differences below this are noise (allocator pools, interned objects)
+MEMORY_NOISE_BYTES = 64 << 10
+
+def size_label(size):
+    for unit, shift in (("MiB", 20), ("KiB", 10)):
+        if size >= 1 << shift and size % (1 << shift) == 0:
+            return f"{size >> shift}{unit}"
+    return f"{size}B"
+
+class Case:
+    """One benchmark: `run()` performs `ops` operations covering `payload_bytes` bytes of payload."""
+
+    def __init__(self, name, run, ops=1, payload_bytes=0, setup=None):
+        self.name = name
+        self.run = run
+        self.ops = ops
+        self.payload_bytes = payload_bytes
+        self.setup = setup  # called before every run, untimed (e.g. clearing stored bundles)
+
+def build_cases(args):
+    rng = random.Random(0)
+    cases = []
+
+    # SDNV: 1- to 10-byte encodings, weighted towards the small values bundles mostly carry
+    values = [rng.choice([rng.randrange(128), rng.randrange(1 << 14), rng.randrange(1 << 32), rng.randrange(1 << 64)])
+              for _ in range(10000)]
+    encoded = b"".join(encode_sdnv(value) for value in values)
+
+    def sdnv_encode():
+        for value in values:
+            encode_sdnv(value)
+
+    def sdnv_decode():
+        offset = 0
+        while offset < len(encoded):
+            _, offset = decode_sdnv(encoded, offset)
+
+    cases.append(Case("sdnv.encode", sdnv_encode, ops=len(values)))
+    cases.append(Case("sdnv.decode", sdnv_decode, ops=len(values)))
+
+    def cbor_encode_uint():
+        for value in values:
+            cbor_utils.encode_uint(value)
+
+    primaries = [[7, 0, 0, [2, [2000 + i % 97, 2]], [2, [i % 1000, 1]], [2, [0, 0]], [812345678, i], 3600]
+                 for i in range(1000)]
+
+    def cbor_encode():
+        for primary in primaries:
+            cbor_utils.encode(primary)
+
+    cases.append(Case("cbor.encode_uint", cbor_encode_uint, ops=len(values)))
+    cases.append(Case("cbor.encode", cbor_encode, ops=len(primaries)))
+
+    manager = BufferManager()
+    templates = {
+        'bpv6': {"source_node": 1, "source_service": 1, "dest_node": 2, "dest_service": 1,
+                 "creation_timestamp": 812345678, "sequence_number": 7},
+        'bpv7': {"source_eid": cbor_utils.encode([2, [1, 1]]), "dest_eid": cbor_utils.encode([2, [2, 1]]),
+                 "report_to_eid": cbor_utils.encode([2, [0, 0]]), "creation_timestamp": 812345678, "sequence_number": 7},
+    }
+    for size in QUICK_PAYLOAD_SIZES if args.quick else PAYLOAD_SIZES:
+        payload = os.urandom(size)
+        for version, data in templates.items():
+            bundle = BaseBundle(manager.config[version], dict(data, payload=payload))
+            # Small bundles are serialized in a loop so per-call overhead dominates, as it does in practice
+            count = max(1, min(1000, (1 << 20) // max(size, 1)))
+
+            def serialize(bundle=bundle, count=count):
+                for _ in range(count):
+                    bundle.serialize()
+
+            cases.append(Case(f"serialize.{version}.{size_label(size)}", serialize, ops=count, payload_bytes=size * count))
+
+    count = args.bundles
+    for compact in (False, True):
+        batch_manager = BufferManager(compact=compact)
+        payload = os.urandom(args.batch_payload)
+        suffix = ".compact" if compact else ""
+
+        def create_v6(batch_manager=batch_manager, payload=payload):
+            for i in range(count):
+                batch_manager.create_bundle_v6((i % 1000, 1), (2000 + i % 97, 2), payload)
+
+        def create_v7(batch_manager=batch_manager, payload=payload):
+            for i in range(count):
+                batch_manager.create_bundle_v7((i % 1000, 1), (2000 + i % 97, 2), payload)
+
+        clear = batch_manager.bundles.clear
+        cases.append(Case(f"manager.bpv6{suffix}", create_v6, ops=count, setup=clear))
+        cases.append(Case(f"manager.bpv7{suffix}", create_v7, ops=count, setup=clear))
+
+    return [case for case in cases if args.filter in case.name]
+
+def time_case(case, repeat, min_time):
+    """Seconds per operation: (best, median) over `repeat` samples of >= `min_time` seconds each."""
+    # Calibrate how many runs make one sample long enough to time reliably
+    runs = 1
+    while True:
+        elapsed = sample(case, runs)
+        if elapsed >= min_time or runs >= 1 << 20:
+            break
+        runs *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    samples = sorted([elapsed] + [sample(case, runs) for _ in range(repeat - 1)])
+    per_op = [elapsed / (runs * case.ops) for elapsed in samples]
+    return per_op[0], per_op[len(per_op) // 2]
+
+def sample(case, runs):
+    elapsed = 0.0
+    # Like timeit, collection is kept out of the timings: when it triggers depends on
+    # everything allocated earlier in the process, so it would make cases depend on each other
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(runs):
+            if case.setup:
+                case.setup()
+            start = time.perf_counter()
+            case.run()
+            elapsed += time.perf_counter() - start
+    finally:
+        gc.enable()
+    return elapsed
+
+def peak_memory(case):
+    """tracemalloc peak, in bytes, of one run (above what was allocated before it)."""
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - before)
+
+def run_suite(args):
+    results = {}
+    for case in build_cases(args):
+        best, median = time_case(case, args.repeat, args.min_time)
+        result = {
+            "seconds_per_op": best,
+            "median_seconds_per_op": median,
+            "ops_per_second": 1 / best if best else None,
+            "peak_bytes": peak_memory(case),
+        }
+        if case.payload_bytes:
+            result["payload_mb_per_second"] = case.payload_bytes / case.ops / best / 1e6
+        results[case.name] = result
+        rate = f"{result['payload_mb_per_second']:10.1f} MB/s" if case.payload_bytes else f"{result['ops_per_second']:12,.0f}/s"
+        print(f"  {case.name:28} {best * 1e6:12.3f}us/op {rate:>15}  peak {result['peak_bytes'] / 1024:10.1f} KiB")
+        if case.setup:
+            case.setup()  # release what the case stored
+    return results
+
+def environment():
+    import numpy
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "numpy": numpy.__version__,
+    }
+
+def compare(results, baseline, threshold):
+    """
+    Compares results with a baseline's.
+    :return: List of (case, metric, baseline value, current value, ratio) exceeding the threshold.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = current["seconds_per_op"] / previous["seconds_per_op"] if previous["seconds_per_op"] else 1.0
+        if ratio > 1 + threshold:
+            regressions.append((name, "seconds_per_op", previous["seconds_per_op"], current["seconds_per_op"], ratio))
+        before, after = previous.get("peak_bytes"), current.get("peak_bytes")
+        if before is not None and after is not None and after - before > MEMORY_NOISE_BYTES:
+            ratio = after / before if before else float("inf")
+            if ratio > 1 + threshold:
+                regressions.append((name, "peak_bytes", before, after, ratio))
+    return regressions
+
+def print_comparison(results, baseline, regressions):
+    print(f"\n{'case':30} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:30} {'-':>12} {current['seconds_per_op'] * 1e6:10.3f}us {'new':>9}")
+            continue
+        change = current["seconds_per_op"] / previous["seconds_per_op"] - 1 if previous["seconds_per_op"] else 0.0
+        print(f"{name:30} {previous['seconds_per_op'] * 1e6:10.3f}us {current['seconds_per_op'] * 1e6:10.3f}us {change:+8.1%}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for name, metric, before, after, ratio in regressions:
+            print(f"  {name} {metric}: {before:.6g} -> {after:.6g} ({ratio:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown / memory growth as a fraction of the baseline (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to --baseline instead of comparing")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="Payloads up to 1 MiB and fewer samples")
+    parser.add_argument("--repeat", type=int, default=None, help="Timed samples per case (default 7, --quick 3)")
+    parser.add_argument("--min-time", type=float, default=None, help="Minimum seconds per sample (default 0.1, --quick 0.02)")
+    parser.add_argument("--bundles", type=int, default=10000, help="Bundles per BufferManager batch")
+    parser.add_argument("--batch-payload", type=int, default=512, help="Payload size of BufferManager batch bundles")
+    args = parser.parse_args()
+    if args.repeat is None:
+        args.repeat = 3 if args.quick else 7
+    if args.min_time is None:
+        args.min_time = 0.02 if args.quick else 0.1
+
+    print(f"core/engine benchmark suite ({'quick' if args.quick else 'full'}, best of {args.repeat})")
+    results = run_suite(args)
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {"quick": args.quick, "repeat": args.repeat, "min_time": args.min_time,
+                     "bundles": args.bundles, "batch_payload": args.batch_payload},
+        # ru_maxrss is in kilobytes on Linux
+        "process_peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "results": results,
+    }
+
+    path = args.baseline if args.update_baseline else args.output
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"\nResults written to {path}")
+    if args.update_baseline:
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --update-baseline")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != report["environment"]:
+        print("Warning: the baseline was recorded in a different environment; timings may not be comparable")
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+    print_comparison(results, baseline.get("results", {}), regressions)
+    if regressions:
+        print(f"\nFAILED: {len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print(f"\nOK: no case regressed by more than {args.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark: fragmenting a large payload file and reassembling it, in constant memory.
+
+Writes a --size-mb payload file, fragments it (read one fragment at a time) into a capture
+file of serialized fragments, then stream-decodes the capture and reassembles the payload
+into a preallocated output file. Reports throughput for each phase and the process's peak
+RSS, which should stay flat as --size-mb grows.
+
+Usage:
+    python benchmarks/bench_fragmentation.py --size-mb 1024 --max-size 65536 --version bpv7
+"""
+import argparse
+import filecmp
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+# Add project root to path
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.abspath(project_root))
+
+from core.engine import cbor_utils
+from core.engine.decoder import read_bundles
+from core.engine.fragment import Reassembler, fragment
+from examples.nasa_hdtn.buffer_manager import BufferManager
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256, help="Payload size in MiB")
+    parser.add_argument("--max-size", type=int, default=65536, help="Maximum serialized fragment size")
+    parser.add_argument("--version", choices=["bpv6", "bpv7"], default="bpv7")
+    args = parser.parse_args()
+
+    config = BufferManager().config[args.version]
+    if args.version == "bpv6":
+        data = {"source_node": 1, "source_service": 1, "dest_node": 2, "dest_service": 1}
+    else:
+        data = {"source_eid": cbor_utils.encode([2, [1, 1]]), "dest_eid": cbor_utils.encode([2, [2, 1]]),
+                "report_to_eid": cbor_utils.encode([2, [0, 0]])}
+    size = args.size_mb << 20
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = os.path.join(tmpdir, "payload.bin")
+        block = random.Random(0).randbytes(1 << 20)
+        with open(source, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(block)
+        print(f"{args.version}: {args.size_mb} MiB payload, fragments of at most {args.max_size} bytes")
+        print(f"  peak RSS after setup:  {peak_rss_mb():8.1f} MiB")
+
+        capture = os.path.join(tmpdir, "fragments.bin")
+        start = time.perf_counter()
+        count = 0
+        with open(source, "rb") as payload, open(capture, "wb") as out:
+            for bundle in fragment(config, data, payload, args.max_size):
+                out.write(bundle.serialize())
+                count += 1
+        seconds = time.perf_counter() - start
+        print(f"  fragment:    {count:,} fragments in {seconds:6.2f}s -> {size / seconds / 1e6:8.1f} MB/s")
+
+        start = time.perf_counter()
+        reassembler = Reassembler(os.path.join(tmpdir, "out"))
+        result = None
+        with open(capture, "rb") as f:
+            for bundle in read_bundles(config, f):
+                result = reassembler.add(bundle) or result
+        seconds = time.perf_counter() - start
+        print(f"  reassemble:  {count:,} fragments in {seconds:6.2f}s -> {size / seconds / 1e6:8.1f} MB/s")
+
+        if result is None or not filecmp.cmp(source, result, shallow=False):
+            sys.exit("Reassembled payload does not match the source")
+        print(f"  peak RSS overall:      {peak_rss_mb():8.1f} MiB (payload {args.size_mb} MiB)")
+
+if __name__ == "__main__":
+    main()
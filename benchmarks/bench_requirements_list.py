@@ -0,0 +1,104 @@
+"""
+Benchmark: GET /requirements serialization and compression.
+
+Seeds a temporary database with --rows requirements and times the list endpoint
+through the ASGI app:
+
+  orm+response_model   ORM objects validated per row by FastAPI (previous route)
+  fast path            SQL tuples -> orjson (current route), response cache cleared
+  fast path, cached    same URL and data version served from the response cache
+  304                  If-None-Match revalidation
+
+each with identity, gzip and (if installed) brotli encodings. Reports p50/p99
+latency and bytes on the wire.
+
+Usage:
+    python benchmarks/bench_requirements_list.py --rows 20000 --repeat 30
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+# Add project root to path
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.abspath(project_root))
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+def report(label, timings, size):
+    print(f"{label:42} p50={statistics.median(timings):8.2f}ms  p99={percentile(timings, 0.99):8.2f}ms  "
+          f"bytes={size:>10,}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    os.chdir(tmpdir.name)  # the API opens data/project.db relative to the working directory
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from fastapi.testclient import TestClient
+        from core import db
+        import api.main as api
+        import api.database as models
+        from api import schemas
+        from api.http_cache import response_cache, brotli
+
+        words = "the system shall provide telemetry downlink bundle custody transfer within seconds".split()
+        db.save_requirements([
+            {
+                "ID": f"REQ-{i:06d}",
+                "Requirement Name": f"Requirement {i}",
+                "Requirement": " ".join(words[(i + k) % len(words)] for k in range(24)),
+                "Generated Code": f"def test_req_{i}():\n    assert True\n" if i % 2 else "",
+            }
+            for i in range(args.rows)
+        ], "bench.pdf", "1.0", doc_title="Benchmark Spec")
+
+    @api.app.get("/bench/orm", response_model=List[schemas.RequirementSummary])
+    def orm_route(source_file: str):
+        session = models.SessionLocal()
+        try:
+            return session.query(models.Requirement).filter(models.Requirement.source_file == source_file).all()
+        finally:
+            session.close()
+
+    client = TestClient(api.app)
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+
+    def run(url, encoding, clear_cache, extra_headers=None):
+        timings, size = [], 0
+        for _ in range(args.repeat):
+            if clear_cache:
+                response_cache.clear()
+            headers = {"Accept-Encoding": encoding, **(extra_headers or {})}
+            start = time.perf_counter()
+            response = client.get(url, headers=headers)
+            timings.append((time.perf_counter() - start) * 1000)
+            size = int(response.headers.get("content-length", 0))
+        return timings, size
+
+    print(f"{args.rows} requirements, {args.repeat} requests per case")
+    for encoding in encodings:
+        if encoding == "identity":
+            report("orm+response_model", *run("/bench/orm?source_file=bench.pdf", encoding, False))
+        report(f"fast path [{encoding}]", *run("/requirements?source_file=bench.pdf", encoding, True))
+        report(f"fast path, cached [{encoding}]", *run("/requirements?source_file=bench.pdf", encoding, False))
+        etag = client.get("/requirements?source_file=bench.pdf", headers={"Accept-Encoding": encoding}).headers["etag"]
+        report(f"304 [{encoding}]", *run("/requirements?source_file=bench.pdf", encoding, False, {"If-None-Match": etag}))
+
+    os.chdir(project_root)
+    tmpdir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: full-text requirement search (SQLite FTS5) on a synthetic corpus.
+
+Usage:
+    python benchmarks/bench_search.py --rows 500000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from core import db
+
+DOMAIN_WORDS = (
+    "bundle custody transfer telemetry node storage contact plan routing convergence layer "
+    "retransmission fragment payload lifetime expiry acknowledgement encryption integrity "
+    "ground station spacecraft downlink uplink buffer queue priority timer clock epoch"
+).split()
+
+# Zipf-distributed vocabulary: a few very common words, a long tail of rare ones,
+# which is how real specification text behaves.
+VOCABULARY = DOMAIN_WORDS + [f"term{i}" for i in range(20000)]
+random.Random(0).shuffle(VOCABULARY)
+WEIGHTS = [1.0 / (rank + 1) ** 1.1 for rank in range(len(VOCABULARY))]
+
+def word_at_rank(rank: int) -> str:
+    return VOCABULARY[rank]
+
+# Common, mid-frequency, rare, prefix and multi-term queries
+QUERIES = [word_at_rank(5), word_at_rank(200), word_at_rank(5000), word_at_rank(50)[:4] + "*",
+           f"{word_at_rank(20)} {word_at_rank(300)}"]
+
+def build_corpus(rows: int, projects: int = 20):
+    rng = random.Random(1)
+    batch = []
+    for i in range(rows):
+        words = rng.choices(VOCABULARY, weights=WEIGHTS, k=24)
+        batch.append({
+            "ID": f"REQ-{i:07d}",
+            "Requirement Name": " ".join(words[:3]).title(),
+            "Requirement": "The system shall " + " ".join(words[3:18]) + ".",
+            "Rationale": " ".join(words[18:]),
+        })
+        if len(batch) == 10000 or i == rows - 1:
+            db.save_requirements(batch, f"spec-{i % projects}.pdf", "4.1")
+            batch = []
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db.DB_PATH = os.path.join(tmpdir, "bench.db")
+        db.init_db()
+
+        start = time.perf_counter()
+        build_corpus(args.rows)
+        print(f"Indexed {args.rows} requirements in {time.perf_counter() - start:.1f}s")
+
+        for q in QUERIES:
+            for source_file in (None, "spec-3.pdf"):
+                timings = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    db.search_requirements(q, source_file=source_file, limit=20)
+                    timings.append((time.perf_counter() - t0) * 1000)
+                timings.sort()
+                scope = source_file or "all"
+                print(f"{q!r:28} [{scope:10}] p50={statistics.median(timings):7.2f}ms "
+                      f"p99={timings[int(len(timings) * 0.99) - 1]:7.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: database initialisation and API import time (cold start).
+
+Measures init_db() against a fresh database (all migrations run) and against an
+up-to-date database (a single PRAGMA user_version read), plus the wall time of
+importing api.main in a fresh interpreter.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 50
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add project root to path
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(project_root)
+
+from core import db
+
+def time_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+def summarize(label: str, timings):
+    timings = sorted(timings)
+    print(f"{label:32} p50={statistics.median(timings):8.2f}ms  max={timings[-1]:8.2f}ms  (n={len(timings)})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--imports", type=int, default=5, help="Fresh interpreters to time for 'import api.main'")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fresh = []
+        for i in range(min(args.repeat, 10)):
+            db.DB_PATH = os.path.join(tmpdir, f"fresh-{i}.db")
+            with contextlib.redirect_stdout(io.StringIO()):
+                fresh.append(time_ms(db.init_db))
+        summarize("init_db (fresh database)", fresh)
+
+        db.DB_PATH = os.path.join(tmpdir, "current.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.init_db()
+        summarize("init_db (up-to-date database)", [time_ms(db.init_db) for _ in range(args.repeat)])
+
+        # Cold import of the API in its own interpreter and working directory
+        env = dict(os.environ, PYTHONPATH=os.path.abspath(project_root), PYTHONWARNINGS="ignore")
+        imports = []
+        for _ in range(args.imports):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "import api.main"], cwd=tmpdir, env=env, check=True,
+                           stdout=subprocess.DEVNULL)
+            imports.append((time.perf_counter() - start) * 1000)
+        summarize("python -c 'import api.main'", imports)
+
+if __name__ == "__main__":
+    main()
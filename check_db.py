@@ -6,7 +6,7 @@ import json
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from core.verification_engine import VerificationEngine
-from core.db import get_requirements, update_verification_result, update_generated_code, update_execution_result
+from core.db import get_requirements, get_requirement_by_id, update_verification_result, update_generated_code, update_execution_result
 
 def test_generation():
     # Use a generic demo key or prompt the user, since we can't extract it easily from Next.js localstorage via terminal
@@ -21,12 +21,14 @@ def test_generation():
     executed = 0
     
     for r in reqs:
-        print(f"[{r['ID']}] Status: {r['Status']} | Code Length: {len(r.get('Generated Code', ''))}")
+        # List rows only flag generated code; the code itself is loaded per requirement
+        code = get_requirement_by_id(r['ID'])['Generated Code'] if r['Has Generated Code'] else ''
+        print(f"[{r['ID']}] Status: {r['Status']} | Code Length: {len(code)}")
         if r['Status'] != 'Pending':
             analyzed += 1
-        if r.get('Generated Code'):
+        if code:
             generated += 1
-        if r.get('Verification Method') == 'Test' and r.get('Generated Code') and 'Pass' in str(r):
+        if r.get('Verification Method') == 'Test' and code and 'Pass' in str(r):
              executed += 1
 
     print(f"\nSummary:")
@@ -0,0 +1,83 @@
+import hashlib
+import sqlite3
+import zlib
+from typing import Optional, Tuple
+
+# Codec tag stored next to each blob so other codecs can be added without rewriting rows
+ARTIFACT_CODEC = "zlib"
+COMPRESSION_LEVEL = 6
+
+ARTIFACTS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS artifacts (
+        hash TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )
+'''
+
+def artifact_hash(text: str) -> str:
+    """Content address of a text artifact (SHA-256 of its UTF-8 bytes)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def encode_artifact(text: str) -> Tuple[str, str, int, bytes]:
+    """
+    Compresses a text artifact for storage.
+
+    Args:
+        text (str): The artifact content (generated code, pytest log, ...).
+
+    Returns:
+        Tuple[str, str, int, bytes]: (hash, codec, uncompressed size, compressed blob).
+    """
+    raw = text.encode("utf-8")
+    return hashlib.sha256(raw).hexdigest(), ARTIFACT_CODEC, len(raw), zlib.compress(raw, COMPRESSION_LEVEL)
+
+def decode_artifact(codec: str, data: bytes) -> str:
+    """Decompresses a stored artifact blob back to text."""
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    if codec == "raw":
+        return bytes(data).decode("utf-8")
+    raise ValueError(f"Unknown artifact codec: {codec}")
+
+def put_artifact(cursor: sqlite3.Cursor, text: Optional[str]) -> Optional[str]:
+    """
+    Stores a text artifact (deduplicated by content) and returns its hash.
+
+    Empty artifacts are not stored; None is returned so the requirement keeps a NULL reference.
+    """
+    if not text:
+        return None
+    digest, codec, size, blob = encode_artifact(text)
+    cursor.execute(
+        'INSERT OR IGNORE INTO artifacts (hash, codec, size, data) VALUES (?, ?, ?, ?)',
+        (digest, codec, size, blob)
+    )
+    return digest
+
+# Deletes one artifact unless a requirement still references it (artifacts are shared by content)
+RELEASE_ARTIFACT_SQL = '''
+    DELETE FROM artifacts WHERE hash = :hash AND NOT EXISTS (
+        SELECT 1 FROM requirements WHERE generated_code_ref = :hash OR execution_log_ref = :hash
+    )
+'''
+
+def release_artifact(cursor: sqlite3.Cursor, digest: Optional[str]):
+    """
+    Drops an artifact a requirement has stopped referencing, if nothing else uses it.
+
+    Call it after the requirement row has been repointed, in the same transaction.
+    """
+    if digest:
+        cursor.execute(RELEASE_ARTIFACT_SQL, {"hash": digest})
+
+def get_artifact(cursor: sqlite3.Cursor, digest: Optional[str]) -> str:
+    """Loads and decompresses an artifact by hash. Missing references read as an empty string."""
+    if not digest:
+        return ""
+    cursor.execute('SELECT codec, data FROM artifacts WHERE hash = ?', (digest,))
+    row = cursor.fetchone()
+    if row is None:
+        return ""
+    return decode_artifact(row[0], row[1])
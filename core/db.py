@@ -1,155 +1,77 @@
 import sqlite3
 import os
 import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from core.log_sink import LogSink
+from core.artifacts import put_artifact, get_artifact, release_artifact
+from core.migrations import migrate, STAT_DIMENSIONS
+from core.metrics import Gauge, timed_write
 
 DB_PATH = os.path.join("data", "project.db")
 
+# system_logs retention (overridable per deployment)
+LOG_MAX_ROWS = int(os.environ.get("ASV_LOG_MAX_ROWS", "50000"))
+LOG_MAX_AGE_DAYS = float(os.environ.get("ASV_LOG_MAX_AGE_DAYS", "30"))
+
+_log_sink: Optional[LogSink] = None
+
 def init_db():
-    """Initialize the SQLite database and create tables if they don't exist."""
+    """Initialize the SQLite database, applying any pending schema migrations."""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Added req_name column
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS requirements (
-            id TEXT PRIMARY KEY,
-            req_id TEXT,
-            req_name TEXT, 
-            text TEXT,
-            section TEXT,
-            source_file TEXT,
-            status TEXT,
-            priority TEXT,
-            source_type TEXT,
-            verification_method TEXT,
-            rationale TEXT,
-            generated_code TEXT,
-            verification_status TEXT,
-            execution_log TEXT,
-            last_run_timestamp DATETIME,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Migration: Add columns if they don't exist (Safe for existing DBs)
-    try:
-        cursor.execute("ALTER TABLE requirements ADD COLUMN verification_method TEXT")
-    except sqlite3.OperationalError:
-        pass # Column exists
-        
-    try:
-        cursor.execute("ALTER TABLE requirements ADD COLUMN rationale TEXT")
-    except sqlite3.OperationalError:
-        pass # Column exists
-
-    try:
-        cursor.execute("ALTER TABLE requirements ADD COLUMN generated_code TEXT")
-    except sqlite3.OperationalError:
-        pass # Column exists
-
-    # Added system_logs table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS system_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            level TEXT,
-            message TEXT
-        )
-    ''')
-    
-    # Added projects table for metadata
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS projects (
-            filename TEXT PRIMARY KEY,
-            title TEXT,
-            req_count INTEGER,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
+    migrate(conn)
     conn.close()
-    
-    # Run Migration
-    migrate_projects_metadata()
-    check_and_migrate()
 
-def check_and_migrate():
-    """Explicitly check for and add missing columns (Defensive Migration)."""
+@timed_write("upsert_project_metadata")
+def upsert_project_metadata(filename: str, title: str):
+    """Set a project's title. Counts are maintained by triggers and left untouched."""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
-    # Check columns in requirements table
-    cursor.execute("PRAGMA table_info(requirements)")
-    columns = [info[1] for info in cursor.fetchall()]
-    
-    required_columns = [
-        "generated_code", 
-        "verification_method", 
-        "rationale", 
-        "verification_status", 
-        "execution_log"
-    ]
-    
-    for col in required_columns:
-        if col not in columns:
-            try:
-                cursor.execute(f"ALTER TABLE requirements ADD COLUMN {col} TEXT")
-                print(f"Migrated: Added column '{col}' to requirements table.")
-            except sqlite3.OperationalError:
-                pass # Already exists
-                
-    conn.commit()
-    conn.close()
-
-def migrate_projects_metadata():
-    """Backfill projects table from existing requirements."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Find projects that are in requirements but NOT in projects table
     cursor.execute('''
-        SELECT DISTINCT source_file 
-        FROM requirements 
-        WHERE source_file IS NOT NULL 
-        AND source_file != ""
-        AND source_file NOT IN (SELECT filename FROM projects)
-    ''')
-    
-    missing_projects = [row[0] for row in cursor.fetchall()]
+        INSERT INTO projects (filename, title, req_count, last_updated)
+        VALUES (?, ?, 0, CURRENT_TIMESTAMP)
+        ON CONFLICT (filename) DO UPDATE SET title = excluded.title, last_updated = CURRENT_TIMESTAMP
+    ''', (filename, title))
     
-    for filename in missing_projects:
-        # Get count
-        cursor.execute('SELECT COUNT(*) FROM requirements WHERE source_file = ?', (filename,))
-        count = cursor.fetchone()[0]
-        
-        # Insert with default title
-        cursor.execute('''
-            INSERT INTO projects (filename, title, req_count, last_updated)
-            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-        ''', (filename, filename, count)) # Use filename as title for legacy data
-        
-    if missing_projects:
-        print(f"Migrated {len(missing_projects)} projects to metadata table.")
-        
     conn.commit()
     conn.close()
 
-def upsert_project_metadata(filename: str, title: str, req_count: int):
-    """Update project metadata."""
+def get_project_stats(filename: str) -> Optional[Dict]:
+    """
+    Retrieve a project's precomputed aggregates.
+
+    Returns:
+        Optional[Dict]: Totals, per-status / per-method / per-verification-status counts and
+        pass/fail/error shortcuts, or None if the project does not exist.
+    """
     conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    cursor.execute('''
-        INSERT OR REPLACE INTO projects (filename, title, req_count, last_updated)
-        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-    ''', (filename, title, req_count))
-    
-    conn.commit()
+    cursor.execute('SELECT filename, title, req_count, last_updated FROM projects WHERE filename = ?', (filename,))
+    project = cursor.fetchone()
+    if project is None:
+        conn.close()
+        return None
+    cursor.execute('SELECT dimension, value, count FROM project_stats WHERE filename = ?', (filename,))
+    rows = cursor.fetchall()
     conn.close()
+    
+    stats = {
+        "filename": project['filename'],
+        "title": project['title'],
+        "total": project['req_count'] or 0,
+        "last_updated": project['last_updated'],
+    }
+    for dim in STAT_DIMENSIONS:
+        stats[dim] = {}
+    for row in rows:
+        stats[row['dimension']][row['value']] = row['count']
+    for outcome in ("Pass", "Fail", "Error"):
+        stats[outcome.lower()] = stats["verification_status"].get(outcome, 0)
+    return stats
 
 def get_all_projects() -> List[Dict]:
     """Retrieve all projects with metadata."""
@@ -169,6 +91,7 @@ def get_all_projects() -> List[Dict]:
     
     return [dict(row) for row in rows]
 
+@timed_write("save_requirements")
 def save_requirements(requirements: List[Dict], source_file: str, section: str, doc_title: str = None):
     """
     Save a list of requirements to the database.
@@ -177,9 +100,20 @@ def save_requirements(requirements: List[Dict], source_file: str, section: str,
     cursor = conn.cursor()
     
     for req in requirements:
+        cursor.execute('SELECT generated_code_ref, execution_log_ref FROM requirements WHERE id = ?', (req['ID'],))
+        previous = cursor.fetchone() or ()
+        # Upsert rather than INSERT OR REPLACE: REPLACE deletes rows without firing delete
+        # triggers, which would leave stale entries in the search index.
         cursor.execute('''
-            INSERT OR REPLACE INTO requirements (id, req_id, req_name, text, section, source_file, status, priority, source_type, verification_method, rationale, generated_code)
+            INSERT INTO requirements (id, req_id, req_name, text, section, source_file, status, priority, source_type, verification_method, rationale, generated_code_ref)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                req_id = excluded.req_id, req_name = excluded.req_name, text = excluded.text,
+                section = excluded.section, source_file = excluded.source_file, status = excluded.status,
+                priority = excluded.priority, source_type = excluded.source_type,
+                verification_method = excluded.verification_method, rationale = excluded.rationale,
+                generated_code_ref = excluded.generated_code_ref,
+                verification_status = NULL, execution_log_ref = NULL, last_run_timestamp = NULL
         ''', (
             req['ID'], 
             req['ID'],
@@ -192,28 +126,23 @@ def save_requirements(requirements: List[Dict], source_file: str, section: str,
             req.get('Source', 'Original'),
             req.get('Verification Method', ''),
             req.get('Rationale', ''),
-            req.get('Generated Code', '')
+            put_artifact(cursor, req.get('Generated Code', ''))
         ))
+        for digest in previous:
+            release_artifact(cursor, digest)
         
     conn.commit()
     conn.close()
     
-    # Update Project Metadata
+    # Update Project Metadata (requirement counts are kept current by triggers)
     if doc_title:
-        # Get total count for this file
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM requirements WHERE source_file = ?', (source_file,))
-        count = cursor.fetchone()[0]
-        conn.close()
-        
-        upsert_project_metadata(source_file, doc_title, count)
+        upsert_project_metadata(source_file, doc_title)
 
 def get_available_specs() -> List[str]:
     """Retrieve a list of unique specification files (projects)."""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute('SELECT DISTINCT source_file FROM requirements WHERE source_file IS NOT NULL AND source_file != ""')
+    cursor.execute('SELECT filename FROM projects WHERE req_count > 0')
     rows = cursor.fetchall()
     conn.close()
     return [row[0] for row in rows]
@@ -221,12 +150,18 @@ def get_available_specs() -> List[str]:
 def get_requirements(section: Optional[str] = None, source_file: Optional[str] = None) -> List[Dict]:
     """
     Retrieve requirements from the database, optionally filtered by section and source file.
+    
+    Only hot metadata is returned; use get_requirement_by_id for generated code and logs.
     """
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    query = 'SELECT * FROM requirements WHERE 1=1'
+    query = '''
+        SELECT id, req_name, text, status, priority, source_type, verification_method, rationale,
+               generated_code_ref IS NOT NULL AS has_generated_code
+        FROM requirements WHERE 1=1
+    '''
     params = []
     
     if section and section.strip():
@@ -252,12 +187,124 @@ def get_requirements(section: Optional[str] = None, source_file: Optional[str] =
             "Priority": row['priority'],
             "Source": row['source_type'],
             "Verification Method": row['verification_method'] if 'verification_method' in row.keys() else '',
-            "Rationale": row['rationale'] if 'rationale' in row.keys() else '',
-            "Generated Code": row['generated_code'] if 'generated_code' in row.keys() else ''
+            "Rationale": row['rationale'],
+            "Has Generated Code": bool(row['has_generated_code'])
         })
         
     return results
 
+# Field order of API list rows (api.schemas.RequirementSummary)
+SUMMARY_FIELDS = (
+    "id", "req_id", "req_name", "text", "section", "source_file", "status", "priority", "source_type",
+    "verification_method", "rationale", "verification_status", "has_generated_code", "has_execution_log",
+    "created_at", "last_run_timestamp", "change_seq"
+)
+
+def get_requirement_summaries(source_file: Optional[str] = None, section: Optional[str] = None) -> List[Dict]:
+    """
+    Requirement list rows for the API, built straight from SQL tuples (no ORM objects or
+    per-row model validation). Timestamps come back in ISO 8601 form, as the API models emit them.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    query = '''
+        SELECT id, req_id, req_name, text, section, source_file, status, priority, source_type,
+               verification_method, rationale, verification_status,
+               generated_code_ref IS NOT NULL, execution_log_ref IS NOT NULL,
+               replace(created_at, ' ', 'T'), replace(last_run_timestamp, ' ', 'T'), change_seq
+        FROM requirements WHERE 1=1
+    '''
+    params = []
+    if source_file:
+        query += ' AND source_file = ?'
+        params.append(source_file)
+    if section:
+        query += ' AND section = ?'
+        params.append(section)
+    # Insertion order (an index walk on source_file could return edited rows last)
+    query += ' ORDER BY rowid'
+
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
+
+    results = []
+    for row in rows:
+        summary = dict(zip(SUMMARY_FIELDS, row))
+        summary["has_generated_code"] = bool(row[12])
+        summary["has_execution_log"] = bool(row[13])
+        results.append(summary)
+    return results
+
+def _fts_query(text: str) -> str:
+    """Turn free-form user input into a safe FTS5 query (implicit AND, trailing * = prefix)."""
+    terms = []
+    for token in text.split():
+        prefix = token.endswith("*")
+        token = token.rstrip("*")
+        if not token:
+            continue
+        term = '"' + token.replace('"', '""') + '"'
+        terms.append(term + "*" if prefix else term)
+    return " ".join(terms)
+
+def search_requirements(query: str, source_file: Optional[str] = None, limit: int = 20, offset: int = 0) -> Tuple[List[Dict], bool]:
+    """
+    Full-text search over requirement names, text and rationale, best matches first (bm25).
+
+    Args:
+        query (str): User search terms. Terms are ANDed; a trailing '*' makes a term a prefix match.
+        source_file (Optional[str]): Restrict results to one project.
+        limit (int): Page size.
+        offset (int): Number of hits to skip.
+
+    Returns:
+        Tuple[List[Dict], bool]: The page of hits (with highlighted snippets) and whether more hits exist.
+    """
+    match = _fts_query(query)
+    if not match:
+        return [], False
+    
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    # Pass 1: rank matches and pick the page. Only rowids and scores are carried through the
+    # sort; fetching one extra row tells us whether another page exists without counting hits.
+    sql = 'SELECT requirements_fts.rowid, -requirements_fts.rank AS score FROM requirements_fts'
+    params = [match]
+    if source_file and source_file.strip() and source_file != "All Projects":
+        sql += ' JOIN requirements r ON r.rowid = requirements_fts.rowid WHERE requirements_fts MATCH ? AND r.source_file = ?'
+        params.append(source_file)
+    else:
+        sql += ' WHERE requirements_fts MATCH ?'
+    sql += ' ORDER BY requirements_fts.rank LIMIT ? OFFSET ?'
+    params.extend([limit + 1, offset])
+    cursor.execute(sql, tuple(params))
+    ranked = cursor.fetchall()
+    has_more = len(ranked) > limit
+    scores = {row['rowid']: row['score'] for row in ranked[:limit]}
+    
+    # Pass 2: build snippets and load metadata for the page only
+    results = []
+    if scores:
+        placeholders = ", ".join("?" * len(scores))
+        cursor.execute(f'''
+            SELECT requirements_fts.rowid, r.id, r.req_id, r.req_name, r.source_file, r.status, r.priority,
+                   snippet(requirements_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet
+            FROM requirements_fts
+            JOIN requirements r ON r.rowid = requirements_fts.rowid
+            WHERE requirements_fts MATCH ? AND requirements_fts.rowid IN ({placeholders})
+        ''', (match, *scores))
+        rows = {row['rowid']: row for row in cursor.fetchall()}
+        for rowid, score in scores.items():
+            hit = dict(rows[rowid])
+            del hit['rowid']
+            hit['score'] = score
+            results.append(hit)
+    conn.close()
+    
+    return results, has_more
+
+@timed_write("update_requirement")
 def update_requirement(req_id: str, text: str, status: str, priority: str, source_type: str, verification_method: Optional[str] = None):
     """Update a single requirement's fields."""
     conn = sqlite3.connect(DB_PATH)
@@ -280,13 +327,16 @@ def update_requirement(req_id: str, text: str, status: str, priority: str, sourc
     conn.close()
 
 def get_requirement_by_id(req_id: str) -> Optional[Dict]:
-    """Retrieve a single requirement by ID."""
+    """Retrieve a single requirement by ID, including its generated code and execution log."""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
     cursor.execute('SELECT * FROM requirements WHERE id = ?', (req_id,))
     row = cursor.fetchone()
+    if row:
+        generated_code = get_artifact(cursor, row['generated_code_ref'])
+        execution_log = get_artifact(cursor, row['execution_log_ref'])
     conn.close()
     
     if row:
@@ -299,10 +349,13 @@ def get_requirement_by_id(req_id: str) -> Optional[Dict]:
             "Source": row['source_type'],
             "Verification Method": row['verification_method'] if 'verification_method' in row.keys() else '',
             "Rationale": row['rationale'] if 'rationale' in row.keys() else '',
-            "Generated Code": row['generated_code'] if 'generated_code' in row.keys() else ''
+            "Generated Code": generated_code,
+            "Verification Status": row['verification_status'],
+            "Execution Log": execution_log
         }
     return None
 
+@timed_write("update_verification_result")
 def update_verification_result(req_id: str, status: str, verification_method: str, rationale: str):
     """Update requirement with verification results."""
     conn = sqlite3.connect(DB_PATH)
@@ -317,32 +370,43 @@ def update_verification_result(req_id: str, status: str, verification_method: st
     conn.commit()
     conn.close()
 
+@timed_write("update_generated_code")
 def update_generated_code(req_id: str, code: str):
     """Update requirement with generated test code."""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
+    cursor.execute('SELECT generated_code_ref FROM requirements WHERE id = ?', (req_id,))
+    previous = cursor.fetchone()
     cursor.execute('''
         UPDATE requirements 
-        SET generated_code = ?
+        SET generated_code_ref = ?
         WHERE id = ?
-    ''', (code, req_id))
+    ''', (put_artifact(cursor, code), req_id))
+    if previous:
+        release_artifact(cursor, previous[0])
     
     conn.commit()
     conn.close()
 
+@timed_write("update_execution_result")
 def update_execution_result(req_id, status, log):
     """Update the execution result (Pass/Fail) and log."""
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+    cursor.execute('SELECT execution_log_ref FROM requirements WHERE id = ?', (req_id,))
+    previous = cursor.fetchone()
     cursor.execute('''
         UPDATE requirements
-        SET verification_status = ?, execution_log = ?, last_run_timestamp = CURRENT_TIMESTAMP
+        SET verification_status = ?, execution_log_ref = ?, last_run_timestamp = CURRENT_TIMESTAMP
         WHERE id = ?
-    ''', (status, log, req_id))
+    ''', (status, put_artifact(cursor, log), req_id))
+    if previous:
+        release_artifact(cursor, previous[0])
     conn.commit()
     conn.close()
 
+@timed_write("clear_database")
 def clear_database():
     """
     Clear all data from the requirements table and system logs.
@@ -352,6 +416,7 @@ def clear_database():
     
     cursor.execute('DELETE FROM requirements')
     cursor.execute('DELETE FROM projects')
+    cursor.execute('DELETE FROM artifacts')
     
     conn.commit()
     conn.close()
@@ -366,26 +431,67 @@ def clear_database():
             except Exception as e:
                 print(f"Error deleting file {file_path}: {e}")
 
-def log_event(message: str, level: str = "INFO"):
-    """Log a system event to the database."""
+def get_change_version(source_file: Optional[str] = None) -> int:
+    """
+    Version of one project's requirements (or of all requirements), bumped by every change,
+    deletion and move out of the project, and never decreasing. One index lookup.
+    """
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+    if source_file is None:
+        row = conn.execute('SELECT seq FROM change_counter WHERE id = 1').fetchone()
+    else:
+        row = conn.execute('SELECT version FROM project_change_versions WHERE source_file = ?', (source_file,)).fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+def get_table_version(name: str) -> int:
+    """Write counter of a table tracked in table_versions (e.g. 'projects')."""
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute('SELECT version FROM table_versions WHERE name = ?', (name,)).fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+def get_log_sink() -> LogSink:
+    """Return the process-wide buffered writer for system_logs."""
+    global _log_sink
+    if _log_sink is None:
+        _log_sink = LogSink(
+            lambda: sqlite3.connect(DB_PATH),
+            max_rows=LOG_MAX_ROWS,
+            max_age_days=LOG_MAX_AGE_DAYS
+        )
+    return _log_sink
+
+LOG_BUFFER_PENDING = Gauge(
+    "asv_log_buffer_pending", "Log entries buffered in this process, not yet written.",
+    callback=lambda: _log_sink.pending if _log_sink is not None else 0
+)
+
+def log_event(message: str, level: str = "INFO"):
+    """Log a system event. The row is written asynchronously by the log sink."""
     timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {level}: {message}") # Ensure it prints to Cloud Run stdout
-    cursor.execute('INSERT INTO system_logs (timestamp, level, message) VALUES (?, ?, ?)', (timestamp, level, message))
-    
-    conn.commit()
-    conn.close()
+    get_log_sink().emit(message, level=level, timestamp=timestamp)
 
 def get_system_logs(limit: int = 50) -> List[Dict]:
-    """Retrieve the latest system logs."""
+    """Retrieve the latest system logs, including entries still buffered in memory."""
+    get_log_sink().flush()
+    
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
+    # Newest first via the rowid primary key (no sort step)
     cursor.execute('SELECT * FROM system_logs ORDER BY id DESC LIMIT ?', (limit,))
     rows = cursor.fetchall()
     conn.close()
     
     return [dict(row) for row in rows]
+
+def get_log_version() -> Tuple[int, int]:
+    """(oldest id, newest id) of system_logs after flushing the sink; changes whenever rows are added or trimmed."""
+    get_log_sink().flush()
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute('SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM system_logs').fetchone()
+    conn.close()
+    return row[0], row[1]
@@ -0,0 +1,216 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .plan import CBOR_PAYLOAD_BLOCK_PREFIX, SDNV_PAYLOAD_BLOCK_PREFIX
+from . import cbor_utils
+from .sdnv import encode_sdnv
+
+# A row segment that differs per bundle: `matrix[i, :lengths[i]]` are bundle i's bytes
+Encoded = namedtuple('Encoded', ['matrix', 'lengths'])
+# Variable-length byte strings concatenated into one array (payloads, pre-encoded EIDs)
+Blob = namedtuple('Blob', ['data', 'lengths'])
+
+_SDNV_LIMITS = [np.uint64(1 << (7 * k)) for k in range(1, 10)]
+
+def encode_sdnv_column(values):
+    """Encodes a uint64 column as SDNVs, one row per value."""
+    lengths = np.ones(len(values), dtype=np.int64)
+    for limit in _SDNV_LIMITS:
+        lengths += values >= limit
+    width = int(lengths.max(initial=1))
+    # Byte j of a value carries bits [7 * (length - 1 - j), +7); continuation bit on all but the last
+    shifts = 7 * (lengths[:, None] - 1 - np.arange(width))
+    matrix = (values[:, None] >> np.maximum(shifts, 0).astype(np.uint64)) & np.uint64(0x7F)
+    matrix |= np.where(shifts > 0, np.uint64(0x80), np.uint64(0))
+    return Encoded(matrix.astype(np.uint8), lengths)
+
+def encode_cbor_head_column(major, values):
+    """Encodes a uint64 column as CBOR heads of the given major type (0 = uint, 2 = byte string)."""
+    over_23, over_ff, over_ffff, over_ffffffff = (values >= np.uint64(limit) for limit in (24, 256, 65536, 1 << 32))
+    # Argument bytes: 0, 1, 2, 4 or 8; additional info 24..27 names the width
+    extra = over_23 * 1 + over_ff * 1 + over_ffff * 2 + over_ffffffff * 4
+    info = np.where(over_23, (24 + over_ff * 1 + over_ffff * 1 + over_ffffffff * 1).astype(np.uint64), values)
+    lengths = (1 + extra).astype(np.int64)
+    width = int(lengths.max(initial=1))
+    matrix = np.empty((len(values), width), dtype=np.uint8)
+    matrix[:, 0] = (major << 5) | info.astype(np.uint8)
+    for j in range(1, width):
+        shifts = np.maximum(8 * (extra - j), 0).astype(np.uint64)
+        matrix[:, j] = (values >> shifts) & np.uint64(0xFF)
+    return Encoded(matrix, lengths)
+
+def blob_column(items):
+    """Packs a sequence of bytes-like objects into a Blob."""
+    lengths = np.fromiter(map(len, items), dtype=np.int64, count=len(items))
+    return Blob(np.frombuffer(b"".join(items), dtype=np.uint8), lengths)
+
+def _int_column(columns, name, n):
+    values = columns[name]
+    if not isinstance(values, np.ndarray):
+        # Python ints straight to uint64, so mixed small/huge lists don't become float64
+        try:
+            values = np.asarray(values, dtype=np.uint64)
+        except (OverflowError, TypeError, ValueError) as e:
+            raise ValueError(f"Column '{name}' must hold non-negative integers") from e
+    if values.shape != (n,):
+        raise ValueError(f"Column '{name}' has {len(values)} rows, expected {n}")
+    if values.dtype.kind not in 'iub':
+        raise ValueError(f"Column '{name}' must hold integers, got {values.dtype}")
+    if values.dtype.kind == 'i' and n and values.min() < 0:
+        raise ValueError(f"Column '{name}' contains negative values")
+    return values.astype(np.uint64)
+
+def _int_piece(columns, name, n, default, encode_column, encode_value):
+    # Scalars are encoded once and become constant bytes shared by every row
+    value = columns.get(name, default)
+    if np.ndim(value) == 0:
+        if value < 0:
+            raise ValueError(f"Column '{name}' contains negative values")
+        return encode_value(int(value))
+    values = _int_column(columns, name, n)
+    if n and values.min() == values.max():
+        return encode_value(int(values[0]))
+    return encode_column(values)
+
+def _sdnv_piece(columns, name, n, default=0):
+    return _int_piece(columns, name, n, default, encode_sdnv_column, encode_sdnv)
+
+def _cbor_uint_piece(columns, name, n, default=0):
+    return _int_piece(columns, name, n, default, lambda values: encode_cbor_head_column(0, values), cbor_utils.encode_uint)
+
+def _byte_string_header_piece(lengths, n):
+    return _int_piece({'length': lengths}, 'length', n, 0, lambda values: encode_cbor_head_column(2, values), cbor_utils.encode_byte_string_header)
+
+def _defaults(config):
+    # Mirrors BaseBundle: missing timestamps are "now", lifetimes come from the config
+    return {
+        'creation_timestamp': int(time.time() - config.get('time_offset', 0)),
+        'lifetime': config.get('default_lifetime', 3600),
+    }
+
+def _row_length(piece):
+    return len(piece) if isinstance(piece, bytes) else piece.lengths
+
+def _sdnv_cbhe_pieces(config, columns, payloads, n):
+    defaults = _defaults(config)
+    fields = ['proc_flags'] + config.get('primary_block', {}).get('fields', [])
+    header = [_sdnv_piece(columns, field, n, defaults.get(field, 0)) for field in fields]
+    header_length = sum(_row_length(piece) for piece in header)
+    return [
+        b'\x06',  # BPv6 version byte
+        _sdnv_piece({'header_length': header_length}, 'header_length', n),
+        *header,
+        SDNV_PAYLOAD_BLOCK_PREFIX,
+        _sdnv_piece({'payload_length': payloads.lengths}, 'payload_length', n),
+        payloads,
+    ]
+
+def _eid_pieces(columns, name, n):
+    value = columns.get(name)
+    if value is None:
+        return [cbor_utils.encode_uint(0)]
+    if isinstance(value, tuple):
+        # (nodes, services) -> ipn EID [2, [node, service]]
+        nodes, services = value
+        return [
+            cbor_utils.encode_array_header(2) + cbor_utils.encode_uint(2) + cbor_utils.encode_array_header(2),
+            _cbor_uint_piece({name: nodes}, name, n),
+            _cbor_uint_piece({name: services}, name, n),
+        ]
+    if len(value) != n:
+        raise ValueError(f"Column '{name}' has {len(value)} rows, expected {n}")
+    return [blob_column(value)]
+
+def _cbor_pieces(config, columns, payloads, n):
+    if np.any(np.asarray(columns.get('crc_type', 0)) != 0):
+        # A CRC depends on every byte of its block, so it cannot be encoded column-wise
+        raise ValueError("serialize_many does not compute CRCs; use crc_type 0 or BaseBundle.serialize()")
+    defaults = _defaults(config)
+    fields = config.get('primary_block', {}).get('fields', [])
+    pieces = [cbor_utils.encode_indefinite_array_start(), cbor_utils.encode_array_header(len(fields))]
+    for field in fields:
+        if field == 'version':
+            pieces.append(cbor_utils.encode_uint(config.get('version')))
+        elif 'eid' in field:
+            pieces.extend(_eid_pieces(columns, field, n))
+        elif field == 'creation_timestamp_array':
+            pieces.append(cbor_utils.encode_array_header(2))
+            for name in ('creation_timestamp', 'sequence_number'):
+                pieces.append(_cbor_uint_piece(columns, name, n, defaults.get(name, 0)))
+        else:
+            pieces.append(_cbor_uint_piece(columns, field, n, defaults.get(field, 0)))
+    pieces += [
+        CBOR_PAYLOAD_BLOCK_PREFIX,
+        _byte_string_header_piece(payloads.lengths, n),
+        payloads,
+        cbor_utils.encode_break(),
+    ]
+    return pieces
+
+_PIECE_BUILDERS = {
+    'sdnv_cbhe': _sdnv_cbhe_pieces,
+    'cbor': _cbor_pieces,
+}
+
+def _merge_constants(pieces):
+    merged = []
+    for piece in pieces:
+        if isinstance(piece, bytes) and merged and isinstance(merged[-1], bytes):
+            merged[-1] += piece
+        else:
+            merged.append(piece)
+    return merged
+
+def _scatter(out, cursor, piece):
+    """Writes one piece of every row at `cursor` (per-row write positions)."""
+    if isinstance(piece, bytes):
+        out[cursor[:, None] + np.arange(len(piece))] = np.frombuffer(piece, dtype=np.uint8)
+    elif isinstance(piece, Blob):
+        total = len(piece.data)
+        if total:
+            starts = np.cumsum(piece.lengths) - piece.lengths
+            out[np.repeat(cursor - starts, piece.lengths) + np.arange(total)] = piece.data
+    else:
+        matrix, lengths = piece
+        width = matrix.shape[1]
+        if lengths.min(initial=width) == width:
+            out[cursor[:, None] + np.arange(width)] = matrix
+        else:
+            for j in range(width):
+                rows = lengths > j
+                out[cursor[rows] + j] = matrix[rows, j]
+
+def serialize_many(config, columns, payloads):
+    """
+    Serializes a batch of bundles from columnar field data into one contiguous buffer.
+
+    Produces the same bytes as building a BaseBundle per row and calling serialize(), with
+    every integer field encoded for the whole column at once.
+    :param config: Protocol configuration dictionary (e.g. config.json's 'bpv6' / 'bpv7').
+    :param columns: Field name -> integer array-like with one value per bundle, or a scalar
+        shared by all bundles. Missing fields default like BaseBundle (timestamp now,
+        lifetime from the config, everything else 0). BPv7 EID fields take either a
+        `(nodes, services)` tuple of columns (ipn scheme) or a sequence of pre-encoded EIDs.
+    :param payloads: Sequence of bytes-like payloads, one per bundle.
+    :return: (buffer, offsets) -- a uint8 array and n + 1 offsets; bundle i is
+        `buffer[offsets[i]:offsets[i + 1]]`.
+    """
+    encoding = config.get('encoding')
+    builder = _PIECE_BUILDERS.get(encoding)
+    if builder is None:
+        raise ValueError(f"Unknown encoding: {encoding}")
+
+    n = len(payloads)
+    pieces = _merge_constants(builder(config, columns, blob_column(payloads), n))
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(sum(_row_length(piece) for piece in pieces), out=offsets[1:])
+    out = np.empty(int(offsets[-1]), dtype=np.uint8)
+
+    cursor = offsets[:-1].copy()
+    for piece in pieces:
+        _scatter(out, cursor, piece)
+        cursor += _row_length(piece)
+    return out, offsets
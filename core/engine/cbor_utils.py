@@ -1,38 +1,361 @@
+import math
 import struct
+from collections import namedtuple
+
+# Major types (RFC 8949 section 3.1)
+MAJOR_UINT = 0
+MAJOR_NEGINT = 1
+MAJOR_BYTES = 2
+MAJOR_TEXT = 3
+MAJOR_ARRAY = 4
+MAJOR_MAP = 5
+MAJOR_TAG = 6
+MAJOR_SIMPLE = 7
+
+BREAK = 0xFF
+_UINT64_LIMIT = 1 << 64
+
+# Heads for every major type with an argument below 256 (one or two bytes), so the common
+# case of small integers, short strings and small containers is a table lookup
+_HEADS = [
+    [bytes([major << 5 | arg]) if arg < 24 else bytes([major << 5 | 24, arg]) for arg in range(256)]
+    for major in range(8)
+]
+
+_UINT_HEADS = _HEADS[MAJOR_UINT]
+_PACK_HEAD16 = struct.Struct('>BH').pack
+_PACK_HEAD32 = struct.Struct('>BI').pack
+_PACK_HEAD64 = struct.Struct('>BQ').pack
+
+Tag = namedtuple('Tag', ['tag', 'value'])
+Tag.__doc__ = "A tagged data item (major type 6)."
+
+def encode_head(major, arg):
+    """Encodes a data item head: major type plus the shortest form of its argument."""
+    if arg < 256:
+        if arg >= 0:
+            return _HEADS[major][arg]
+    elif arg < 65536:
+        return _PACK_HEAD16(major << 5 | 25, arg)
+    elif arg < 4294967296:
+        return _PACK_HEAD32(major << 5 | 26, arg)
+    elif arg < _UINT64_LIMIT:
+        return _PACK_HEAD64(major << 5 | 27, arg)
+    raise ValueError(f"CBOR argument out of range: {arg}")
 
 def encode_uint(val):
     """Encodes an unsigned integer into CBOR format."""
-    if val < 24:
-        return struct.pack('B', val)
-    elif val < 256:
-        return struct.pack('BB', 24, val)
+    if val < 256:
+        if val >= 0:
+            return _UINT_HEADS[val]
     elif val < 65536:
-        return struct.pack('>BH', 25, val)
+        return _PACK_HEAD16(25, val)
     elif val < 4294967296:
-        return struct.pack('>BI', 26, val)
-    else:
-        return struct.pack('>BQ', 27, val)
+        return _PACK_HEAD32(26, val)
+    elif val < _UINT64_LIMIT:
+        return _PACK_HEAD64(27, val)
+    raise ValueError(f"CBOR argument out of range: {val}")
+
+def encode_int(val):
+    """Encodes a signed integer (major type 0 or 1)."""
+    if val < 0:
+        return encode_head(MAJOR_NEGINT, -1 - val)
+    return encode_head(MAJOR_UINT, val)
 
 def encode_indefinite_array_start():
     """Encodes the start of an indefinite-length array (0x9f)."""
     return b'\x9f'
 
+def encode_indefinite_map_start():
+    """Encodes the start of an indefinite-length map (0xbf)."""
+    return b'\xbf'
+
 def encode_break():
     """Encodes the break stop code (0xff)."""
     return b'\xff'
 
+def encode_array_header(length):
+    """Encodes the head of a definite-length array of `length` items."""
+    return encode_head(MAJOR_ARRAY, length)
+
+def encode_map_header(length):
+    """Encodes the head of a definite-length map of `length` pairs."""
+    return encode_head(MAJOR_MAP, length)
+
+def encode_tag(tag):
+    """Encodes a tag head; the tagged item follows it."""
+    return encode_head(MAJOR_TAG, tag)
+
+def encode_byte_string_header(length):
+    """Encodes the head of a byte string of `length` bytes (major type 2)."""
+    return encode_head(MAJOR_BYTES, length)
+
 def encode_byte_string(data):
     """Encodes a byte string."""
-    length = len(data)
-    # Major type 2 is byte string (0x40)
-    if length < 24:
-        header = 0x40 | length
-        return struct.pack('B', header) + data
-    elif length < 256:
-        return struct.pack('BB', 0x40 | 24, length) + data
-    elif length < 65536:
-        return struct.pack('>BH', 0x40 | 25, length) + data
-    elif length < 4294967296:
-        return struct.pack('>BI', 0x40 | 26, length) + data
+    return encode_byte_string_header(len(data)) + data
+
+def encode_text_string(text):
+    """Encodes a UTF-8 text string (major type 3)."""
+    data = text.encode('utf-8')
+    return encode_head(MAJOR_TEXT, len(data)) + data
+
+def _float_bytes(value, canonical):
+    if canonical:
+        # Shortest of half/single/double that round-trips the value exactly
+        for initial, fmt in ((0xF9, '>e'), (0xFA, '>f')):
+            try:
+                packed = struct.pack(fmt, value)
+            except OverflowError:
+                continue
+            if struct.unpack(fmt, packed)[0] == value or math.isnan(value):
+                return bytes([initial]) + packed
+    return b'\xfb' + struct.pack('>d', value)
+
+class CBORWriter:
+    """
+    Incremental CBOR encoder writing into one bytearray.
+
+    The low-level methods append heads and raw data so callers can stream containers
+    (including indefinite-length ones) item by item; encode() appends a whole Python value.
+    """
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def head(self, major, arg):
+        self.buf += encode_head(major, arg)
+        return self
+
+    def uint(self, val):
+        self.buf += encode_uint(val)
+        return self
+
+    def integer(self, val):
+        self.buf += encode_int(val)
+        return self
+
+    def byte_string(self, data):
+        self.buf += encode_head(MAJOR_BYTES, len(data))
+        self.buf += data
+        return self
+
+    def text_string(self, text):
+        self.buf += encode_text_string(text)
+        return self
+
+    def array_header(self, length):
+        self.buf += encode_head(MAJOR_ARRAY, length)
+        return self
+
+    def map_header(self, length):
+        self.buf += encode_head(MAJOR_MAP, length)
+        return self
+
+    def tag(self, tag):
+        self.buf += encode_head(MAJOR_TAG, tag)
+        return self
+
+    def indefinite_array_start(self):
+        self.buf.append(0x9F)
+        return self
+
+    def indefinite_map_start(self):
+        self.buf.append(0xBF)
+        return self
+
+    def break_code(self):
+        self.buf.append(BREAK)
+        return self
+
+    def raw(self, data):
+        """Appends already-encoded CBOR."""
+        self.buf += data
+        return self
+
+    def encode(self, value, canonical=False):
+        """
+        Appends a Python value: int, bytes-like, str, list/tuple, dict, bool, None, float or Tag.
+        With `canonical`, map keys are sorted by their encoded bytes (RFC 8949 section 4.2.1)
+        and floats use their shortest exact form.
+        """
+        _encode_into(self.buf, value, canonical)
+        return self
+
+    def getvalue(self):
+        return bytes(self.buf)
+
+def _encode_map(buf, value, canonical):
+    buf += encode_head(MAJOR_MAP, len(value))
+    if not canonical:
+        for key, item in value.items():
+            _encode_into(buf, key, False)
+            _encode_into(buf, item, False)
+        return
+    pairs = sorted(((encode(key, canonical=True), item) for key, item in value.items()), key=lambda pair: pair[0])
+    for (key, _), (next_key, _) in zip(pairs, pairs[1:]):
+        if key == next_key:
+            raise ValueError(f"Duplicate CBOR map key {key.hex()}")
+    for key, item in pairs:
+        buf += key
+        _encode_into(buf, item, True)
+
+def _encode_into(buf, value, canonical):
+    kind = type(value)
+    if kind is int:
+        buf += _UINT_HEADS[value] if 0 <= value < 256 else encode_int(value)
+    elif kind is list or kind is tuple:
+        buf += encode_head(MAJOR_ARRAY, len(value))
+        for item in value:
+            # Inline the small-uint case; it dominates bundle fields and EIDs
+            if type(item) is int and 0 <= item < 256:
+                buf += _UINT_HEADS[item]
+            else:
+                _encode_into(buf, item, canonical)
+    elif kind is bytes or kind is bytearray or kind is memoryview:
+        buf += encode_head(MAJOR_BYTES, len(value))
+        buf += value
+    elif kind is str:
+        buf += encode_text_string(value)
+    elif kind is dict:
+        _encode_map(buf, value, canonical)
+    elif value is None:
+        buf.append(0xF6)
+    elif kind is bool:
+        buf.append(0xF5 if value else 0xF4)
+    elif kind is float:
+        buf += _float_bytes(value, canonical)
+    elif kind is Tag:
+        buf += encode_head(MAJOR_TAG, value.tag)
+        _encode_into(buf, value.value, canonical)
+    elif hasattr(value, '__index__'):
+        # int subclasses and integer scalars such as numpy.uint64
+        buf += encode_int(value.__index__())
     else:
-        return struct.pack('>BQ', 0x40 | 27, length) + data
+        raise TypeError(f"Cannot CBOR-encode {kind.__name__}")
+
+def encode(value, canonical=False):
+    """Encodes a Python value as CBOR (see CBORWriter.encode)."""
+    buf = bytearray()
+    _encode_into(buf, value, canonical)
+    return bytes(buf)
+
+# Argument sizes for additional info 24..27
+_ARGUMENT_SIZES = {24: 1, 25: 2, 26: 4, 27: 8}
+
+def decode_head(buf, offset=0):
+    """
+    Decodes a CBOR data item head starting at `offset`.
+    :return: (major type, argument, offset past the head). The argument is None for
+        indefinite lengths. Raises IndexError if `buf` ends first.
+    """
+    initial = buf[offset]
+    major, info = initial >> 5, initial & 0x1F
+    if info < 24:
+        return major, info, offset + 1
+    if info == 31:
+        return major, None, offset + 1
+    size = _ARGUMENT_SIZES.get(info)
+    if size is None:
+        raise ValueError(f"Reserved CBOR additional info {info} at offset {offset}")
+    end = offset + 1 + size
+    if end > len(buf):
+        raise IndexError("Truncated CBOR head")
+    return major, int.from_bytes(buf[offset + 1:end], 'big'), end
+
+def skip_item(buf, offset=0):
+    """Returns the offset just past the complete data item starting at `offset`."""
+    major, arg, offset = decode_head(buf, offset)
+    if arg is None:
+        if major == MAJOR_SIMPLE:
+            raise ValueError(f"Unexpected break code at offset {offset - 1}")
+        while buf[offset] != BREAK:
+            offset = skip_item(buf, offset)
+        return offset + 1
+    if major in (MAJOR_BYTES, MAJOR_TEXT):
+        if offset + arg > len(buf):
+            raise IndexError("Truncated CBOR string")
+        return offset + arg
+    # Arrays hold `arg` items, maps `arg` pairs, tags exactly one item
+    count = {MAJOR_ARRAY: arg, MAJOR_MAP: arg * 2, MAJOR_TAG: 1}.get(major, 0)
+    for _ in range(count):
+        offset = skip_item(buf, offset)
+    return offset
+
+_SIMPLE_VALUES = {20: False, 21: True, 22: None}
+_FLOAT_FORMATS = {2: '>e', 4: '>f', 8: '>d'}
+
+def _decode_string(buf, major, arg, offset):
+    if arg is None:
+        # Indefinite length: definite chunks of the same major type until break
+        chunks = []
+        while buf[offset] != BREAK:
+            chunk_major, length, offset = decode_head(buf, offset)
+            if chunk_major != major or length is None:
+                raise ValueError(f"Invalid chunk in indefinite-length string at offset {offset}")
+            chunk, offset = _decode_string(buf, major, length, offset)
+            chunks.append(chunk)
+        return ("" if major == MAJOR_TEXT else b"").join(chunks), offset + 1
+    end = offset + arg
+    if end > len(buf):
+        raise IndexError("Truncated CBOR string")
+    data = bytes(buf[offset:end])
+    return (data.decode('utf-8') if major == MAJOR_TEXT else data), end
+
+def _hashable(key):
+    return tuple(_hashable(item) for item in key) if isinstance(key, list) else key
+
+def decode_item(buf, offset=0):
+    """
+    Decodes one data item starting at `offset`.
+    :return: (value, offset just past the item). Arrays decode to lists, maps to dicts
+        (array keys become tuples), tags to Tag, simple values to False/True/None.
+    """
+    initial = buf[offset]
+    major, info = initial >> 5, initial & 0x1F
+    if major == MAJOR_SIMPLE:
+        if info in _SIMPLE_VALUES:
+            return _SIMPLE_VALUES[info], offset + 1
+        if info == 23:
+            raise ValueError(f"CBOR 'undefined' is not supported (offset {offset})")
+        if info in (25, 26, 27):
+            size = _ARGUMENT_SIZES[info]
+            end = offset + 1 + size
+            if end > len(buf):
+                raise IndexError("Truncated CBOR float")
+            return struct.unpack(_FLOAT_FORMATS[size], buf[offset + 1:end])[0], end
+        raise ValueError(f"Unsupported CBOR simple value {initial:#04x} at offset {offset}")
+
+    major, arg, offset = decode_head(buf, offset)
+    if major == MAJOR_UINT:
+        if arg is None:
+            raise ValueError(f"Indefinite-length integer at offset {offset - 1}")
+        return arg, offset
+    if major == MAJOR_NEGINT:
+        if arg is None:
+            raise ValueError(f"Indefinite-length integer at offset {offset - 1}")
+        return -1 - arg, offset
+    if major in (MAJOR_BYTES, MAJOR_TEXT):
+        return _decode_string(buf, major, arg, offset)
+    if major == MAJOR_TAG:
+        value, offset = decode_item(buf, offset)
+        return Tag(arg, value), offset
+
+    items = []
+    count = arg * 2 if major == MAJOR_MAP and arg is not None else arg
+    while (len(items) < count) if count is not None else (buf[offset] != BREAK):
+        item, offset = decode_item(buf, offset)
+        items.append(item)
+    if count is None:
+        offset += 1
+    if major == MAJOR_ARRAY:
+        return items, offset
+    if len(items) % 2:
+        raise ValueError(f"Indefinite-length map with a dangling key before offset {offset}")
+    return {_hashable(key): value for key, value in zip(items[::2], items[1::2])}, offset
+
+def decode(data):
+    """Decodes a buffer holding exactly one CBOR data item."""
+    value, end = decode_item(data)
+    if end != len(data):
+        raise ValueError(f"{len(data) - end} trailing bytes after CBOR item")
+    return value
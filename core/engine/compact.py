@@ -0,0 +1,144 @@
+import struct
+import time
+
+from . import cbor_utils
+from .plan import ConfigCache, get_plan
+
+class BundleLayout:
+    """
+    Record layout for a protocol config: the numeric fields a CompactBundle stores, in order.
+
+    BPv6 stores its SDNV fields as-is. BPv7 drops the constant version, splits the creation
+    timestamp array into its two integers and keeps each EID as an ipn (node, service) pair.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.encoding = config.get('encoding')
+        fields = config.get('primary_block', {}).get('fields', [])
+        if self.encoding == 'sdnv_cbhe':
+            names, eids = ['proc_flags'] + fields, []
+        elif self.encoding == 'cbor':
+            names, eids = [], []
+            for field in fields:
+                if field == 'version':
+                    continue
+                if 'eid' in field:
+                    eids.append(field)
+                    names += [f"{field}_node", f"{field}_service"]
+                elif field == 'creation_timestamp_array':
+                    names += ['creation_timestamp', 'sequence_number']
+                else:
+                    names.append(field)
+        else:
+            raise ValueError(f"Unknown encoding: {self.encoding}")
+        self.names = tuple(names)
+        self.eids = tuple(eids)
+        self.index = {name: i for i, name in enumerate(names)}
+        # Records use 32-bit slots when every value fits, else 64-bit; the length tells them apart
+        self.narrow = struct.Struct(f"<{len(names)}I")
+        self.wide = struct.Struct(f"<{len(names)}Q")
+
+    def pack(self, values):
+        try:
+            if max(values, default=0) < 4294967296:
+                return self.narrow.pack(*values)
+            return self.wide.pack(*values)
+        except struct.error as e:
+            raise ValueError(f"Bundle fields must be unsigned 64-bit integers: {e}") from None
+
+    def unpack(self, record):
+        if len(record) == self.narrow.size and self.narrow.size != self.wide.size:
+            return self.narrow.unpack(record)
+        return self.wide.unpack(record)
+
+_layouts = ConfigCache(BundleLayout)
+
+def get_layout(config):
+    """Returns the cached layout for `config`, building it on first use."""
+    return _layouts.get(config)
+
+def _ipn_pair(name, value):
+    if value is None:
+        return 0, 0
+    if isinstance(value, bytes):
+        decoded = cbor_utils.decode(value)
+        if not (isinstance(decoded, list) and len(decoded) == 2 and decoded[0] == 2):
+            raise ValueError(f"{name} is not an ipn EID: {value.hex()}")
+        value = decoded[1]
+    node, service = value
+    return node, service
+
+class CompactBundle:
+    """
+    Memory-lean, immutable counterpart of BaseBundle.
+
+    Numeric fields live in one packed bytes record (32- or 64-bit slots); the config is
+    reached through a per-config layout. `data`, the encoded EIDs and the serialized bytes
+    are rebuilt on demand; nothing holds a second copy of the payload.
+    """
+
+    __slots__ = ('layout', '_record', 'payload')
+
+    def __init__(self, config, data):
+        """
+        :param config: Dictionary containing protocol configuration (from config.json).
+        :param data: Dictionary containing bundle data, as for BaseBundle. BPv7 EIDs may be
+            (node, service) tuples or pre-encoded ipn EIDs; missing EIDs become ipn 0.0.
+        """
+        layout = get_layout(config)
+        values = dict(data)
+        if 'creation_timestamp' not in values:
+            values['creation_timestamp'] = int(time.time() - config.get('time_offset', 0))
+            values['sequence_number'] = 0
+        if 'lifetime' not in values:
+            values['lifetime'] = config.get('default_lifetime', 3600)
+        for eid in layout.eids:
+            values[f"{eid}_node"], values[f"{eid}_service"] = _ipn_pair(eid, values.get(eid))
+
+        self._record = layout.pack([values.get(name) or 0 for name in layout.names])
+        self.layout = layout
+        self.payload = data.get('payload', b"")
+
+    @property
+    def config(self):
+        return self.layout.config
+
+    @property
+    def version(self):
+        return self.layout.config.get('version')
+
+    def field(self, name):
+        """Returns one stored numeric field, e.g. 'lifetime' or 'dest_eid_node'."""
+        return self.layout.unpack(self._record)[self.layout.index[name]]
+
+    def eid(self, name):
+        """Returns a BPv7 EID as its (node, service) pair."""
+        values = self.layout.unpack(self._record)
+        index = self.layout.index
+        return values[index[f"{name}_node"]], values[index[f"{name}_service"]]
+
+    @property
+    def data(self):
+        """The fields in BaseBundle's `data` form (EIDs CBOR-encoded), built on each access."""
+        data = dict(zip(self.layout.names, self.layout.unpack(self._record)))
+        for eid in self.layout.eids:
+            data[eid] = cbor_utils.encode([2, [data.pop(f"{eid}_node"), data.pop(f"{eid}_service")]])
+        data['payload'] = self.payload
+        return data
+
+    def serialize(self):
+        return get_plan(self.layout.config).serialize(self)
+
+    def serialize_into(self, buf, offset=0):
+        """
+        Serializes into a preallocated writable buffer (see BaseBundle.serialize_into).
+        :return: Offset just past the bundle.
+        """
+        return get_plan(self.layout.config).serialize_into(self, buf, offset)
+
+    def serialize_iov(self):
+        return get_plan(self.layout.config).serialize_iov(self)
+
+    def serialized_size(self):
+        return get_plan(self.layout.config).serialized_size(self)
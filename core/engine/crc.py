@@ -0,0 +1,196 @@
+import binascii
+import struct
+import threading
+
+# BPv7 CRC types (RFC 9171 section 4.2.1)
+CRC_NONE = 0
+CRC16_X25 = 1
+CRC32C = 2
+# Bytes of the CRC value each type appends to a block
+CRC_LENGTHS = {CRC16_X25: 2, CRC32C: 4}
+
+# --- CRC-16/X-25 ---
+# Reflected poly 0x1021, init and xorout 0xFFFF. binascii.crc_hqx is the same polynomial
+# unreflected (table-driven, in C), so bytes are bit-reversed on the way in and the
+# register on the way out.
+
+_REVERSED_BITS = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+# Bit-reversing translate() copies, so large buffers go through in slices of this size
+_X25_SLICE = 1 << 16
+
+def _reverse16(value):
+    return (_REVERSED_BITS[value & 0xFF] << 8) | _REVERSED_BITS[value >> 8]
+
+def crc16_x25(data, value=0):
+    """
+    CRC-16/X-25 of a bytes-like object. Like zlib.crc32, pass the previous result as
+    `value` to continue over further buffers.
+    """
+    view = memoryview(data).cast('B')
+    register = _reverse16(value ^ 0xFFFF)
+    for start in range(0, view.nbytes, _X25_SLICE):
+        register = binascii.crc_hqx(view[start:start + _X25_SLICE].tobytes().translate(_REVERSED_BITS), register)
+    return _reverse16(register) ^ 0xFFFF
+
+# --- CRC-32C (Castagnoli) ---
+# Reflected poly 0x1EDC6F41 (0x82F63B78 reflected), init and xorout 0xFFFFFFFF.
+
+_CASTAGNOLI = 0x82F63B78
+
+def _slicing_tables(poly, count):
+    # tables[k][b]: register contribution of byte b followed by k zero bytes
+    first = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+        first.append(crc)
+    tables = [first]
+    for _ in range(count - 1):
+        previous = tables[-1]
+        tables.append([(crc >> 8) ^ first[crc & 0xFF] for crc in previous])
+    return tables
+
+_SLICING = _slicing_tables(_CASTAGNOLI, 8)
+_WORD_PAIRS = struct.Struct('<II')
+
+def _crc32c_scalar(view, register):
+    """Slicing-by-8: eight table lookups per 8 input bytes. Works on the raw register."""
+    t0, t1, t2, t3, t4, t5, t6, t7 = _SLICING
+    whole = view.nbytes & ~7
+    for low, high in _WORD_PAIRS.iter_unpack(view[:whole]):
+        low ^= register
+        register = (t7[low & 0xFF] ^ t6[(low >> 8) & 0xFF] ^ t5[(low >> 16) & 0xFF] ^ t4[low >> 24]
+                    ^ t3[high & 0xFF] ^ t2[(high >> 8) & 0xFF] ^ t1[(high >> 16) & 0xFF] ^ t0[high >> 24])
+    for byte in view[whole:]:
+        register = t0[(register ^ byte) & 0xFF] ^ (register >> 8)
+    return register
+
+# Large buffers are cut into `lanes` equal stripes whose CRCs advance together, one numpy
+# operation per 4-byte step for all stripes (slicing-by-4), then are combined: the CRC
+# register is linear over GF(2), so crc(A + B) = zeros(crc(A), len(B)) ^ crc(B), where
+# zeros() appends len(B) zero bytes -- a 32x32 bit matrix, built by repeated squaring.
+# numpy is imported on the first large buffer, so bundle users that never see one don't load it.
+_lane_tables = None  # numpy copy of _SLICING[:4]; False when numpy is not installed
+_lane_tables_lock = threading.Lock()
+_LANES_MIN_BYTES = 1 << 15  # below this the scalar loop is faster
+_MAX_LANES = 1 << 14
+_LANE_CHUNK = 1 << 23  # bytes per numpy pass; bounds the transposed copy
+
+def _matrix_times(matrix, vector):
+    result = 0
+    for column in matrix:
+        if not vector:
+            break
+        if vector & 1:
+            result ^= column
+        vector >>= 1
+    return result
+
+def _matrix_square(matrix):
+    return [_matrix_times(matrix, column) for column in matrix]
+
+# _zero_operators[k] appends 2**k zero bytes to a raw CRC-32C register
+_zero_operators = [[_crc32c_scalar(memoryview(b'\x00'), 1 << bit) for bit in range(32)]]
+_zero_operators_lock = threading.Lock()
+
+def _zeros_operator(power):
+    if power >= len(_zero_operators):
+        with _zero_operators_lock:
+            while power >= len(_zero_operators):
+                _zero_operators.append(_matrix_square(_zero_operators[-1]))
+    return _zero_operators[power]
+
+def _append_zeros(register, length):
+    power = 0
+    while length:
+        if length & 1:
+            register = _matrix_times(_zeros_operator(power), register)
+        length >>= 1
+        power += 1
+    return register
+
+def _get_lane_tables():
+    global _lane_tables
+    if _lane_tables is None:
+        with _lane_tables_lock:
+            if _lane_tables is None:
+                try:
+                    import numpy as np
+                except ImportError:  # Optional: without it every buffer takes the scalar loop
+                    _lane_tables = False
+                else:
+                    _lane_tables = np.array(_SLICING[:4], dtype=np.uint32)
+    return _lane_tables
+
+def _append_zeros_lanes(registers, length):
+    import numpy as np
+    # The same operator applied to every lane, one bit column at a time
+    matrix = [_append_zeros(1 << bit, length) for bit in range(32)]
+    result = np.zeros_like(registers)
+    one = np.uint32(1)
+    for bit, column in enumerate(matrix):
+        result ^= ((registers >> np.uint32(bit)) & one) * np.uint32(column)
+    return result
+
+def _crc32c_lanes(view, lanes, tables):
+    """Raw register (init 0) of the first `lanes * stripe` bytes; returns (register, bytes used)."""
+    import numpy as np
+    stripe = view.nbytes // lanes & ~3
+    words = np.frombuffer(view, dtype=np.uint8, count=lanes * stripe).reshape(lanes, stripe).view('<u4')
+    rows = np.ascontiguousarray(words.T)
+    registers = np.zeros(lanes, dtype=np.uint32)
+    t0, t1, t2, t3 = tables
+    mask, by8, by16, by24 = np.uint32(0xFF), np.uint32(8), np.uint32(16), np.uint32(24)
+    for row in rows:
+        registers ^= row
+        registers = t3[registers & mask] ^ t2[(registers >> by8) & mask] ^ t1[(registers >> by16) & mask] ^ t0[registers >> by24]
+    # Pairwise combination: lane 2i is followed by lane 2i + 1
+    length = stripe
+    while len(registers) > 1:
+        registers = _append_zeros_lanes(registers[0::2], length) ^ registers[1::2]
+        length *= 2
+    return int(registers[0]), lanes * stripe
+
+def crc32c(data, value=0):
+    """
+    CRC-32C of a bytes-like object. Like zlib.crc32, pass the previous result as `value`
+    to continue over further buffers.
+    """
+    view = memoryview(data).cast('B')
+    register = value ^ 0xFFFFFFFF
+    tables = _get_lane_tables() if view.nbytes >= _LANES_MIN_BYTES else False
+    while tables is not False and view.nbytes >= _LANES_MIN_BYTES:
+        chunk = view[:_LANE_CHUNK]
+        lanes = _MAX_LANES
+        while lanes * 256 > chunk.nbytes:
+            lanes //= 2
+        raw, used = _crc32c_lanes(chunk, lanes, tables)
+        register = _append_zeros(register, used) ^ raw
+        view = view[used:]
+    return _crc32c_scalar(view, register) ^ 0xFFFFFFFF
+
+# --- Dispatch by CRC type ---
+
+CRC_FUNCTIONS = {
+    CRC16_X25: crc16_x25,
+    CRC32C: crc32c,
+}
+
+def crc_function(crc_type):
+    function = CRC_FUNCTIONS.get(crc_type)
+    if function is None:
+        raise ValueError(f"Unknown CRC type: {crc_type}")
+    return function
+
+def crc_iov(crc_type, buffers):
+    """CRC of the concatenation of `buffers`, computed buffer by buffer without joining them."""
+    function = crc_function(crc_type)
+    value = 0
+    for buf in buffers:
+        value = function(buf, value)
+    return value
+
+def crc_bytes(crc_type, value):
+    """The CRC value as carried in a block: big-endian, 2 or 4 bytes."""
+    return value.to_bytes(CRC_LENGTHS[crc_type], 'big')
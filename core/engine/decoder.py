@@ -0,0 +1,256 @@
+from functools import partial
+
+from .base_bundle import BaseBundle
+from .cbor_utils import decode_head, skip_item
+from .crc import CRC_LENGTHS, crc_function
+from .fragment import FRAGMENT_FIELDS, FRAGMENT_FLAG, fragment_config
+from .sdnv import decode_sdnv
+
+class DecodeError(ValueError):
+    """Raised when bytes do not form a valid bundle for the given config."""
+
+class IncompleteBundle(DecodeError):
+    """
+    Raised when the buffer ends before the bundle does.
+    `needed` is the bundle's total length when the headers read so far reveal it, else None.
+    """
+
+    def __init__(self, message="Buffer ends mid-bundle", needed=None):
+        super().__init__(message)
+        self.needed = needed
+
+class CRCError(DecodeError):
+    """Raised when verifying CRCs and a block's CRC does not match its contents."""
+
+# --- BPv6 (SDNV / CBHE) ---
+
+def _decode_sdnv_cbhe(config, buf, offset, verify_crc):
+    # BPv6 (RFC 5050) blocks carry no CRCs
+    start = offset
+    if buf[offset] != 0x06:
+        raise DecodeError(f"Not a BPv6 bundle: version byte {buf[offset]:#04x} at offset {offset}")
+    header_length, offset = decode_sdnv(buf, offset + 1)
+    header_end = offset + header_length
+
+    data = {}
+    for field in ['proc_flags'] + config.get('primary_block', {}).get('fields', []):
+        data[field], offset = decode_sdnv(buf, offset)
+    if data['proc_flags'] & FRAGMENT_FLAG:
+        config = fragment_config(config)
+        for field in FRAGMENT_FIELDS:
+            data[field], offset = decode_sdnv(buf, offset)
+    if offset != header_end:
+        raise DecodeError(f"BPv6 primary block fields end at offset {offset}, header length says {header_end}")
+
+    # Extension blocks are skipped; the payload block ends the bundle
+    while True:
+        block_type = buf[offset]
+        _flags, offset = decode_sdnv(buf, offset + 1)
+        length, offset = decode_sdnv(buf, offset)
+        end = offset + length
+        if end > len(buf):
+            raise IncompleteBundle(needed=end - start)
+        if block_type == 1:
+            data['payload'] = buf[offset:end]
+            return BaseBundle(config, data), end
+        offset = end
+
+# --- BPv7 (CBOR) ---
+
+def _decode_uint(buf, offset):
+    initial = buf[offset]
+    if initial < 24:
+        return initial, offset + 1
+    major, value, offset = decode_head(buf, offset)
+    if major != 0 or value is None:
+        raise DecodeError(f"Expected an unsigned integer before offset {offset}")
+    return value, offset
+
+# ipn EIDs, [2, [node, service]], open with these three bytes
+_IPN_PREFIX = b'\x82\x02\x82'
+
+def _eid_end(buf, offset):
+    if buf[offset:offset + 3] == _IPN_PREFIX:
+        _, offset = _decode_uint(buf, offset + 3)
+        _, offset = _decode_uint(buf, offset)
+        return offset
+    return skip_item(buf, offset)
+
+def _block_crc(buf, block_start, offset, crc_type, verify):
+    """Reads the CRC ending the block that starts at `block_start`; returns the offset past it."""
+    length = CRC_LENGTHS.get(crc_type)
+    if length is None:
+        raise DecodeError(f"Unknown CRC type {crc_type} in block at offset {block_start}")
+    major, value_length, offset = decode_head(buf, offset)
+    if major != 2 or value_length != length:
+        raise DecodeError(f"CRC type {crc_type} needs a {length}-byte CRC value in block at offset {block_start}")
+    end = offset + length
+    if end > len(buf):
+        raise IncompleteBundle()
+    if verify:
+        # The CRC covers the whole block with its own value zeroed
+        function = crc_function(crc_type)
+        actual = function(bytes(length), function(buf[block_start:offset]))
+        expected = int.from_bytes(buf[offset:end], 'big')
+        if actual != expected:
+            raise CRCError(f"CRC mismatch in block at offset {block_start}: carries {expected:#x}, computed {actual:#x}")
+    return end
+
+def _decode_cbor(config, buf, offset, verify_crc):
+    start = offset
+    if buf[offset] != 0x9F:
+        raise DecodeError(f"Not a BPv7 bundle: expected indefinite-length array at offset {offset}")
+    fields = config.get('primary_block', {}).get('fields', [])
+    major, count, offset = decode_head(buf, start + 1)
+    # Beyond the configured fields: fragment offset and total ADU length, then the CRC
+    extra = count - len(fields) if major == 4 else -1
+    if extra >= len(FRAGMENT_FIELDS):
+        config = fragment_config(config)
+        fields = config['primary_block']['fields']
+        extra -= len(FRAGMENT_FIELDS)
+    if extra not in (0, 1):
+        raise DecodeError(f"BPv7 primary block must be an array of {len(fields)} fields (plus CRC)")
+
+    data = {}
+    for field in fields:
+        if field == 'version':
+            version, offset = _decode_uint(buf, offset)
+            if version != config.get('version'):
+                raise DecodeError(f"Bundle version {version}, config expects {config.get('version')}")
+        elif 'eid' in field:
+            # EIDs stay CBOR-encoded, the form BaseBundle serializes them from
+            end = _eid_end(buf, offset)
+            data[field] = bytes(buf[offset:end])
+            offset = end
+        elif field == 'creation_timestamp_array':
+            major, count, offset = decode_head(buf, offset)
+            if major != 4 or count != 2:
+                raise DecodeError("Creation timestamp must be a 2-element array")
+            data['creation_timestamp'], offset = _decode_uint(buf, offset)
+            data['sequence_number'], offset = _decode_uint(buf, offset)
+        else:
+            data[field], offset = _decode_uint(buf, offset)
+    crc_type = data.get('crc_type') or 0
+    if bool(crc_type) != bool(extra):
+        raise DecodeError(f"BPv7 primary block with CRC type {crc_type} {'lacks' if crc_type else 'has'} a CRC value")
+    if crc_type:
+        offset = _block_crc(buf, start + 1, offset, crc_type, verify_crc)
+
+    # Canonical blocks: [type, number, flags, crc type, data(, crc)] until the break code
+    while buf[offset] != 0xFF:
+        block_start = offset
+        major, count, offset = decode_head(buf, offset)
+        if major != 4 or count not in (5, 6):
+            raise DecodeError(f"Malformed canonical block before offset {offset}")
+        block_type, offset = _decode_uint(buf, offset)
+        for _ in range(2):  # block number, flags
+            _, offset = _decode_uint(buf, offset)
+        block_crc_type, offset = _decode_uint(buf, offset)
+        if bool(block_crc_type) != (count == 6):
+            raise DecodeError(f"Canonical block at offset {block_start} has CRC type {block_crc_type} but {count} elements")
+        major, length, offset = decode_head(buf, offset)
+        if major != 2 or length is None:
+            raise DecodeError(f"Block data must be a definite-length byte string before offset {offset}")
+        end = offset + length
+        if end >= len(buf):
+            raise IncompleteBundle(needed=end - start + 1)
+        if block_type == 1:
+            data['payload'] = buf[offset:end]
+        offset = end if count == 5 else _block_crc(buf, block_start, end, block_crc_type, verify_crc)
+
+    if 'payload' not in data:
+        raise DecodeError("BPv7 bundle has no payload block")
+    return BaseBundle(config, data), offset + 1
+
+_DECODERS = {
+    'sdnv_cbhe': _decode_sdnv_cbhe,
+    'cbor': _decode_cbor,
+}
+
+def decode_bundle(config, buf, offset=0, verify_crc=False):
+    """
+    Decodes one bundle without copying its payload.
+    :param config: Protocol configuration dictionary (e.g. config.json's 'bpv6' / 'bpv7').
+    :param buf: bytes-like object (bytes, bytearray, memoryview, mmap) holding the bundle.
+    :param offset: Where the bundle starts.
+    :param verify_crc: Check every block CRC, raising CRCError on a mismatch. Otherwise
+        CRC values are only skipped.
+    :return: (BaseBundle, offset just past the bundle). The bundle's payload is a memoryview
+        into `buf`, so `buf` must not be modified while the bundle is in use.
+    """
+    decoder = _DECODERS.get(config.get('encoding'))
+    if decoder is None:
+        raise ValueError(f"Unknown encoding: {config.get('encoding')}")
+    view = buf if isinstance(buf, memoryview) and buf.format == 'B' else memoryview(buf).cast('B')
+    try:
+        return decoder(config, view, offset, verify_crc)
+    except IndexError:
+        raise IncompleteBundle() from None
+    except ValueError as e:
+        if isinstance(e, DecodeError):
+            raise
+        raise DecodeError(str(e)) from e
+
+def decode_all(config, buf, verify_crc=False):
+    """Yields every bundle in a contiguous buffer, e.g. an mmap of a capture file."""
+    view = memoryview(buf).cast('B')
+    offset = 0
+    while offset < len(view):
+        bundle, offset = decode_bundle(config, view, offset, verify_crc)
+        yield bundle
+
+class BundleStreamParser:
+    """
+    Incremental decoder for bundles arriving in arbitrary chunks (file reads, socket recv).
+
+    feed() returns the bundles completed by each chunk. Chunks are only joined once enough
+    bytes have arrived for the next bundle, so large bundles are not re-scanned per chunk.
+    Mutable chunks (bytearray, memoryview) are copied once on arrival, since decoded payloads
+    keep referencing the data.
+    """
+
+    def __init__(self, config, verify_crc=False):
+        self.config = config
+        self.verify_crc = verify_crc
+        self._chunks = []
+        self._pending = 0
+        self._needed = 1  # bytes required before the next decode attempt
+
+    def feed(self, chunk):
+        if chunk:
+            self._chunks.append(chunk if isinstance(chunk, bytes) else bytes(chunk))
+            self._pending += len(chunk)
+        if self._pending < self._needed:
+            return []
+
+        data = memoryview(self._chunks[0] if len(self._chunks) == 1 else b"".join(self._chunks))
+        bundles = []
+        offset = 0
+        self._needed = 1
+        while offset < len(data):
+            try:
+                bundle, offset = decode_bundle(self.config, data, offset, self.verify_crc)
+            except IncompleteBundle as e:
+                self._needed = max(e.needed or 0, len(data) - offset + 1)
+                break
+            bundles.append(bundle)
+
+        self._chunks = [data[offset:]] if offset < len(data) else []
+        self._pending = len(data) - offset
+        return bundles
+
+    def close(self):
+        """Signals end of stream; raises IncompleteBundle if a partial bundle is left over."""
+        if self._pending:
+            raise IncompleteBundle(f"Stream ended with {self._pending} bytes of an incomplete bundle")
+
+def iter_bundles(config, chunks, verify_crc=False):
+    """Yields bundles decoded from an iterable of byte chunks."""
+    parser = BundleStreamParser(config, verify_crc)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.close()
+
+def read_bundles(config, fileobj, chunk_size=1 << 20, verify_crc=False):
+    """Yields bundles read from a binary file object (or anything with a compatible read())."""
+    return iter_bundles(config, iter(partial(fileobj.read, chunk_size), b""), verify_crc)
@@ -0,0 +1,222 @@
+import bisect
+import mmap
+import os
+import time
+
+from . import cbor_utils
+from .base_bundle import BaseBundle
+from .plan import ConfigCache, get_plan
+
+# Bundle processing control flag: "bundle is a fragment" (RFC 5050 / RFC 9171 bit 0)
+FRAGMENT_FLAG = 0x01
+# Appended to the primary block of fragments, after the configured fields
+FRAGMENT_FIELDS = ('fragment_offset', 'total_adu_length')
+
+def fragment_config(config):
+    """
+    The config fragments of `config` bundles are serialized with: the same primary block
+    plus fragment offset and total application data unit (ADU) length. Cached per config.
+    """
+    fields = config.get('primary_block', {}).get('fields', [])
+    if fields[-len(FRAGMENT_FIELDS):] == list(FRAGMENT_FIELDS):
+        return config
+    return _fragment_configs.get(config)
+
+def _derive_fragment_config(config):
+    fields = config.get('primary_block', {}).get('fields', [])
+    derived = dict(config)
+    derived['primary_block'] = dict(config.get('primary_block', {}), fields=list(fields) + list(FRAGMENT_FIELDS))
+    return derived
+
+_fragment_configs = ConfigCache(_derive_fragment_config)
+
+def _is_file(source):
+    # mmap objects also have read(), but are sliced like bytes
+    return hasattr(source, 'read') and not isinstance(source, mmap.mmap)
+
+def _remaining_length(source):
+    if _is_file(source):
+        position = source.tell()
+        end = source.seek(0, os.SEEK_END)
+        source.seek(position)
+        return end - position
+    return memoryview(source).nbytes
+
+def fragment(config, data, payload, max_size, total_length=None):
+    """
+    Splits one bundle into fragments of at most `max_size` serialized bytes each.
+
+    The payload is never loaded whole: file objects are read one fragment at a time and
+    bytes-like sources (bytes, mmap, memoryview) are sliced without copying.
+    :param config: Protocol configuration dictionary (e.g. config.json's 'bpv6' / 'bpv7').
+    :param data: Bundle fields, as for BaseBundle (any 'payload' entry is ignored).
+    :param payload: Binary file object positioned at the payload start, or a bytes-like object.
+    :param max_size: Upper bound on each serialized fragment, headers included.
+    :param total_length: Payload length, if the file object cannot seek.
+    :return: Generator of BaseBundle fragments in offset order.
+    """
+    config = fragment_config(config)
+    fields = {key: value for key, value in data.items() if key != 'payload'}
+    # Every fragment must carry the same creation timestamp, so fix the defaults up front
+    if 'creation_timestamp' not in fields:
+        fields['creation_timestamp'] = int(time.time() - config.get('time_offset', 0))
+        fields['sequence_number'] = 0
+    fields.setdefault('lifetime', config.get('default_lifetime', 3600))
+    fields['proc_flags'] = (fields.get('proc_flags') or 0) | FRAGMENT_FLAG
+
+    total = _remaining_length(payload) if total_length is None else total_length
+    # Headers are sized with the largest offset and length any fragment will carry
+    head, tail = get_plan(config).frame(dict(fields, fragment_offset=total, total_adu_length=total), max_size)
+    chunk = max_size - len(head) - len(tail)
+    if chunk <= 0:
+        raise ValueError(f"max_size {max_size} leaves no room for payload ({len(head) + len(tail)} header bytes)")
+    return _fragments(config, fields, payload, total, chunk)
+
+def _fragments(config, fields, payload, total, chunk):
+    view = None if _is_file(payload) else memoryview(payload).cast('B')
+    offset = 0
+    while offset < total:
+        length = min(chunk, total - offset)
+        piece = payload.read(length) if view is None else view[offset:offset + length]
+        if len(piece) != length:
+            raise ValueError(f"Payload ended at {offset + len(piece)} bytes, expected {total}")
+        yield BaseBundle(config, dict(fields, fragment_offset=offset, total_adu_length=total, payload=piece))
+        offset += length
+
+class IntervalSet:
+    """Disjoint, sorted half-open byte ranges; adjacent and overlapping ranges are merged."""
+
+    def __init__(self):
+        self._starts = []
+        self._ends = []
+
+    def add(self, start, end):
+        if start >= end:
+            return
+        # Every range touching [start, end] is merged into it
+        lo = bisect.bisect_left(self._ends, start)
+        hi = bisect.bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def covered(self):
+        """Total bytes covered."""
+        return sum(self._ends) - sum(self._starts)
+
+    def gaps(self, total):
+        """Uncovered [start, end) ranges within [0, total)."""
+        gaps, position = [], 0
+        for start, end in zip(self._starts, self._ends):
+            if start > position:
+                gaps.append((position, start))
+            position = end
+        if position < total:
+            gaps.append((position, total))
+        return gaps
+
+    def __iter__(self):
+        return iter(zip(self._starts, self._ends))
+
+    def __len__(self):
+        return len(self._starts)
+
+class Reassembly:
+    """
+    One ADU being reassembled straight into a preallocated file; memory use is the
+    interval set of received ranges, independent of the payload size.
+    """
+
+    def __init__(self, path, total_length):
+        self.path = path
+        self.total_length = total_length
+        self.received = IntervalSet()
+        self._partial = path + '.part'
+        self._file = open(self._partial, 'wb')
+        self._file.truncate(total_length)
+
+    def add(self, offset, data):
+        """Writes one fragment's payload; duplicates and overlaps are harmless."""
+        end = offset + len(data)
+        if offset < 0 or end > self.total_length:
+            raise ValueError(f"Fragment [{offset}, {end}) outside ADU of {self.total_length} bytes")
+        self._file.seek(offset)
+        self._file.write(data)
+        self.received.add(offset, end)
+
+    @property
+    def complete(self):
+        if self.total_length == 0:
+            return True
+        return len(self.received) == 1 and next(iter(self.received)) == (0, self.total_length)
+
+    def finish(self):
+        """Flushes and moves the file to `path`; only valid once complete."""
+        if not self.complete:
+            raise ValueError(f"ADU incomplete, missing {self.received.gaps(self.total_length)}")
+        self._file.close()
+        os.replace(self._partial, self.path)
+        return self.path
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._partial)
+
+def _eid_label(eid):
+    if isinstance(eid, bytes):
+        decoded = cbor_utils.decode(eid)
+        if isinstance(decoded, list) and len(decoded) == 2 and decoded[0] == 2:
+            return "ipn{}.{}".format(*decoded[1])
+        return eid.hex()
+    return "ipn{}.{}".format(*eid)
+
+class Reassembler:
+    """
+    Collects fragments of many bundles (e.g. straight from decoder.BundleStreamParser) and
+    writes each ADU into `directory` as `<source>-<timestamp>-<sequence>.adu`.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._pending = {}
+
+    @staticmethod
+    def key(bundle):
+        """ADU identity: source EID, creation timestamp and sequence number."""
+        data = bundle.data
+        source = data['source_eid'] if 'source_eid' in data else (data['source_node'], data['source_service'])
+        return _eid_label(source), data['creation_timestamp'], data['sequence_number']
+
+    def add(self, bundle):
+        """
+        Adds one fragment bundle.
+        :return: Path of the reassembled payload once this fragment completes it, else None.
+        """
+        data = bundle.data
+        if not (data.get('proc_flags') or 0) & FRAGMENT_FLAG:
+            raise ValueError("Bundle is not a fragment")
+        key = self.key(bundle)
+        reassembly = self._pending.get(key)
+        if reassembly is None:
+            path = os.path.join(self.directory, "{}-{}-{}.adu".format(*key))
+            reassembly = self._pending[key] = Reassembly(path, data['total_adu_length'])
+        elif reassembly.total_length != data['total_adu_length']:
+            raise ValueError(f"Fragment total length {data['total_adu_length']} disagrees with {reassembly.total_length}")
+        reassembly.add(data['fragment_offset'], bundle.payload)
+        if reassembly.complete:
+            del self._pending[key]
+            return reassembly.finish()
+        return None
+
+    def pending(self):
+        """Incomplete ADUs: key -> list of missing (start, end) ranges."""
+        return {key: r.received.gaps(r.total_length) for key, r in self._pending.items()}
+
+    def close(self):
+        """Discards every incomplete ADU."""
+        for reassembly in self._pending.values():
+            reassembly.abort()
+        self._pending.clear()
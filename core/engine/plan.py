@@ -0,0 +1,235 @@
+import collections
+import threading
+
+from . import cbor_utils
+from .crc import CRC_LENGTHS, crc_bytes, crc_function, crc_iov
+from .sdnv import encode_sdnv
+
+# BPv6 payload block: type 1, flags SDNV(0x02) = last block
+SDNV_PAYLOAD_BLOCK_PREFIX = b'\x01' + encode_sdnv(0x02)
+# BPv7 payload block: array(5) [type 1, block number 1, flags 0, CRC type 0, ...data]
+CBOR_PAYLOAD_BLOCK_PREFIX = cbor_utils.encode_array_header(5) + b"".join(cbor_utils.encode_uint(v) for v in (1, 1, 0, 0))
+
+class SerializerPlan:
+    """
+    A protocol config compiled into encoder callables.
+
+    Each field encoder takes the bundle's data dict and returns the field's bytes; field
+    names, defaults, constants and the encoding are resolved once, when the plan is built.
+    A bundle serializes as `head + payload + tail`, where `frame(data, payload_length)`
+    builds head and tail, so the payload itself never has to be copied into a new object.
+    Blocks with a CRC get a zero placeholder unless the payload is passed as well, as
+    `frame(data, payload_length, payload)`, to compute the payload block CRC over.
+    """
+
+    def __init__(self, encoding, field_encoders, frame):
+        self.encoding = encoding
+        self.field_encoders = field_encoders
+        self.frame = frame
+
+    def serialize(self, bundle):
+        head, tail = self.frame(bundle.data, len(bundle.payload), bundle.payload)
+        return b"".join((head, bundle.payload, tail))
+
+    def serialize_iov(self, bundle):
+        """
+        Scatter-gather form: [head, payload memoryview(, tail)], ready for
+        `os.writev`, `socket.sendmsg` or `file.writelines`.
+        """
+        payload = memoryview(bundle.payload)
+        head, tail = self.frame(bundle.data, payload.nbytes, payload)
+        return [head, payload, tail] if tail else [head, payload]
+
+    def serialized_size(self, bundle):
+        payload_length = len(bundle.payload)
+        head, tail = self.frame(bundle.data, payload_length)
+        return len(head) + payload_length + len(tail)
+
+    def serialize_into(self, bundle, buf, offset=0):
+        """
+        Writes the bundle into a writable buffer (bytearray, memoryview, mmap) at `offset`.
+        The payload is copied once, straight into `buf`.
+        :return: Offset just past the written bundle.
+        """
+        payload = memoryview(bundle.payload).cast('B')
+        head, tail = self.frame(bundle.data, payload.nbytes, payload)
+        end = offset + len(head) + payload.nbytes + len(tail)
+        if offset < 0 or end > len(buf):
+            raise ValueError(f"Buffer too small: bundle needs {end - offset} bytes at offset {offset}, buffer has {len(buf)}")
+        out = memoryview(buf)
+        out[offset:offset + len(head)] = head
+        offset += len(head)
+        out[offset:offset + payload.nbytes] = payload
+        offset += payload.nbytes
+        out[offset:end] = tail
+        return end
+
+# --- BPv6 (SDNV / CBHE) ---
+
+def _sdnv_field(name):
+    def encode(data):
+        return encode_sdnv(data.get(name, 0))
+    return encode
+
+def _compile_sdnv_cbhe(config):
+    fields = config.get('primary_block', {}).get('fields', [])
+    # Processing flags come first and are not part of the configured field list
+    encoders = tuple([_sdnv_field('proc_flags')] + [_sdnv_field(field) for field in fields])
+
+    def frame(data, payload_length, payload=None):
+        header_content = b"".join([encode(data) for encode in encoders])
+        head = b"".join((
+            b'\x06',  # BPv6 version byte
+            encode_sdnv(len(header_content)),
+            header_content,
+            SDNV_PAYLOAD_BLOCK_PREFIX,
+            encode_sdnv(payload_length),
+        ))
+        return head, b""
+
+    return SerializerPlan('sdnv_cbhe', encoders, frame)
+
+# --- BPv7 (CBOR) ---
+
+def _constant(value):
+    def encode(data):
+        return value
+    return encode
+
+def _uint_field(name):
+    def encode(data):
+        val = data.get(name)
+        return cbor_utils.encode_uint(val if val is not None else 0)
+    return encode
+
+def _eid_field(name):
+    # EIDs arrive pre-encoded as CBOR bytes; anything else encodes as 0
+    zero = cbor_utils.encode_uint(0)
+    def encode(data):
+        val = data.get(name)
+        return val if isinstance(val, bytes) else zero
+    return encode
+
+_PAIR_HEADER = cbor_utils.encode_array_header(2)
+
+def _creation_timestamp(data):
+    return _PAIR_HEADER + cbor_utils.encode_uint(data.get('creation_timestamp')) + cbor_utils.encode_uint(data.get('sequence_number'))
+
+def _cbor_field_encoder(config, field):
+    if field == 'version':
+        return _constant(cbor_utils.encode_uint(config.get('version')))
+    if 'eid' in field:
+        return _eid_field(field)
+    if field == 'creation_timestamp_array':
+        return _creation_timestamp
+    return _uint_field(field)
+
+def _crc_field(crc_type):
+    # CRC value byte string, all zeros: the form the CRC itself is computed over
+    length = CRC_LENGTHS.get(crc_type)
+    if length is None:
+        raise ValueError(f"Unknown CRC type: {crc_type}")
+    return cbor_utils.encode_byte_string_header(length) + bytes(length)
+
+def _with_crc(crc_type, block):
+    # `block` ends with its zeroed CRC value; returns it with the value filled in
+    length = CRC_LENGTHS[crc_type]
+    return block[:-length] + crc_bytes(crc_type, crc_function(crc_type)(block))
+
+def _compile_cbor(config):
+    fields = config.get('primary_block', {}).get('fields', [])
+    encoders = tuple(_cbor_field_encoder(config, field) for field in fields)
+    primary_header = cbor_utils.encode_array_header(len(encoders))
+    # With a CRC the primary block gains a last element and the payload block a sixth
+    primary_crc_header = cbor_utils.encode_array_header(len(encoders) + 1)
+    payload_crc_prefix = cbor_utils.encode_array_header(6) + b"".join(cbor_utils.encode_uint(v) for v in (1, 1, 0))
+    start = cbor_utils.encode_indefinite_array_start()
+    break_code = cbor_utils.encode_break()
+
+    def frame(data, payload_length, payload=None):
+        crc_type = data.get('crc_type')
+        if not crc_type:
+            head = b"".join((
+                start,
+                primary_header,
+                b"".join([encode(data) for encode in encoders]),
+                CBOR_PAYLOAD_BLOCK_PREFIX,
+                cbor_utils.encode_byte_string_header(payload_length),
+            ))
+            return head, break_code
+
+        crc_field = _crc_field(crc_type)
+        primary = b"".join((primary_crc_header, b"".join([encode(data) for encode in encoders]), crc_field))
+        block_head = b"".join((
+            payload_crc_prefix,
+            cbor_utils.encode_uint(crc_type),
+            cbor_utils.encode_byte_string_header(payload_length),
+        ))
+        tail = crc_field
+        if payload is not None:
+            # Computed across the block's pieces in place; the payload is not joined or copied
+            tail = crc_field[:-CRC_LENGTHS[crc_type]] + crc_bytes(crc_type, crc_iov(crc_type, (block_head, payload, crc_field)))
+        return b"".join((start, _with_crc(crc_type, primary), block_head)), tail + break_code
+
+    return SerializerPlan('cbor', encoders, frame)
+
+_COMPILERS = {
+    'sdnv_cbhe': _compile_sdnv_cbhe,
+    'cbor': _compile_cbor,
+}
+
+def compile_plan(config):
+    """
+    Builds a serializer plan for a protocol config (e.g. config.json's 'bpv6' / 'bpv7').
+    :param config: Protocol configuration dictionary.
+    :return: SerializerPlan
+    """
+    encoding = config.get('encoding')
+    compiler = _COMPILERS.get(encoding)
+    if compiler is None:
+        raise ValueError(f"Unknown encoding: {encoding}")
+    return compiler(config)
+
+# Configs a cache keeps before evicting the least recently used one
+CONFIG_CACHE_SIZE = 256
+
+class ConfigCache:
+    """
+    Values built from config dicts, keyed by id(config). The config is kept alongside so its
+    id cannot be reused while cached; configs are treated as immutable once a bundle has been
+    serialized with them. Bounded, since callers may build configs on the fly.
+    """
+
+    def __init__(self, build, max_size=CONFIG_CACHE_SIZE):
+        """
+        :param build: Builds the value for a config on a miss.
+        :param max_size: Number of configs kept; the least recently used is evicted.
+        """
+        self.build = build
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, config):
+        key = id(config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is config:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = self.build(config)
+        with self._lock:
+            self._entries[key] = (config, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+_plans = ConfigCache(compile_plan)
+
+def get_plan(config):
+    """Returns the cached plan for `config`, compiling it on first use."""
+    return _plans.get(config)
@@ -0,0 +1,35 @@
+# Values below 128 encode to themselves; cached so the common case is a list lookup
+_SMALL = [bytes([i]) for i in range(128)]
+
+def encode_sdnv(val):
+    """Encodes a non-negative integer as an SDNV (Self-Delimiting Numeric Value)."""
+    if val < 128:
+        if val < 0:
+            raise ValueError(f"SDNV cannot encode negative value {val}")
+        return _SMALL[val]
+
+    output = bytearray()
+    output.append(val & 0x7F)
+    val >>= 7
+    while val > 0:
+        output.append((val & 0x7F) | 0x80)
+        val >>= 7
+    output.reverse()
+    return bytes(output)
+
+def decode_sdnv(buf, offset=0):
+    """
+    Decodes an SDNV starting at `offset`.
+    :return: (value, offset just past the SDNV). Raises IndexError if `buf` ends first.
+    """
+    byte = buf[offset]
+    if byte < 0x80:
+        return byte, offset + 1
+
+    val = byte & 0x7F
+    while True:
+        offset += 1
+        byte = buf[offset]
+        val = (val << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return val, offset + 1
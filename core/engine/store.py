@@ -0,0 +1,329 @@
+import heapq
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from . import cbor_utils
+from .compact import CompactBundle
+
+class StoreFull(Exception):
+    """Raised when a bundle fits in neither the RAM nor the disk quota."""
+
+class _Entry:
+    __slots__ = ('destination', 'expires', 'length', 'data', 'segment', 'offset')
+
+    def __init__(self, destination, expires, data):
+        self.destination = destination
+        self.expires = expires
+        self.length = len(data)
+        self.data = data  # bytes while in RAM, None once spilled
+        self.segment = None
+        self.offset = 0
+
+class _Segment:
+    """A preallocated, memory-mapped file that bundles are appended to."""
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self.position = 0
+        self.entries = {}  # bundle id -> _Entry of the bundles still stored here
+        self.live_bytes = 0
+        with open(path, 'wb') as f:
+            f.truncate(size)
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    @property
+    def live(self):
+        return len(self.entries)
+
+    def append(self, bundle_id, entry, data):
+        offset = self.position
+        self._map[offset:offset + len(data)] = data
+        self.position += len(data)
+        self.entries[bundle_id] = entry
+        self.live_bytes += len(data)
+        return offset
+
+    def release(self, bundle_id):
+        self.live_bytes -= self.entries.pop(bundle_id).length
+
+    def read(self, offset, length):
+        return self._map[offset:offset + length]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def delete(self):
+        self.close()
+        os.remove(self.path)
+
+def bundle_destination(bundle):
+    """Index key for a bundle's destination: (node, service) for ipn EIDs, else the encoded EID."""
+    if isinstance(bundle, CompactBundle):
+        return bundle.eid('dest_eid') if bundle.layout.eids else (bundle.field('dest_node'), bundle.field('dest_service'))
+    data = bundle.data
+    if 'dest_node' in data:
+        return data['dest_node'], data.get('dest_service', 0)
+    eid = data.get('dest_eid')
+    if isinstance(eid, bytes):
+        decoded = cbor_utils.decode(eid)
+        if isinstance(decoded, list) and len(decoded) == 2 and decoded[0] == 2:
+            return tuple(decoded[1])
+    return eid
+
+def bundle_expiry(bundle):
+    """Unix time at which a bundle's lifetime runs out (creation timestamps count from the config's time_offset)."""
+    if isinstance(bundle, CompactBundle):
+        creation, lifetime = bundle.field('creation_timestamp'), bundle.field('lifetime')
+    else:
+        creation, lifetime = bundle.data.get('creation_timestamp', 0), bundle.data.get('lifetime', 0)
+    return creation + bundle.config.get('time_offset', 0) + lifetime
+
+class BundleStore:
+    """
+    Bounded bundle buffer: serialized bundles are held in RAM up to `ram_quota` bytes, then the
+    oldest are spilled to memory-mapped segment files in `directory`, up to `disk_quota` bytes
+    of segments. Bundles are indexed by destination and by expiry.
+
+    A segment file is deleted once every bundle in it has been removed or has expired. So that
+    one long-lived bundle can't pin a whole segment, a segment whose live bytes drop below
+    `compact_ratio` of its size has its remaining bundles copied to the active segment and is
+    deleted then. Disk use therefore stays below about live spilled bytes / compact_ratio plus
+    the active segment.
+    """
+
+    def __init__(self, directory, ram_quota=64 << 20, disk_quota=1 << 30, segment_size=64 << 20,
+                 compact_ratio=0.25, clock=time.time):
+        """
+        :param directory: Where segment files are created (made if missing).
+        :param ram_quota: Bytes of serialized bundles kept in memory before spilling.
+        :param disk_quota: Bytes of segment files allowed on disk.
+        :param segment_size: Size of each preallocated segment file; larger bundles get their own.
+        :param compact_ratio: Live fraction below which a segment is compacted; 0 disables compaction.
+        :param clock: Returns the current Unix time; used by expire().
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ram_quota = ram_quota
+        self.disk_quota = disk_quota
+        self.segment_size = segment_size
+        self.compact_ratio = compact_ratio
+        self.clock = clock
+
+        self._entries = {}
+        self._by_destination = {}
+        self._expiry_heap = []
+        self._in_ram = OrderedDict()  # ids of RAM-resident bundles, oldest first
+        self._ram_bytes = 0
+        self._segments = {}
+        self._sparse = set()  # paths of segments to compact once the current removal is done
+        self._active = None
+        self._next_id = 0
+        self._next_segment = 0
+        self._lock = threading.Lock()
+
+    # --- Writing ---
+
+    def put(self, data, destination, expires):
+        """
+        Stores one serialized bundle.
+        :param data: The bundle's bytes.
+        :param destination: Index key, e.g. an ipn (node, service) pair.
+        :param expires: Unix time after which expire() drops the bundle.
+        :return: Bundle id.
+        """
+        data = bytes(data)
+        with self._lock:
+            bundle_id = self._next_id
+            entry = _Entry(destination, expires, data)
+            if len(data) > self.ram_quota:
+                self._spill(bundle_id, entry)
+            else:
+                while self._ram_bytes + len(data) > self.ram_quota:
+                    # Oldest first; only unlink it from RAM once it is safely on disk
+                    oldest_id = next(iter(self._in_ram))
+                    oldest = self._entries[oldest_id]
+                    self._spill(oldest_id, oldest)
+                    del self._in_ram[oldest_id]
+                    self._ram_bytes -= oldest.length
+                self._in_ram[bundle_id] = None
+                self._ram_bytes += len(data)
+
+            self._next_id += 1
+            self._entries[bundle_id] = entry
+            self._by_destination.setdefault(destination, {})[bundle_id] = None
+            heapq.heappush(self._expiry_heap, (expires, bundle_id))
+            return bundle_id
+
+    def add_bundle(self, bundle):
+        """Serializes and stores a BaseBundle or CompactBundle, indexed by its destination and lifetime."""
+        return self.put(bundle.serialize(), bundle_destination(bundle), bundle_expiry(bundle))
+
+    def _spill(self, bundle_id, entry):
+        segment = self._active
+        if segment is None or segment.position + entry.length > segment.size:
+            segment = self._new_segment(max(self.segment_size, entry.length))
+        entry.offset = segment.append(bundle_id, entry, entry.data)
+        entry.segment = segment
+        entry.data = None
+
+    def _new_segment(self, size):
+        retired = self._active
+        if retired is not None and not retired.live:
+            # Everything in it was removed; it is only kept while it is the active segment
+            del self._segments[retired.path]
+            retired.delete()
+            self._active = None
+        if self.disk_bytes + size > self.disk_quota:
+            raise StoreFull(f"Disk quota of {self.disk_quota} bytes reached ({self.disk_bytes} bytes in segments)")
+        path = os.path.join(self.directory, f"segment-{self._next_segment:06d}.bin")
+        self._next_segment += 1
+        segment = _Segment(path, size)
+        self._segments[path] = segment
+        self._active = segment
+        return segment
+
+    # --- Reading ---
+
+    def get(self, bundle_id):
+        """Returns a stored bundle's bytes; raises KeyError if it was removed or expired."""
+        with self._lock:
+            entry = self._entries[bundle_id]
+            if entry.data is not None:
+                return entry.data
+            return entry.segment.read(entry.offset, entry.length)
+
+    def find(self, destination):
+        """Ids of the bundles stored for `destination`, oldest first."""
+        with self._lock:
+            return list(self._by_destination.get(destination, ()))
+
+    def pop_destination(self, destination, limit=None):
+        """
+        Removes and returns bundles for `destination` (e.g. when a contact to it opens).
+        :return: List of (bundle id, bytes), oldest first.
+        """
+        ids = self.find(destination)[:limit]
+        return [(bundle_id, self.remove(bundle_id)) for bundle_id in ids]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, bundle_id):
+        return bundle_id in self._entries
+
+    @property
+    def ram_bytes(self):
+        return self._ram_bytes
+
+    @property
+    def disk_bytes(self):
+        return sum(segment.size for segment in self._segments.values())
+
+    def stats(self):
+        return {
+            "bundles": len(self._entries),
+            "in_ram": len(self._in_ram),
+            "ram_bytes": self._ram_bytes,
+            "disk_bytes": self.disk_bytes,
+            "segments": len(self._segments),
+            "destinations": len(self._by_destination),
+        }
+
+    # --- Removal ---
+
+    def remove(self, bundle_id):
+        """Drops a bundle and returns its bytes; raises KeyError if it is not stored."""
+        with self._lock:
+            data = self._remove(bundle_id)
+            self._compact_sparse()
+            return data
+
+    def _remove(self, bundle_id):
+        entry = self._entries.pop(bundle_id)
+        ids = self._by_destination[entry.destination]
+        del ids[bundle_id]
+        if not ids:
+            del self._by_destination[entry.destination]
+
+        if entry.data is not None:
+            del self._in_ram[bundle_id]
+            self._ram_bytes -= entry.length
+            return entry.data
+
+        segment = entry.segment
+        data = segment.read(entry.offset, entry.length)
+        segment.release(bundle_id)
+        if not segment.live:
+            if segment is self._active:
+                segment.position = 0  # empty again: reuse it from the start
+            else:
+                del self._segments[segment.path]
+                self._sparse.discard(segment.path)
+                segment.delete()
+        elif segment is not self._active and segment.live_bytes < self.compact_ratio * segment.size:
+            self._sparse.add(segment.path)
+        return data
+
+    def _compact_sparse(self):
+        """Moves the bundles of sparse segments to the active segment and deletes the segments."""
+        while self._sparse:
+            segment = self._segments[self._sparse.pop()]
+            for bundle_id, entry in list(segment.entries.items()):
+                entry.data = segment.read(entry.offset, entry.length)
+                try:
+                    self._spill(bundle_id, entry)
+                except StoreFull:
+                    # No room for a fresh segment yet; retried on this segment's next removal
+                    entry.data = None
+                    return
+                segment.release(bundle_id)
+            del self._segments[segment.path]
+            segment.delete()
+
+    def expire(self, now=None):
+        """
+        Drops every bundle whose expiry is at or before `now` (default: the store's clock).
+        Each expired bundle costs one O(log n) heap pop.
+        :return: Number of bundles dropped.
+        """
+        now = self.clock() if now is None else now
+        expired = 0
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                _, bundle_id = heapq.heappop(heap)
+                # Heap entries of bundles removed earlier are skipped here (lazy deletion)
+                if bundle_id in self._entries:
+                    self._remove(bundle_id)
+                    expired += 1
+            if len(heap) > 2 * len(self._entries) + 1024:
+                self._expiry_heap = [(entry.expires, bundle_id) for bundle_id, entry in self._entries.items()]
+                heapq.heapify(self._expiry_heap)
+            self._compact_sparse()
+        return expired
+
+    def close(self):
+        """Releases the memory maps and deletes the segment files; the store is scratch space."""
+        with self._lock:
+            for segment in self._segments.values():
+                segment.delete()
+            self._segments.clear()
+            self._sparse.clear()
+            self._active = None
+            self._entries.clear()
+            self._by_destination.clear()
+            self._expiry_heap.clear()
+            self._in_ram.clear()
+            self._ram_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
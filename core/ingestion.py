@@ -6,7 +6,11 @@ import time
 import concurrent.futures
 from typing import List, Dict, Any, Tuple, Optional, Callable
 from core.db import log_event
+from core.metrics import ERRORS, llm_call
+from core.tracing import bind_context, current_span, start_span, traced
+from core.llm_clients import get_model
 
+@traced("ingest.batch")
 def process_batch(batch_index: int, batch_text: str, model: genai.GenerativeModel) -> List[Dict[str, Any]]:
     """
     Helper function to process a single batch of text using the AI model.
@@ -19,6 +23,8 @@ def process_batch(batch_index: int, batch_text: str, model: genai.GenerativeMode
     Returns:
         List[Dict[str, Any]]: A list of extracted requirements as dictionaries.
     """
+    span = current_span()
+    span.set_attributes({"batch.index": batch_index, "batch.chars": len(batch_text)})
     try:
         prompt = f"""
         Analyze the following technical specification text. Extract all **Technical Requirements**.
@@ -42,12 +48,18 @@ def process_batch(batch_index: int, batch_text: str, model: genai.GenerativeMode
         {batch_text}
         """
         
-        response = model.generate_content(prompt)
-        return json.loads(response.text)
+        with llm_call("process_batch") as call:
+            response = model.generate_content(prompt)
+            call.record(response)
+        batch_reqs = json.loads(response.text)
+        span.set_attribute("requirements", len(batch_reqs))
+        return batch_reqs
     except Exception as e:
+        ERRORS.inc(site="process_batch")
         log_event(f"Error processing batch {batch_index + 1}: {e}", level="ERROR")
         return []
 
+@traced("ingest.title")
 def extract_doc_title(first_pages_text: str, model: genai.GenerativeModel) -> str:
     """
     Extracts the official document title from the first few pages.
@@ -70,12 +82,16 @@ def extract_doc_title(first_pages_text: str, model: genai.GenerativeModel) -> st
         TEXT:
         {first_pages_text[:5000]}
         """
-        response = model.generate_content(prompt)
+        with llm_call("extract_doc_title") as call:
+            response = model.generate_content(prompt)
+            call.record(response)
         return response.text.strip()
     except Exception as e:
+        ERRORS.inc(site="extract_doc_title")
         log_event(f"Error extracting title: {e}", level="ERROR")
         return "Untitled Specification"
 
+@traced("ingest")
 def extract_requirements_from_pdf(
     file_path: str, 
     api_key: str, 
@@ -94,15 +110,16 @@ def extract_requirements_from_pdf(
     Returns:
         Tuple[List[Dict[str, Any]], str]: A tuple containing a list of requirement dictionaries and the document title.
     """
+    root = current_span()
+    root.set_attributes({"file": os.path.basename(file_path), "section": target_section or ""})
     requirements = []
     
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash',
-                                      generation_config={"response_mime_type": "application/json"})
+        model = get_model(api_key, generation_config={"response_mime_type": "application/json"})
         
         reader = pypdf.PdfReader(file_path)
         total_pages = len(reader.pages)
+        root.set_attribute("pages.total", total_pages)
         
         # PHASE 0: Extract Title (Auto-Titling)
         if progress_callback:
@@ -175,6 +192,7 @@ def extract_requirements_from_pdf(
         
         # PHASE 2: AI Extraction
         num_filtered_pages = len(pages_to_process)
+        root.set_attribute("pages.selected", num_filtered_pages)
         if progress_callback:
             progress_callback(0.2, f"Sending {num_filtered_pages} relevant pages to AI...")
             
@@ -205,9 +223,10 @@ def extract_requirements_from_pdf(
              return [], doc_title
 
         # Parallel Execution
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with start_span("ingest.extract", {"batches": total_batches, "workers": MAX_WORKERS}), \
+                concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
             future_to_batch = {
-                executor.submit(process_batch, b[0]//BATCH_SIZE, b[1], model): b[0] 
+                executor.submit(bind_context(process_batch), b[0]//BATCH_SIZE, b[1], model): b[0] 
                 for b in batches
             }
             
@@ -234,7 +253,10 @@ def extract_requirements_from_pdf(
         if progress_callback:
             progress_callback(1.0, f"Ingestion Complete. Title: {doc_title}")
 
+        root.set_attributes({"title": doc_title, "requirements": len(requirements)})
+
     except Exception as e:
+        root.set_status("ERROR", str(e))
         log_event(f"Error initializing AI extraction: {e}", level="ERROR")
         return [], "Error"
 
@@ -0,0 +1,88 @@
+from typing import Any, Dict, Optional
+
+from core.db import get_requirement_by_id, save_requirements, update_generated_code, update_execution_result, log_event
+from core.jobs import JobContext
+from core.tracing import start_span
+
+# Handlers import the AI stack lazily so the worker loop stays cheap to start.
+
+def _load_requirement(payload: Dict[str, Any]) -> Dict:
+    req = get_requirement_by_id(payload['req_id'])
+    if req is None:
+        raise LookupError(f"Requirement {payload['req_id']} not found")
+    return req
+
+def run_ingest(payload: Dict[str, Any], api_key: Optional[str], context: JobContext) -> Dict[str, Any]:
+    """Extract requirements from an uploaded PDF and save them under its filename."""
+    from core.ingestion import extract_requirements_from_pdf
+
+    extracted_data, doc_title = extract_requirements_from_pdf(
+        payload['path'],
+        api_key,
+        target_section=payload.get('target_section'),
+        progress_callback=context.progress
+    )
+    # Extraction swallows errors (including cancellation) and returns an empty list
+    context.check_cancelled()
+    if not extracted_data:
+        raise ValueError("No requirements found in the PDF.")
+
+    with start_span("ingest.persist", {"requirements": len(extracted_data)}):
+        save_requirements(extracted_data, payload['filename'], payload.get('target_section'), doc_title=doc_title)
+    return {
+        "message": f"Successfully ingested {len(extracted_data)} requirements from '{doc_title}'!",
+        "count": len(extracted_data),
+        "title": doc_title
+    }
+
+def run_analyze(payload: Dict[str, Any], api_key: Optional[str], context: JobContext) -> Dict[str, Any]:
+    """Determine the verification method of a requirement."""
+    from core.verification_engine import VerificationEngine
+
+    req = _load_requirement(payload)
+    context.progress(0.1, "Analyzing requirement...")
+    log_msg = VerificationEngine(api_key)._analyze_requirement(req)
+    return {"message": log_msg}
+
+def run_generate(payload: Dict[str, Any], api_key: Optional[str], context: JobContext) -> Dict[str, Any]:
+    """Generate pytest code for a requirement."""
+    from core.verification_engine import VerificationEngine
+
+    req = _load_requirement(payload)
+    context.progress(0.1, "Generating test code...")
+    code = VerificationEngine(api_key).generate_test_code(req['Requirement'])
+    context.check_cancelled()
+    update_generated_code(req['ID'], code)
+    return {"code": code}
+
+def run_execute(payload: Dict[str, Any], api_key: Optional[str], context: JobContext) -> Dict[str, Any]:
+    """Run a requirement's test code and, on failure, ask the model why."""
+    from core.verification_engine import VerificationEngine
+
+    req = _load_requirement(payload)
+    code = payload.get('code') or req['Generated Code']
+    if not code:
+        raise ValueError(f"Requirement {req['ID']} has no test code to execute")
+
+    context.progress(0.1, "Running pytest...")
+    engine = VerificationEngine(api_key or "DUMMY_KEY_NOT_USED_FOR_EXEC")
+    result = engine.execute_test_code(code)
+    context.check_cancelled()
+
+    if result['status'] == 'Fail' and api_key:
+        context.progress(0.7, "Analyzing failure...")
+        try:
+            analysis = engine.analyze_failure(req['Requirement'], code, result['log'])
+            result['log'] += f"\n\n--- AI FAILURE ANALYSIS ---\n{analysis}"
+        except Exception as e:
+            log_event(f"Failed to generate analysis for {req['ID']}: {e}", level="WARN")
+
+    update_execution_result(req['ID'], result['status'], result['log'])
+    return result
+
+JOB_HANDLERS = {
+    "ingest": run_ingest,
+    "analyze": run_analyze,
+    "generate": run_generate,
+    "execute": run_execute,
+}
@@ -0,0 +1,648 @@
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from core import db
+from core.metrics import JOB_SECONDS, REGISTRY, Gauge
+from core.tracing import start_span
+
+# A job's lease is renewed by its worker while the handler runs; if the worker dies the
+# lease runs out and another worker picks the job up again (up to max_attempts).
+LEASE_SECONDS = 60.0
+POLL_INTERVAL = 0.5
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+# Scheduling: the interactive lane (single-requirement requests) is served before the bulk
+# lane (ingestion, batch runs). Within a lane, flows (one per API key and project) share
+# workers by weighted fair queuing; within a flow, jobs run by requirement priority.
+LANES = ("interactive", "bulk")
+BULK_KINDS = {"ingest"}
+PRIORITY_RANK = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+# Bulk work that has waited this long is served first, so interactive traffic can't starve it
+BULK_MAX_WAIT = float(os.environ.get("ASV_BULK_MAX_WAIT", "30"))
+
+# API keys wait in jobs.secret only while their job is queued or running, and only encrypted.
+# The key comes from ASV_JOB_SECRET_KEY or, if unset, from job_secret.key next to the
+# database (created with mode 0600 on first use), so queued jobs survive a restart and
+# workers on the same host share it. The database file alone holds no usable API keys;
+# keep the key file out of backups or set the environment variable instead.
+SECRET_KEY_ENV = "ASV_JOB_SECRET_KEY"
+SECRET_KEY_FILE = "job_secret.key"
+_secret_key: Optional[tuple] = None  # (key file path it belongs to, key)
+_secret_key_lock = threading.Lock()
+
+# handler(payload, api_key, context) -> JSON-serialisable result
+JobHandler = Callable[[Dict[str, Any], Optional[str], "JobContext"], Dict[str, Any]]
+
+class JobCancelled(Exception):
+    """Raised inside a handler once its job has been cancelled (or its lease was lost)."""
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(db.DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _job_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job.pop('secret', None)  # API keys never leave the queue
+    job['payload'] = json.loads(job['payload'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    job['cancel_requested'] = bool(job['cancel_requested'])
+    return job
+
+def secret_key_path() -> str:
+    return os.path.join(os.path.dirname(db.DB_PATH), SECRET_KEY_FILE)
+
+def _load_or_create_key(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    from cryptography.fernet import Fernet
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(Fernet.generate_key())
+    try:
+        # link() fails if another process published its key first; then use that one
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp)
+    with open(path, "rb") as f:
+        return f.read().strip()
+
+def secret_key() -> bytes:
+    """The Fernet key sealing job secrets: ASV_JOB_SECRET_KEY, else the key file next to the database."""
+    global _secret_key
+    path = secret_key_path()
+    cached = _secret_key
+    if cached is not None and cached[0] == path:
+        return cached[1]
+    with _secret_key_lock:
+        if _secret_key is None or _secret_key[0] != path:
+            configured = os.environ.get(SECRET_KEY_ENV)
+            _secret_key = (path, configured.encode("ascii") if configured else _load_or_create_key(path))
+        return _secret_key[1]
+
+def set_secret_key(key: bytes):
+    """Use `key` to seal and unseal job secrets for the current database (worker processes adopt their pool's key)."""
+    global _secret_key
+    with _secret_key_lock:
+        _secret_key = (secret_key_path(), key)
+
+def _seal(secret: Optional[str]) -> Optional[str]:
+    if secret is None:
+        return None
+    from cryptography.fernet import Fernet
+    return Fernet(secret_key()).encrypt(secret.encode("utf-8")).decode("ascii")
+
+def _unseal(token: str) -> Optional[str]:
+    """The secret sealed in `token`, or None if it was sealed under another key."""
+    from cryptography.fernet import Fernet, InvalidToken
+    try:
+        return Fernet(secret_key()).decrypt(token.encode("ascii")).decode("utf-8")
+    except InvalidToken:
+        return None
+
+def flow_key(api_key: Optional[str], project: Optional[str]) -> str:
+    """Fairness flow of a job: the (hashed) API key that submitted it and the project it targets."""
+    owner = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16] if api_key else "anonymous"
+    return f"{owner}:{project or ''}"
+
+def enqueue_job(kind: str, payload: Dict[str, Any], secret: Optional[str] = None, max_attempts: int = 3,
+                lane: Optional[str] = None, project: Optional[str] = None, priority: Optional[str] = None) -> str:
+    """
+    Adds a job to the queue.
+
+    Args:
+        kind (str): Handler name (see core.job_handlers.JOB_HANDLERS).
+        payload (Dict[str, Any]): JSON-serialisable handler arguments.
+        secret (Optional[str]): API key for the handler. Stored apart from the payload, encrypted with
+            secret_key(), and erased when the job ends. Workers need the same key.
+        max_attempts (int): How many times the job may be leased before it is given up.
+        lane (Optional[str]): 'interactive' or 'bulk'. Defaults by kind (ingestion is bulk).
+        project (Optional[str]): Source file the job works on; part of its fairness flow.
+        priority (Optional[str]): Requirement priority (Critical/High/Medium/Low) used within the flow.
+
+    Returns:
+        str: The new job ID.
+    """
+    if lane is None:
+        lane = "bulk" if kind in BULK_KINDS else "interactive"
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane: {lane}")
+    flow = flow_key(secret, project)
+
+    job_id = uuid.uuid4().hex
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute('INSERT OR IGNORE INTO scheduler_flows (lane, flow) VALUES (?, ?)', (lane, flow))
+    # A flow that becomes backlogged starts at the lane's current virtual time, so idle
+    # flows don't bank credit and new flows don't wait behind existing ones
+    conn.execute('''
+        UPDATE scheduler_flows
+        SET vfinish = MAX(vfinish, COALESCE((SELECT vtime FROM scheduler_lanes WHERE lane = ?), 0))
+        WHERE lane = ? AND flow = ?
+          AND NOT EXISTS (SELECT 1 FROM jobs WHERE status = 'queued' AND lane = ? AND flow = ?)
+    ''', (lane, lane, flow, lane, flow))
+    conn.execute('''
+        INSERT INTO jobs (id, kind, payload, secret, status, max_attempts, lane, flow, priority_rank, created_at)
+        VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?)
+    ''', (job_id, kind, json.dumps(payload), _seal(secret), max_attempts, lane, flow,
+          PRIORITY_RANK.get(priority, PRIORITY_RANK["Medium"]), time.time()))
+    conn.commit()
+    conn.close()
+    return job_id
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Retrieve a job's status, progress and result (without its secret)."""
+    conn = _connect()
+    row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    conn.close()
+    return _job_dict(row) if row else None
+
+def cancel_job(job_id: str) -> Optional[str]:
+    """
+    Cancels a job. Queued jobs are cancelled at once; running jobs are flagged and stop at
+    their next progress report or heartbeat.
+
+    Returns:
+        Optional[str]: The job's status after the request, or None if the job does not exist.
+    """
+    now = time.time()
+    conn = _connect()
+    conn.execute('''
+        UPDATE jobs SET status = 'cancelled', finished_at = ?, secret = NULL
+        WHERE id = ? AND status = 'queued'
+    ''', (now, job_id))
+    conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+    row = conn.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    conn.commit()
+    conn.close()
+    return row['status'] if row else None
+
+def set_flow_weight(flow: str, weight: float):
+    """Give a flow (see flow_key) a larger or smaller share of the workers. Defaults to 1.0."""
+    conn = _connect()
+    for lane in LANES:
+        conn.execute('''
+            INSERT INTO scheduler_flows (lane, flow, weight) VALUES (?, ?, ?)
+            ON CONFLICT(lane, flow) DO UPDATE SET weight = excluded.weight
+        ''', (lane, flow, weight))
+    conn.commit()
+    conn.close()
+
+def _schedule(conn: sqlite3.Connection, now: float) -> Optional[sqlite3.Row]:
+    """Pick the next queued job. Must run inside the claiming transaction."""
+    lanes = list(LANES)
+    starving = conn.execute(
+        "SELECT 1 FROM jobs WHERE status = 'queued' AND lane = 'bulk' AND created_at < ? LIMIT 1",
+        (now - BULK_MAX_WAIT,)
+    ).fetchone()
+    if starving:
+        lanes.reverse()
+
+    for lane in lanes:
+        row = _schedule_lane(conn, lane)
+        if row is not None:
+            return row
+    return None
+
+def _schedule_lane(conn: sqlite3.Connection, lane: str) -> Optional[sqlite3.Row]:
+    """
+    Weighted fair queuing across the lane's backlogged flows: each flow's next job gets the
+    virtual finish tag (flow finish + 1 / weight) and the smallest tag wins, oldest backlog
+    first on ties. The flow's best-priority job is then dispatched and the flow and lane
+    clocks advance to its tag.
+    """
+    lane_row = conn.execute('SELECT vtime FROM scheduler_lanes WHERE lane = ?', (lane,)).fetchone()
+    vtime = lane_row['vtime'] if lane_row else 0.0
+
+    flow = conn.execute('''
+        SELECT b.flow, COALESCE(f.vfinish, ?) + 1.0 / COALESCE(f.weight, 1.0) AS tag
+        FROM (
+            SELECT flow, MIN(priority_rank) AS best_rank, MIN(created_at) AS oldest
+            FROM jobs WHERE status = 'queued' AND lane = ?
+            GROUP BY flow
+        ) b
+        LEFT JOIN scheduler_flows f ON f.lane = ? AND f.flow = b.flow
+        ORDER BY tag, b.best_rank, b.oldest
+        LIMIT 1
+    ''', (vtime, lane, lane)).fetchone()
+    if flow is None:
+        return None
+
+    conn.execute('''
+        INSERT INTO scheduler_flows (lane, flow, vfinish) VALUES (?, ?, ?)
+        ON CONFLICT(lane, flow) DO UPDATE SET vfinish = excluded.vfinish
+    ''', (lane, flow['flow'], flow['tag']))
+    conn.execute('''
+        INSERT INTO scheduler_lanes (lane, vtime) VALUES (?, ?)
+        ON CONFLICT(lane) DO UPDATE SET vtime = excluded.vtime
+    ''', (lane, flow['tag']))
+
+    return conn.execute('''
+        SELECT id FROM jobs
+        WHERE status = 'queued' AND lane = ? AND flow = ?
+        ORDER BY priority_rank, created_at
+        LIMIT 1
+    ''', (lane, flow['flow'])).fetchone()
+
+def get_queue_metrics(window_seconds: float = 900.0) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-lane queue depth and wait times.
+
+    Args:
+        window_seconds (float): Wait-time statistics cover jobs started within this window.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: For each lane: queued, running, backlogged flows, the age of
+        the oldest queued job, and mean / p50 / p95 / max wait (seconds from enqueue to first start).
+    """
+    now = time.time()
+    conn = _connect()
+    metrics = {}
+    for lane in LANES:
+        depth = conn.execute('''
+            SELECT COUNT(*) AS queued, COUNT(DISTINCT flow) AS flows, MIN(created_at) AS oldest
+            FROM jobs WHERE status = 'queued' AND lane = ?
+        ''', (lane,)).fetchone()
+        running = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'running' AND lane = ?", (lane,)
+        ).fetchone()[0]
+        waits = sorted(row[0] for row in conn.execute(
+            'SELECT started_at - created_at FROM jobs WHERE lane = ? AND started_at >= ?',
+            (lane, now - window_seconds)
+        ))
+        metrics[lane] = {
+            "queued": depth['queued'],
+            "running": running,
+            "flows": depth['flows'],
+            "oldest_wait": now - depth['oldest'] if depth['oldest'] is not None else 0.0,
+            "started": len(waits),
+            "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p50": waits[int(0.50 * (len(waits) - 1))] if waits else 0.0,
+            "wait_p95": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+        }
+    conn.close()
+    return metrics
+
+def _queue_depths() -> Dict[tuple, int]:
+    depths = {(lane, status): 0 for lane in LANES for status in ("queued", "running")}
+    conn = _connect()
+    for row in conn.execute('''
+        SELECT lane, status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY lane, status
+    '''):
+        depths[(row[0], row[1])] = row[2]
+    conn.close()
+    return depths
+
+JOB_QUEUE_DEPTH = Gauge(
+    "asv_job_queue_depth", "Jobs waiting or running, by lane.", ("lane", "status"), callback=_queue_depths
+)
+
+def claim_job(worker_id: str, lease_seconds: float = LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+    """
+    Atomically leases the next runnable job to `worker_id`.
+
+    Jobs whose lease expired (their worker crashed) are recovered first, then queued jobs are
+    picked by lane, fair share and priority (see _schedule). The returned dict includes the
+    job's secret, decrypted; `secret_lost` is set if it was sealed under another key (the
+    key file was deleted or ASV_JOB_SECRET_KEY changed).
+    """
+    now = time.time()
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Expired leases that can't be retried are closed out instead of re-leased
+        conn.execute('''
+            UPDATE jobs
+            SET status = CASE WHEN cancel_requested THEN 'cancelled' ELSE 'failed' END,
+                error = CASE WHEN cancel_requested THEN error ELSE 'Worker lost after ' || attempts || ' attempt(s).' END,
+                finished_at = ?, secret = NULL, lease_owner = NULL, lease_expires = NULL
+            WHERE status = 'running' AND lease_expires < ? AND (cancel_requested OR attempts >= max_attempts)
+        ''', (now, now))
+
+        row = conn.execute('''
+            SELECT id FROM jobs WHERE status = 'running' AND lease_expires < ?
+            ORDER BY lease_expires LIMIT 1
+        ''', (now,)).fetchone()
+        if row is None:
+            row = _schedule(conn, now)
+
+        job = None
+        if row is not None:
+            job = conn.execute('''
+                UPDATE jobs
+                SET status = 'running', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, started_at = COALESCE(started_at, ?)
+                WHERE id = ?
+                RETURNING *
+            ''', (worker_id, now + lease_seconds, now, row['id'])).fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    if job is None:
+        return None
+    claimed = _job_dict(job)
+    claimed['secret'] = _unseal(job['secret']) if job['secret'] is not None else None
+    claimed['secret_lost'] = job['secret'] is not None and claimed['secret'] is None
+    return claimed
+
+def heartbeat(job_id: str, worker_id: str, progress: Optional[float] = None, message: Optional[str] = None,
+              lease_seconds: float = LEASE_SECONDS) -> bool:
+    """
+    Renews a job's lease and records progress.
+
+    Returns:
+        bool: True if the worker should stop (cancellation requested or lease lost).
+    """
+    conn = _connect()
+    row = conn.execute('''
+        UPDATE jobs
+        SET lease_expires = ?, progress = COALESCE(?, progress), message = COALESCE(?, message)
+        WHERE id = ? AND lease_owner = ? AND status = 'running'
+        RETURNING cancel_requested
+    ''', (time.time() + lease_seconds, progress, message, job_id, worker_id)).fetchone()
+    conn.commit()
+    conn.close()
+    return row is None or bool(row['cancel_requested'])
+
+def finish_job(job_id: str, worker_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None):
+    """Records a job's final state. Ignored if the worker no longer holds the lease."""
+    conn = _connect()
+    conn.execute('''
+        UPDATE jobs
+        SET status = ?, result = ?, error = ?,
+            progress = CASE WHEN ? = 'succeeded' THEN 1.0 ELSE progress END,
+            finished_at = ?, secret = NULL, lease_owner = NULL, lease_expires = NULL
+        WHERE id = ? AND lease_owner = ?
+    ''', (status, json.dumps(result) if result is not None else None, error, status, time.time(), job_id, worker_id))
+    conn.commit()
+    conn.close()
+
+class JobContext:
+    """Handed to job handlers: reports progress and surfaces cancellation."""
+
+    def __init__(self, job_id: str, worker_id: str, lease_seconds: float = LEASE_SECONDS):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.cancelled = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def progress(self, fraction: float, message: str = None):
+        """Record progress (0.0 to 1.0). Raises JobCancelled if the job should stop."""
+        if heartbeat(self.job_id, self.worker_id, fraction, message, self.lease_seconds):
+            self.cancelled = True
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.job_id)
+
+    def start_heartbeat(self):
+        """Keep the lease alive while a handler blocks (LLM calls, pytest runs)."""
+        self._thread = threading.Thread(target=self._beat, name=f"heartbeat-{self.job_id}", daemon=True)
+        self._thread.start()
+
+    def _beat(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if heartbeat(self.job_id, self.worker_id, lease_seconds=self.lease_seconds):
+                    self.cancelled = True
+            except sqlite3.Error as e:
+                print(f"Heartbeat failed for job {self.job_id}: {e}")
+
+    def stop_heartbeat(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+def process_next_job(worker_id: str, handlers: Optional[Dict[str, JobHandler]] = None,
+                     lease_seconds: float = LEASE_SECONDS) -> bool:
+    """
+    Claims and runs a single job.
+
+    Returns:
+        bool: True if a job was processed, False if the queue was empty.
+    """
+    if handlers is None:
+        from core.job_handlers import JOB_HANDLERS as handlers
+
+    job = claim_job(worker_id, lease_seconds)
+    if job is None:
+        return False
+
+    handler = handlers.get(job['kind'])
+    if handler is None:
+        finish_job(job['id'], worker_id, "failed", error=f"Unknown job kind: {job['kind']}")
+        return True
+    if job['secret_lost']:
+        finish_job(job['id'], worker_id, "failed",
+                   error="The job's API key was encrypted with a different job secret key; resubmit the job.")
+        return True
+
+    context = JobContext(job['id'], worker_id, lease_seconds)
+    context.start_heartbeat()
+    start = time.perf_counter()
+    status = "failed"
+    # The job ID doubles as the trace ID: `python -m core.tracing <job_id>` shows its timeline
+    span_attributes = {"job.id": job['id'], "job.kind": job['kind'], "job.attempt": job['attempts'], "job.lane": job['lane']}
+    try:
+        with start_span(f"job.{job['kind']}", span_attributes, trace_id=job['id']):
+            result = handler(job['payload'], job['secret'], context)
+            context.check_cancelled()
+        status = "succeeded"
+        finish_job(job['id'], worker_id, status, result=result)
+    except JobCancelled:
+        status = "cancelled"
+        finish_job(job['id'], worker_id, status)
+    except Exception as e:
+        db.log_event(f"Job {job['id']} ({job['kind']}) failed: {e}", level="ERROR")
+        finish_job(job['id'], worker_id, "failed", error=str(e))
+    finally:
+        context.stop_heartbeat()
+        JOB_SECONDS.observe(time.perf_counter() - start, kind=job['kind'], status=status)
+    return True
+
+def metrics_dir() -> str:
+    """Where worker processes publish metric snapshots for the API's /metrics to merge."""
+    return os.path.join(os.path.dirname(db.DB_PATH), "metrics")
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(metrics_dir(), f"worker-{pid}.json")
+
+def _remove_snapshot(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Could not remove metrics snapshot {path}: {e}")
+
+def clear_metrics_snapshots():
+    """Remove all worker snapshots, e.g. those left by workers of an earlier server run."""
+    for path in glob.glob(os.path.join(metrics_dir(), "worker-*.json*")):
+        _remove_snapshot(path)
+
+def _publish_metrics(worker_id: str):
+    try:
+        REGISTRY.write_snapshot(_snapshot_path(os.getpid()))
+    except OSError as e:
+        print(f"Worker {worker_id}: could not write metrics snapshot: {e}")
+
+class StopFlag:
+    """
+    Shared stop signal for worker processes: a lock-free byte polled by the workers.
+
+    multiprocessing.Event can't be used: a worker killed while waiting on it (OOM, SIGKILL)
+    stays counted as a sleeper, and the next set() blocks forever waiting for it to wake.
+    """
+
+    def __init__(self, mp_context):
+        self._value = mp_context.RawValue('b', 0)
+
+    def set(self):
+        self._value.value = 1
+
+    def is_set(self) -> bool:
+        return bool(self._value.value)
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self._value.value:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(remaining, 0.05))
+        return True
+
+def worker_main(db_path: str, worker_name: str, stop_event, poll_interval: float = POLL_INTERVAL,
+                key: Optional[bytes] = None):
+    """Entry point of a worker process: process jobs until `stop_event` is set."""
+    db.DB_PATH = db_path
+    if key is not None:
+        set_secret_key(key)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{worker_name}"
+
+    while not stop_event.is_set():
+        try:
+            worked = process_next_job(worker_id)
+        except sqlite3.OperationalError as e:
+            # e.g. database locked for longer than the connect timeout; retry on next poll
+            print(f"Worker {worker_id}: {e}")
+            worked = False
+        if worked:
+            _publish_metrics(worker_id)
+        else:
+            stop_event.wait(poll_interval)
+
+    db.get_log_sink().close()
+    _publish_metrics(worker_id)
+
+class WorkerPool:
+    """A set of worker processes draining the job queue."""
+
+    def __init__(self, workers: int = 2, poll_interval: float = POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        # spawn: never fork a process that already runs threads (uvicorn, log sink)
+        self._mp = multiprocessing.get_context("spawn")
+        self._stop_event = StopFlag(self._mp)
+        self._processes: List[multiprocessing.Process] = []
+        self._started = 0
+
+    def start(self):
+        for _ in range(self.workers):
+            self._start_worker()
+
+    def _start_worker(self):
+        n = self._started
+        self._started += 1
+        process = self._mp.Process(
+            target=worker_main,
+            # Workers adopt the pool's secret key whatever their own environment says
+            args=(db.DB_PATH, f"w{n}", self._stop_event, self.poll_interval, secret_key()),
+            name=f"asv-worker-{n}",
+            daemon=True
+        )
+        process.start()
+        self._processes.append(process)
+
+    def maintain(self) -> int:
+        """
+        Reap exited workers and start replacements, so a crashed or OOM-killed worker doesn't
+        leave the queue short-handed (or stalled). Call periodically.
+
+        Returns:
+            int: How many workers were restarted.
+        """
+        self.reap()
+        if self._stop_event.is_set():
+            return 0
+        missing = self.workers - len(self._processes)
+        if missing > 0:
+            db.log_event(f"Restarting {missing} job worker(s) that exited unexpectedly", level="WARN")
+            for _ in range(missing):
+                self._start_worker()
+        return max(missing, 0)
+
+    def stop(self, timeout: float = 10.0):
+        """Ask workers to finish their current job and exit. Stragglers are terminated;
+        their jobs are re-leased once the lease expires."""
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.reap()
+
+    def reap(self):
+        """Forget workers that have exited and remove their metric snapshots, so /metrics stops
+        adding them in (their counters leave the totals, which Prometheus reads as a reset)."""
+        alive = []
+        for process in self._processes:
+            if process.is_alive():
+                alive.append(process)
+            else:
+                _remove_snapshot(_snapshot_path(process.pid))
+        self._processes = alive
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run job queue workers outside the API process.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    db.init_db()
+    pool = WorkerPool(args.workers)
+    pool.start()
+    print(f"Started {args.workers} workers on {db.DB_PATH}. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+            pool.maintain()
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,180 @@
+import asyncio
+import collections
+import hashlib
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+
+DEFAULT_MODEL = 'gemini-2.5-flash'
+POOL_SIZE = int(os.environ.get("ASV_LLM_CLIENT_POOL_SIZE", "32"))
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Pool key for an API key. Raw keys are never used as dictionary keys or logged."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+
+def _create_client(api_key: Optional[str]) -> glm.GenerativeServiceClient:
+    # Same fallback as genai.configure() when no key is given
+    api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    return glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+def _create_async_client(api_key: Optional[str]) -> glm.GenerativeServiceAsyncClient:
+    api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    return glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+
+# GenerativeModel has no public way to take a client: get_model() sets these attributes,
+# which the model otherwise fills from genai.configure() on first use. requirements.txt pins
+# the SDK release they were checked against.
+_MODEL_CLIENT_ATTRIBUTES = ("_client", "_async_client")
+
+class _LoopAsyncClient:
+    """
+    Stands in for GenerativeModel._async_client. A grpc-aio client needs the event loop it
+    will run on, which sync code (FastAPI's worker threads, job workers) doesn't have, so the
+    real client is looked up in the pool on first use inside a coroutine.
+    """
+
+    __slots__ = ("_pool", "_api_key")
+
+    def __init__(self, pool: "ClientPool", api_key: Optional[str]):
+        self._pool = pool
+        self._api_key = api_key
+
+    def __getattr__(self, name: str):
+        return getattr(self._pool.get_async_client(self._api_key), name)
+
+class ClientPool:
+    """
+    Bounded LRU of Gemini service clients, one per API key.
+
+    Each client carries its own key in its client options, so models bound to it never read
+    the process-global `genai.configure()` state. Concurrent requests with different keys
+    therefore cannot pick up each other's credentials, and requests with the same key reuse
+    one connection instead of opening a new one.
+    """
+
+    def __init__(self, max_size: int = POOL_SIZE,
+                 factory: Callable[[Optional[str]], Any] = _create_client,
+                 async_factory: Callable[[Optional[str]], Any] = _create_async_client):
+        """
+        Args:
+            max_size (int): Maximum number of cached clients; the least recently used is evicted.
+            factory (Callable[[Optional[str]], Any]): Builds a client for an API key.
+            async_factory (Callable[[Optional[str]], Any]): Builds an asyncio client for an API key.
+        """
+        self.max_size = max_size
+        self.factory = factory
+        self.async_factory = async_factory
+        self._clients: "collections.OrderedDict[str, Any]" = collections.OrderedDict()
+        # Async clients per event loop (a channel can't move between loops), dropped with the loop
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, collections.OrderedDict]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get_client(self, api_key: Optional[str]):
+        """Return the pooled client for `api_key`, creating it on first use."""
+        fingerprint = key_fingerprint(api_key)
+        with self._lock:
+            client = self._clients.get(fingerprint)
+            if client is not None:
+                self._clients.move_to_end(fingerprint)
+                self.hits += 1
+                return client
+
+        # Build outside the lock: client construction can take a few hundred milliseconds
+        client = self.factory(api_key)
+        with self._lock:
+            existing = self._clients.get(fingerprint)
+            if existing is not None:
+                # Another thread won the race; keep a single client per key
+                self._clients.move_to_end(fingerprint)
+                self.hits += 1
+                return existing
+            self.misses += 1
+            self._clients[fingerprint] = client
+            while len(self._clients) > self.max_size:
+                # Not closed explicitly: a request may still be using it. Its channel is
+                # released when the last model referencing it goes away.
+                self._clients.popitem(last=False)
+                self.evictions += 1
+        return client
+
+    def get_async_client(self, api_key: Optional[str]):
+        """
+        Return the pooled asyncio client for `api_key` on the running event loop.
+
+        Raises:
+            RuntimeError: If no event loop is running in this thread.
+        """
+        loop = asyncio.get_running_loop()
+        fingerprint = key_fingerprint(api_key)
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, collections.OrderedDict())
+            client = clients.get(fingerprint)
+            if client is not None:
+                clients.move_to_end(fingerprint)
+                return client
+
+        # Only this loop's thread reaches here for `loop`, so no other thread can add the key meanwhile
+        client = self.async_factory(api_key)
+        with self._lock:
+            clients[fingerprint] = client
+            while len(clients) > self.max_size:
+                clients.popitem(last=False)
+        return client
+
+    def get_model(self, api_key: Optional[str], model_name: str = DEFAULT_MODEL, **kwargs) -> genai.GenerativeModel:
+        """
+        Build a GenerativeModel bound to the pooled client for `api_key`.
+
+        Args:
+            api_key (Optional[str]): The Google API key of the caller.
+            model_name (str): Gemini model to use.
+            **kwargs: Passed to genai.GenerativeModel (generation_config, ...).
+
+        Returns:
+            genai.GenerativeModel: A model that sends requests with `api_key` only.
+
+        Raises:
+            RuntimeError: If the installed SDK no longer has the client attributes set here.
+        """
+        model = genai.GenerativeModel(model_name, **kwargs)
+        missing = [name for name in _MODEL_CLIENT_ATTRIBUTES if not hasattr(model, name)]
+        if missing:
+            raise RuntimeError(
+                f"google-generativeai {genai.__version__} has no GenerativeModel.{', '.join(missing)}; "
+                "per-key clients can't be bound. Install the version pinned in requirements.txt."
+            )
+        model._client = self.get_client(api_key)
+        # Resolved per event loop on first async call; nothing is opened here
+        model._async_client = _LoopAsyncClient(self, api_key)
+        return model
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._clients), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+_pool: Optional[ClientPool] = None
+_pool_lock = threading.Lock()
+
+def get_client_pool() -> ClientPool:
+    """Process-wide client pool (each worker process has its own)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ClientPool()
+    return _pool
+
+def get_model(api_key: Optional[str], model_name: str = DEFAULT_MODEL, **kwargs) -> genai.GenerativeModel:
+    """Shortcut for get_client_pool().get_model(...)."""
+    return get_client_pool().get_model(api_key, model_name, **kwargs)
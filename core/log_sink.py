@@ -0,0 +1,215 @@
+import atexit
+import collections
+import itertools
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.metrics import DB_WRITE_SECONDS
+
+# Lower number = dropped first under backpressure
+LEVEL_PRIORITY = {
+    "DEBUG": 0,
+    "INFO": 1,
+    "WARN": 2,
+    "WARNING": 2,
+    "ERROR": 3,
+    "CRITICAL": 4,
+}
+
+class LogSink:
+    """
+    Buffered, asynchronous writer for the `system_logs` table.
+
+    Entries are kept in memory (one FIFO per priority) and written in a single
+    transaction by a background thread once `flush_size` entries are pending or
+    `flush_interval` seconds have passed. When the buffer reaches `max_buffer`
+    the oldest entry of the lowest priority is dropped, so ERRORs survive a
+    flood of INFO lines. Retention is enforced after flushes with range deletes
+    on the rowid, which never scan the table.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        flush_size: int = 100,
+        flush_interval: float = 1.0,
+        max_buffer: int = 5000,
+        max_rows: Optional[int] = 50000,
+        max_age_days: Optional[float] = 30,
+        retention_interval: float = 60.0,
+    ):
+        """
+        Args:
+            connect (Callable[[], sqlite3.Connection]): Factory returning a new connection to the log database.
+            flush_size (int): Number of pending entries that triggers an early flush.
+            flush_interval (float): Maximum seconds an entry waits in memory before being written.
+            max_buffer (int): Hard cap on pending entries; beyond it low-priority entries are dropped.
+            max_rows (Optional[int]): Keep at most this many rows in `system_logs` (None disables).
+            max_age_days (Optional[float]): Delete rows older than this many days (None disables).
+            retention_interval (float): Minimum seconds between two retention passes.
+        """
+        self.connect = connect
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self.retention_interval = retention_interval
+
+        self._buffers: Dict[int, collections.deque] = collections.defaultdict(collections.deque)
+        self._pending = 0
+        self._dropped: Dict[str, int] = collections.Counter()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._last_retention = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of entries waiting to be written."""
+        return self._pending
+
+    @property
+    def dropped(self) -> Dict[str, int]:
+        """Entries dropped under backpressure since the last flush, by level."""
+        return dict(self._dropped)
+
+    def emit(self, message: str, level: str = "INFO", timestamp: Optional[str] = None):
+        """Queue a log entry. Never touches the database on the caller's thread."""
+        if timestamp is None:
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+        priority = LEVEL_PRIORITY.get(level.upper(), LEVEL_PRIORITY["INFO"])
+
+        with self._lock:
+            if self._pending >= self.max_buffer and not self._make_room(priority, level):
+                return
+            self._buffers[priority].append((next(self._seq), timestamp, level, message))
+            self._pending += 1
+            should_wake = self._pending >= self.flush_size
+
+        if self._stopped:
+            # Late messages (e.g. from atexit handlers) are written synchronously
+            self.flush()
+            return
+        self._ensure_thread()
+        if should_wake:
+            self._wakeup.set()
+
+    def _make_room(self, priority: int, level: str) -> bool:
+        """Drop the oldest lowest-priority entry. Returns False if the new entry is the one to drop."""
+        lowest = min(p for p, buf in self._buffers.items() if buf)
+        if priority < lowest:
+            self._dropped[level] += 1
+            return False
+        victim = self._buffers[lowest].popleft()
+        self._dropped[victim[2]] += 1
+        self._pending -= 1
+        return True
+
+    def _drain(self) -> Tuple[List[Tuple[int, str, str, str]], Dict[str, int]]:
+        with self._lock:
+            entries = []
+            for buf in self._buffers.values():
+                entries.extend(buf)
+                buf.clear()
+            self._pending = 0
+            dropped = dict(self._dropped)
+            self._dropped.clear()
+
+        entries.sort()  # Restore emission order across priority buffers
+        return entries, dropped
+
+    def _requeue(self, entries: List[Tuple[int, str, str, str]], dropped: Dict[str, int]):
+        """Put a batch that failed to write back in front of newer entries, for the next flush."""
+        with self._lock:
+            self._dropped.update(dropped)
+            # Sequence numbers of the batch predate everything buffered since, so prepending
+            # newest-first keeps each priority buffer in emission order
+            for entry in reversed(entries):
+                priority = LEVEL_PRIORITY.get(entry[2].upper(), LEVEL_PRIORITY["INFO"])
+                self._buffers[priority].appendleft(entry)
+            self._pending += len(entries)
+            while self._pending > self.max_buffer:
+                lowest = min(p for p, buf in self._buffers.items() if buf)
+                victim = self._buffers[lowest].popleft()
+                self._dropped[victim[2]] += 1
+                self._pending -= 1
+
+    def flush(self):
+        """
+        Write all pending entries now and apply retention if it is due. If the write fails
+        (e.g. the database is locked) the entries are kept and retried by the next flush.
+        """
+        with self._write_lock:
+            entries, dropped = self._drain()
+            if not entries and not dropped:
+                return
+            rows = [entry[1:] for entry in entries]
+            if dropped:
+                summary = ", ".join(f"{count} {level}" for level, count in sorted(dropped.items()))
+                timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+                rows.append((timestamp, "WARN", f"Log buffer overflow: dropped {summary} entries."))
+            try:
+                with DB_WRITE_SECONDS.time(operation="log_flush"):
+                    self._write(rows)
+            except sqlite3.Error as e:
+                self._requeue(entries, dropped)
+                print(f"Error flushing {len(rows)} log entries, will retry: {e}")
+
+    def _write(self, rows: List[Tuple[str, str, str]]):
+        conn = self.connect()
+        try:
+            conn.executemany(
+                'INSERT INTO system_logs (timestamp, level, message) VALUES (?, ?, ?)', rows
+            )
+            if time.monotonic() - self._last_retention >= self.retention_interval:
+                self._apply_retention(conn)
+                self._last_retention = time.monotonic()
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _apply_retention(self, conn: sqlite3.Connection):
+        """Trim `system_logs` by row count and age using rowid range deletes."""
+        if self.max_rows is not None:
+            conn.execute(
+                'DELETE FROM system_logs WHERE id <= (SELECT MAX(id) FROM system_logs) - ?',
+                (self.max_rows,)
+            )
+        if self.max_age_days is not None:
+            cutoff = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - self.max_age_days * 86400)
+            )
+            # ids grow with timestamps, so the newest expired id bounds a contiguous range
+            conn.execute(
+                'DELETE FROM system_logs WHERE id <= (SELECT MAX(id) FROM system_logs WHERE timestamp < ?)',
+                (cutoff,)
+            )
+
+    def _ensure_thread(self):
+        if self._thread is not None or self._stopped:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="asv-log-sink", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the background thread and write anything still buffered."""
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
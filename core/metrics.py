@@ -0,0 +1,323 @@
+import bisect
+import contextlib
+import functools
+import glob
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.tracing import Span, start_span
+
+# Seconds; spans fast DB writes up to multi-minute LLM batches
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+class Metric:
+    """Base class: a named family of samples keyed by label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def collect(self) -> Dict[LabelValues, Any]:
+        """Current values, by label values."""
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def _copy(self, value):
+        return value
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def samples(self, key: LabelValues, value) -> Iterator[Tuple[str, List[Tuple[str, str]], float]]:
+        yield self.name, list(zip(self.labelnames, key)), value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(Metric):
+    """
+    A value that can go up and down.
+
+    With a `callback` the gauge is computed at scrape time instead (returning a number, or a
+    dict of label values -> number); such gauges are process-local and never snapshotted.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], Any]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def collect(self) -> Dict[LabelValues, Any]:
+        if self.callback is None:
+            return super().collect()
+        result = self.callback()
+        if not isinstance(result, dict):
+            return {(): float(result)}
+        return {tuple(str(v) for v in key) if isinstance(key, tuple) else (str(key),): float(value)
+                for key, value in result.items()}
+
+class Histogram(Metric):
+    """
+    Distribution of observations over fixed upper bounds. Values are stored as
+    [per-bucket counts (last one is +Inf), sum] and rendered cumulatively.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the duration of the `with` block, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _copy(self, value):
+        return [list(value[0]), value[1]]
+
+    @staticmethod
+    def merge(a, b):
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1]]
+
+    def samples(self, key: LabelValues, value):
+        labels = list(zip(self.labelnames, key))
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), value[0]):
+            cumulative += count
+            yield self.name + "_bucket", labels + [("le", _format_value(bound))], cumulative
+        yield self.name + "_sum", labels, value[1]
+        yield self.name + "_count", labels, cumulative
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Registry:
+    """
+    A set of metrics rendered together in the Prometheus text exposition format.
+
+    Job workers run in separate processes, so each one periodically writes a JSON
+    snapshot of its registry (`write_snapshot`); `render(snapshot_dir=...)` adds those
+    snapshots to the live values of the scraping process.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """JSON-serializable values of every metric except scrape-time gauges."""
+        snapshot = {}
+        for name, metric in list(self._metrics.items()):
+            if isinstance(metric, Gauge) and metric.callback is not None:
+                continue
+            values = metric.collect()
+            if values:
+                snapshot[name] = {json.dumps(list(key)): value for key, value in values.items()}
+        return snapshot
+
+    def write_snapshot(self, path: str):
+        """Atomically replace `path` with this registry's snapshot."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _read_snapshots(self, snapshot_dir: str) -> List[Dict[str, Dict[str, Any]]]:
+        snapshots = []
+        for path in sorted(glob.glob(os.path.join(snapshot_dir, "*.json"))):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # being replaced or truncated; picked up on the next scrape
+        return snapshots
+
+    def render(self, snapshot_dir: Optional[str] = None) -> str:
+        """
+        Render all metrics.
+
+        Args:
+            snapshot_dir (Optional[str]): Directory of other processes' snapshots to merge in.
+
+        Returns:
+            str: The exposition text (`CONTENT_TYPE`).
+        """
+        snapshots = self._read_snapshots(snapshot_dir) if snapshot_dir and os.path.isdir(snapshot_dir) else []
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            values = metric.collect()
+            for snapshot in snapshots:
+                for raw_key, value in snapshot.get(name, {}).items():
+                    key = tuple(json.loads(raw_key))
+                    values[key] = metric.merge(values[key], value) if key in values else value
+            lines.append(f"# HELP {name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key in sorted(values):
+                for sample_name, labels, value in metric.samples(key, values[key]):
+                    label_text = ",".join(f'{label}="{_escape(v)}"' for label, v in labels)
+                    lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}" if label_text
+                                 else f"{sample_name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# --- Application metrics ---
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "asv_http_request_duration_seconds", "API request latency by route template.",
+    ("method", "route", "status")
+)
+LLM_CALLS = Counter(
+    "asv_llm_calls_total", "Gemini calls by call site and outcome (ok/error).", ("site", "outcome")
+)
+LLM_CALL_SECONDS = Histogram(
+    "asv_llm_call_duration_seconds", "Gemini call latency by call site.", ("site",)
+)
+LLM_TOKENS = Counter(
+    "asv_llm_tokens_total", "Tokens reported in Gemini usage metadata, by call site and kind (prompt/output).",
+    ("site", "kind")
+)
+RETRIES = Counter("asv_retries_total", "Retried operations by call site.", ("site",))
+ERRORS = Counter("asv_errors_total", "Failed operations by call site (after any retries).", ("site",))
+PYTEST_SECONDS = Histogram(
+    "asv_pytest_duration_seconds", "Wall time of generated-test pytest runs, by result.", ("status",)
+)
+DB_WRITE_SECONDS = Histogram(
+    "asv_db_write_duration_seconds", "SQLite write latency by operation.", ("operation",), buckets=DB_BUCKETS
+)
+JOB_SECONDS = Histogram(
+    "asv_job_duration_seconds", "Background job run time by kind and final status.", ("kind", "status")
+)
+
+class LLMCall:
+    """Handle yielded by `llm_call`; pass the model response to `record` to count its tokens."""
+
+    def __init__(self, site: str, span: Optional[Span] = None):
+        self.site = site
+        self.span = span
+
+    def record(self, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        for kind, field in (("prompt", "prompt_token_count"), ("output", "candidates_token_count")):
+            count = getattr(usage, field, None)
+            if count:
+                LLM_TOKENS.inc(count, site=self.site, kind=kind)
+                if self.span is not None:
+                    self.span.set_attribute(f"llm.{kind}_tokens", count)
+
+@contextlib.contextmanager
+def llm_call(site: str) -> Iterator[LLMCall]:
+    """
+    Count and time one model call, traced as an "llm.<site>" span. Exceptions propagate and
+    are recorded as outcome="error".
+
+    Example:
+        with llm_call("generate_test_code") as call:
+            response = model.generate_content(prompt)
+            call.record(response)
+    """
+    outcome = "error"
+    start = time.perf_counter()
+    try:
+        with start_span(f"llm.{site}", {"llm.site": site}) as span:
+            yield LLMCall(site, span)
+        outcome = "ok"
+    finally:
+        LLM_CALL_SECONDS.observe(time.perf_counter() - start, site=site)
+        LLM_CALLS.inc(site=site, outcome=outcome)
+
+def timed_write(operation: str):
+    """Decorator recording a function's duration in `asv_db_write_duration_seconds`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with DB_WRITE_SECONDS.time(operation=operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,473 @@
+import sqlite3
+from typing import Callable, List
+from core.artifacts import ARTIFACTS_SCHEMA, put_artifact
+
+# Schema migrations, applied in order. The schema version is the number of migrations
+# applied and is stored in PRAGMA user_version, so an up-to-date database costs one
+# integer read at startup. Append new migrations; never edit or reorder released ones.
+# Databases created before versioning report version 0, so the early steps are idempotent.
+
+def create_base_schema(cursor: sqlite3.Cursor):
+    """Core tables: requirements, artifacts, system_logs and projects."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS requirements (
+            id TEXT PRIMARY KEY,
+            req_id TEXT,
+            req_name TEXT, 
+            text TEXT,
+            section TEXT,
+            source_file TEXT,
+            status TEXT,
+            priority TEXT,
+            source_type TEXT,
+            verification_method TEXT,
+            rationale TEXT,
+            generated_code_ref TEXT,
+            verification_status TEXT,
+            execution_log_ref TEXT,
+            last_run_timestamp DATETIME,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Databases created by older releases may lack newer columns
+    cursor.execute("PRAGMA table_info(requirements)")
+    columns = [info[1] for info in cursor.fetchall()]
+    for col in ("verification_method", "rationale", "verification_status", "generated_code_ref", "execution_log_ref"):
+        if col not in columns:
+            cursor.execute(f"ALTER TABLE requirements ADD COLUMN {col} TEXT")
+            print(f"Migrated: Added column '{col}' to requirements table.")
+
+    # Large text artifacts (generated code, execution logs) live compressed in a side table
+    cursor.execute(ARTIFACTS_SCHEMA)
+    migrate_inline_artifacts(cursor, columns)
+
+    # Added system_logs table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS system_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            level TEXT,
+            message TEXT
+        )
+    ''')
+    # Used by age-based retention (same name SQLAlchemy gives the ORM index)
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_system_logs_timestamp ON system_logs (timestamp)')
+    
+    # Added projects table for metadata
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS projects (
+            filename TEXT PRIMARY KEY,
+            title TEXT,
+            req_count INTEGER,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def migrate_inline_artifacts(cursor: sqlite3.Cursor, columns: List[str]):
+    """Move legacy inline generated_code/execution_log columns into the artifacts table."""
+    for inline_col, ref_col in (("generated_code", "generated_code_ref"), ("execution_log", "execution_log_ref")):
+        if inline_col not in columns:
+            continue
+            
+        cursor.execute(f"SELECT id, {inline_col} FROM requirements WHERE {inline_col} IS NOT NULL AND {inline_col} != ''")
+        rows = cursor.fetchall()
+        for req_id, text in rows:
+            cursor.execute(f"UPDATE requirements SET {ref_col} = ? WHERE id = ?", (put_artifact(cursor, text), req_id))
+            
+        try:
+            cursor.execute(f"ALTER TABLE requirements DROP COLUMN {inline_col}")
+        except sqlite3.OperationalError:
+            # SQLite < 3.35 cannot drop columns; at least release the inline payloads
+            cursor.execute(f"UPDATE requirements SET {inline_col} = NULL")
+        print(f"Migrated: Moved {len(rows)} '{inline_col}' values to artifacts table.")
+
+def create_search_index(cursor: sqlite3.Cursor):
+    """Create the FTS5 index over requirement wording and the triggers that keep it in sync."""
+    # External-content table: the index stores tokens only, text is read back from requirements
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS requirements_fts USING fts5(
+            req_name, text, rationale,
+            content='requirements', content_rowid='rowid',
+            tokenize='porter unicode61'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS requirements_fts_insert AFTER INSERT ON requirements BEGIN
+            INSERT INTO requirements_fts (rowid, req_name, text, rationale)
+            VALUES (new.rowid, new.req_name, new.text, new.rationale);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS requirements_fts_delete AFTER DELETE ON requirements BEGIN
+            INSERT INTO requirements_fts (requirements_fts, rowid, req_name, text, rationale)
+            VALUES ('delete', old.rowid, old.req_name, old.text, old.rationale);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS requirements_fts_update AFTER UPDATE OF req_name, text, rationale ON requirements BEGIN
+            INSERT INTO requirements_fts (requirements_fts, rowid, req_name, text, rationale)
+            VALUES ('delete', old.rowid, old.req_name, old.text, old.rationale);
+            INSERT INTO requirements_fts (rowid, req_name, text, rationale)
+            VALUES (new.rowid, new.req_name, new.text, new.rationale);
+        END
+    ''')
+    
+    # Name matches weigh more than body text, rationale least; ORDER BY rank uses these
+    cursor.execute("INSERT INTO requirements_fts (requirements_fts, rank) VALUES ('rank', 'bm25(4.0, 1.0, 0.5)')")
+    cursor.execute("INSERT INTO requirements_fts (requirements_fts) VALUES ('rebuild')")
+
+# Per-project breakdowns maintained in project_stats (dimension name == requirements column)
+STAT_DIMENSIONS = ("status", "verification_method", "verification_status")
+
+def _project_stats_sql(row: str, delta: str) -> str:
+    """Trigger statements applying one requirement row (`new`/`old`) to the project aggregates."""
+    statements = []
+    if delta == "+":
+        # Projects appear as soon as their first requirement is written
+        statements.append(f'''
+            INSERT INTO projects (filename, title, req_count, last_updated)
+            SELECT {row}.source_file, {row}.source_file, 0, CURRENT_TIMESTAMP
+            WHERE {row}.source_file IS NOT NULL AND {row}.source_file != ''
+            ON CONFLICT (filename) DO NOTHING;
+        ''')
+    statements.append(
+        f"UPDATE projects SET req_count = COALESCE(req_count, 0) {delta} 1 WHERE filename = {row}.source_file;"
+    )
+    for dim in STAT_DIMENSIONS:
+        if delta == "+":
+            statements.append(f'''
+                INSERT INTO project_stats (filename, dimension, value, count)
+                SELECT {row}.source_file, '{dim}', COALESCE({row}.{dim}, ''), 1
+                WHERE {row}.source_file IS NOT NULL AND {row}.source_file != ''
+                ON CONFLICT (filename, dimension, value) DO UPDATE SET count = count + 1;
+            ''')
+        else:
+            statements.append(f'''
+                UPDATE project_stats SET count = count - 1
+                WHERE filename = {row}.source_file AND dimension = '{dim}' AND value = COALESCE({row}.{dim}, '');
+            ''')
+    if delta == "-":
+        statements.append(f"DELETE FROM project_stats WHERE filename = {row}.source_file AND count <= 0;")
+    return "\n".join(statements)
+
+def create_project_aggregates(cursor: sqlite3.Cursor):
+    """
+    Create project_stats and the triggers that keep project totals and breakdowns current.
+
+    Every requirement insert/update/delete adjusts the counters of its project, so reading
+    statistics never scans requirements. Existing data is counted once, here.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS project_stats (
+            filename TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (filename, dimension, value)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_requirements_source_file ON requirements (source_file)')
+    
+    changed = " OR ".join(f"old.{col} IS NOT new.{col}" for col in ("source_file",) + STAT_DIMENSIONS)
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS project_stats_insert AFTER INSERT ON requirements BEGIN
+            {_project_stats_sql("new", "+")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS project_stats_delete AFTER DELETE ON requirements BEGIN
+            {_project_stats_sql("old", "-")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS project_stats_update
+        AFTER UPDATE OF source_file, {", ".join(STAT_DIMENSIONS)} ON requirements
+        WHEN {changed} BEGIN
+            {_project_stats_sql("old", "-")}
+            {_project_stats_sql("new", "+")}
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS project_stats_project_delete AFTER DELETE ON projects BEGIN
+            DELETE FROM project_stats WHERE filename = old.filename;
+        END
+    ''')
+    
+    backfill_project_aggregates(cursor)
+
+def backfill_project_aggregates(cursor: sqlite3.Cursor):
+    """Recount projects and project_stats from requirements."""
+    cursor.execute('''
+        INSERT INTO projects (filename, title, req_count, last_updated)
+        SELECT DISTINCT source_file, source_file, 0, CURRENT_TIMESTAMP
+        FROM requirements
+        WHERE source_file IS NOT NULL AND source_file != ''
+        ON CONFLICT (filename) DO NOTHING
+    ''') # Use filename as title for legacy data
+    cursor.execute('''
+        UPDATE projects SET req_count = (SELECT COUNT(*) FROM requirements WHERE source_file = projects.filename)
+    ''')
+    cursor.execute('DELETE FROM project_stats')
+    for dim in STAT_DIMENSIONS:
+        cursor.execute(f'''
+            INSERT INTO project_stats (filename, dimension, value, count)
+            SELECT source_file, '{dim}', COALESCE({dim}, ''), COUNT(*)
+            FROM requirements
+            WHERE source_file IS NOT NULL AND source_file != ''
+            GROUP BY source_file, COALESCE({dim}, '')
+        ''')
+
+def create_jobs_table(cursor: sqlite3.Cursor):
+    """Durable queue for background ingestion / analysis / execution work (see core.jobs)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            secret TEXT,
+            status TEXT NOT NULL,
+            progress REAL NOT NULL DEFAULT 0,
+            message TEXT,
+            result TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires REAL,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+    ''')
+    # Claiming scans queued jobs in arrival order and running jobs by lease expiry
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_jobs_status_lease ON jobs (status, lease_expires)')
+
+def create_job_scheduling(cursor: sqlite3.Cursor):
+    """Lanes, fairness flows and persisted virtual time for the job scheduler (see core.jobs)."""
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(jobs)').fetchall()]
+    for column, definition in (
+        ('lane', "TEXT NOT NULL DEFAULT 'interactive'"),
+        ('flow', "TEXT NOT NULL DEFAULT ''"),
+        ('priority_rank', 'INTEGER NOT NULL DEFAULT 2'),
+    ):
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE jobs ADD COLUMN {column} {definition}')
+
+    # Virtual finish time of the last job served per flow, and per lane
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduler_flows (
+            lane TEXT NOT NULL,
+            flow TEXT NOT NULL,
+            weight REAL NOT NULL DEFAULT 1.0,
+            vfinish REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (lane, flow)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduler_lanes (
+            lane TEXT PRIMARY KEY,
+            vtime REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('DROP INDEX IF EXISTS ix_jobs_status_created')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS ix_jobs_status_lane_flow ON jobs (status, lane, flow, priority_rank, created_at)'
+    )
+
+def create_change_tracking(cursor: sqlite3.Cursor):
+    """
+    Stamp every requirement write with a global, monotonically increasing change sequence and
+    keep tombstones for deletions, so clients can sync only what changed since a cursor.
+    """
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(requirements)').fetchall()]
+    if 'change_seq' not in columns:
+        cursor.execute('ALTER TABLE requirements ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS requirement_tombstones (
+            id TEXT PRIMARY KEY,
+            source_file TEXT,
+            change_seq INTEGER NOT NULL
+        )
+    ''')
+
+    # Existing rows count as changed once, in insertion order
+    cursor.execute('UPDATE requirements SET change_seq = rowid')
+    cursor.execute('INSERT OR IGNORE INTO change_counter (id, seq) SELECT 1, COALESCE(MAX(change_seq), 0) FROM requirements')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_requirements_change_seq ON requirements (change_seq)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_requirements_source_change ON requirements (source_file, change_seq)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_tombstones_change_seq ON requirement_tombstones (change_seq)')
+
+    bump = "UPDATE change_counter SET seq = seq + 1 WHERE id = 1;"
+    current = "(SELECT seq FROM change_counter WHERE id = 1)"
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS requirements_change_insert AFTER INSERT ON requirements BEGIN
+            {bump}
+            UPDATE requirements SET change_seq = {current} WHERE rowid = new.rowid;
+            DELETE FROM requirement_tombstones WHERE id = new.id;
+        END
+    ''')
+    # The WHEN clause skips the trigger's own change_seq write (even with recursive_triggers on)
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS requirements_change_update AFTER UPDATE ON requirements
+        WHEN new.change_seq IS old.change_seq BEGIN
+            {bump}
+            UPDATE requirements SET change_seq = {current} WHERE rowid = new.rowid;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS requirements_change_delete AFTER DELETE ON requirements BEGIN
+            {bump}
+            INSERT OR REPLACE INTO requirement_tombstones (id, source_file, change_seq)
+            VALUES (old.id, old.source_file, {current});
+        END
+    ''')
+
+def create_table_versions(cursor: sqlite3.Cursor):
+    """Version counters that HTTP caching validates against (see api.http_cache)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES ('projects', 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS projects_version_{event.lower()} AFTER {event} ON projects BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE name = 'projects';
+            END
+        ''')
+    # Per-project requirement versions read MAX(change_seq) of rows and tombstones
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS ix_tombstones_source_change ON requirement_tombstones (source_file, change_seq)'
+    )
+
+def track_project_moves(cursor: sqlite3.Cursor):
+    """
+    A requirement re-ingested from another document moves to that source_file. Leave a
+    tombstone in the project it left, so that project's delta sync and version drop it.
+    """
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS requirements_change_move AFTER UPDATE OF source_file ON requirements
+        WHEN new.source_file IS NOT old.source_file BEGIN
+            UPDATE change_counter SET seq = seq + 1 WHERE id = 1;
+            -- Not INSERT OR REPLACE: an upsert's conflict policy overrides the trigger's
+            DELETE FROM requirement_tombstones WHERE id = old.id;
+            INSERT INTO requirement_tombstones (id, source_file, change_seq)
+            VALUES (old.id, old.source_file, (SELECT seq FROM change_counter WHERE id = 1));
+        END
+    ''')
+
+def create_project_change_versions(cursor: sqlite3.Cursor):
+    """
+    Per-project versions for /requirements ETags, bumped by every write to a project's rows
+    (including rows moving out). MAX(change_seq) over rows and tombstones can go down -- a
+    tombstone is dropped when its ID is re-created in another project -- and could then
+    revalidate a stale response; these only move forward.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS project_change_versions (
+            source_file TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO project_change_versions (source_file, version)
+        SELECT source_file, MAX(change_seq) FROM (
+            SELECT source_file, change_seq FROM requirements
+            UNION ALL
+            SELECT source_file, change_seq FROM requirement_tombstones
+        )
+        WHERE source_file IS NOT NULL
+        GROUP BY source_file
+    ''')
+
+    def stamp(row):
+        # Follows the change counter where it can, but always at least one step forward (the
+        # counter may not have moved yet: trigger order is unspecified). Plain INSERT/UPDATE:
+        # an outer upsert's conflict policy would override OR IGNORE / OR REPLACE here.
+        current = "(SELECT seq FROM change_counter WHERE id = 1)"
+        return f'''
+            UPDATE project_change_versions SET version = MAX(version + 1, {current})
+            WHERE source_file = {row}.source_file;
+            INSERT INTO project_change_versions (source_file, version)
+            SELECT {row}.source_file, MAX({current}, 1)
+            WHERE {row}.source_file IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM project_change_versions WHERE source_file = {row}.source_file);
+        '''
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS project_version_insert AFTER INSERT ON requirements BEGIN
+            {stamp("new")}
+        END
+    ''')
+    # As for requirements_change_update, skip the change-tracking trigger's own change_seq write
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS project_version_update AFTER UPDATE ON requirements
+        WHEN new.change_seq IS old.change_seq BEGIN
+            {stamp("old")}
+            {stamp("new")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS project_version_delete AFTER DELETE ON requirements BEGIN
+            {stamp("old")}
+        END
+    ''')
+
+MIGRATIONS: List[Callable[[sqlite3.Cursor], None]] = [
+    create_base_schema,
+    create_search_index,
+    create_project_aggregates,
+    create_jobs_table,
+    create_job_scheduling,
+    create_change_tracking,
+    create_table_versions,
+    track_project_moves,
+    create_project_change_versions,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Bring the database up to SCHEMA_VERSION.
+
+    Pending migrations run in a single IMMEDIATE transaction, so concurrent processes starting
+    against the same file apply them exactly once.
+
+    Returns:
+        int: The number of migrations applied (0 when the database was already current).
+    """
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return 0
+    
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock: another process may have migrated meanwhile
+        version = get_schema_version(conn)
+        cursor = conn.cursor()
+        for step in range(version, SCHEMA_VERSION):
+            MIGRATIONS[step](cursor)
+            cursor.execute(f"PRAGMA user_version = {step + 1}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    applied = max(SCHEMA_VERSION - version, 0)
+    if applied:
+        print(f"Migrated database schema from version {version} to {SCHEMA_VERSION}.")
+    return applied
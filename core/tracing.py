@@ -0,0 +1,253 @@
+import argparse
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Set ASV_TRACING=0 to disable span export
+TRACING_ENABLED = os.environ.get("ASV_TRACING", "1") != "0"
+# Defaults to traces.jsonl next to the database
+TRACE_FILE = os.environ.get("ASV_TRACE_FILE")
+# The file is rotated to <name>.1 beyond this size
+TRACE_MAX_BYTES = int(os.environ.get("ASV_TRACE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+SERVICE_NAME = "asv"
+
+class Span:
+    """
+    A timed operation, shaped like an OpenTelemetry span (trace/span/parent IDs, nanosecond
+    timestamps, attributes, status). Use `start_span` rather than creating spans directly.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns",
+                 "attributes", "status", "status_message")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount: float = 1):
+        """Increment a numeric attribute (e.g. tokens accumulated over several calls)."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def set_status(self, status: str, message: Optional[str] = None):
+        self.status = status
+        self.status_message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_message},
+            "resource": {"service.name": SERVICE_NAME, "process.pid": os.getpid()},
+        }
+
+class JsonlExporter:
+    """Appends finished spans to a JSONL file, one write per span so processes can share it."""
+
+    def __init__(self, path: str, max_bytes: int = TRACE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a") as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"Error exporting span {span.name}: {e}")
+
+class InMemoryExporter:
+    """Keeps finished spans in a list (tests, ad-hoc inspection)."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("asv_current_span", default=None)
+_exporter = None
+# One exporter per process for the default file, so all threads share its lock (a lock per
+# span would let two threads rotate the file at once and lose spans)
+_default_exporter: Optional[JsonlExporter] = None
+_default_exporter_lock = threading.Lock()
+
+def default_trace_file() -> str:
+    if TRACE_FILE:
+        return TRACE_FILE
+    from core import db
+    return os.path.join(os.path.dirname(db.DB_PATH), "traces.jsonl")
+
+def default_exporter() -> JsonlExporter:
+    """The process's exporter for default_trace_file(), created on first use (and again if the file moves)."""
+    global _default_exporter
+    path = default_trace_file()
+    exporter = _default_exporter
+    if exporter is None or exporter.path != path:
+        with _default_exporter_lock:
+            if _default_exporter is None or _default_exporter.path != path:
+                _default_exporter = JsonlExporter(path)
+            exporter = _default_exporter
+    return exporter
+
+def set_exporter(exporter):
+    """Replace the exporter (None restores the default JSONL file)."""
+    global _exporter
+    _exporter = exporter
+
+def _export(span: Span):
+    exporter = _exporter
+    if exporter is None:
+        if not TRACING_ENABLED:
+            return
+        exporter = default_exporter()
+    exporter.export(span)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+@contextlib.contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, trace_id: Optional[str] = None) -> Iterator[Span]:
+    """
+    Time the `with` block as a span, nested under the current span.
+
+    Args:
+        name (str): Operation name, e.g. "ingest.title".
+        attributes (Optional[Dict[str, Any]]): Initial attributes.
+        trace_id (Optional[str]): Start a new trace with this ID (32 hex chars) instead of
+            continuing the current one. Jobs pass their job ID.
+
+    Yields:
+        Span: The span, to add attributes while the block runs. An exception leaving the
+        block marks it ERROR and is re-raised.
+    """
+    parent = _current_span.get()
+    if trace_id is None:
+        trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        parent_span_id = parent.span_id if parent is not None else None
+    else:
+        parent_span_id = None
+    span = Span(name, trace_id, parent_span_id, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_status("ERROR", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end_ns = time.time_ns()
+        if span.status == "UNSET":
+            span.status = "OK"
+        _export(span)
+
+def traced(name: str):
+    """Decorator running each call of the function in a span; the body can annotate it via `current_span()`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def bind_context(func: Callable) -> Callable:
+    """Carry the current span into a worker thread: `executor.submit(bind_context(fn), ...)`."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+# --- Timeline rendering ---
+
+def load_trace(trace_id: str, path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """All spans of a trace (or of the job whose ID starts with `trace_id`) from a JSONL file."""
+    path = path or default_trace_file()
+    spans = []
+    for candidate in (path + ".1", path):
+        if not os.path.exists(candidate):
+            continue
+        with open(candidate) as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except ValueError:
+                    continue  # partially written line
+                if span["trace_id"].startswith(trace_id) or str(span["attributes"].get("job.id", "")).startswith(trace_id):
+                    spans.append(span)
+    return spans
+
+def _format_attributes(attributes: Dict[str, Any], limit: int = 4) -> str:
+    shown = [f"{k}={v}" for k, v in attributes.items() if k != "job.id"][:limit]
+    return " ".join(shown)
+
+def render_timeline(spans: List[Dict[str, Any]], width: int = 60) -> str:
+    """
+    Flame-style text timeline: one row per span in call-tree order, indented by depth,
+    with a bar placed on the trace's time axis.
+    """
+    if not spans:
+        return "No spans found."
+    by_parent: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    ids = {span["span_id"] for span in spans}
+    for span in spans:
+        parent = span["parent_span_id"] if span["parent_span_id"] in ids else None
+        by_parent.setdefault(parent, []).append(span)
+    for children in by_parent.values():
+        children.sort(key=lambda s: s["start_time_unix_nano"])
+
+    start = min(span["start_time_unix_nano"] for span in spans)
+    end = max(span["end_time_unix_nano"] for span in spans)
+    scale = width / max(end - start, 1)
+
+    rows = []
+    def visit(span, depth):
+        offset = int((span["start_time_unix_nano"] - start) * scale)
+        length = max(int((span["end_time_unix_nano"] - span["start_time_unix_nano"]) * scale), 1)
+        bar = (" " * offset + "█" * length)[:width].ljust(width)
+        label = ("  " * depth + span["name"])[:36]
+        duration_ms = (span["end_time_unix_nano"] - span["start_time_unix_nano"]) / 1e6
+        flag = " !" if span["status"]["code"] == "ERROR" else ""
+        rows.append(f"{label:36} |{bar}| {duration_ms:9.1f}ms{flag}  {_format_attributes(span['attributes'])}")
+        for child in by_parent.get(span["span_id"], []):
+            visit(child, depth + 1)
+    for root in by_parent.get(None, []):
+        visit(root, 0)
+
+    header = f"trace {spans[0]['trace_id']}  {len(spans)} spans  {(end - start) / 1e6:.1f}ms"
+    return "\n".join([header] + rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the span timeline of a job (or any trace) from the trace file.")
+    parser.add_argument("trace_id", help="Job ID or trace ID (a unique prefix is enough)")
+    parser.add_argument("--file", help="Trace file (default: traces.jsonl next to the database)")
+    parser.add_argument("--width", type=int, default=60, help="Bar width in characters")
+    args = parser.parse_args()
+    print(render_timeline(load_trace(args.trace_id, args.file), args.width))
@@ -3,6 +3,9 @@ import json
 import time
 from typing import Dict, Any, Generator, List, Optional
 from core.db import get_requirements, update_verification_result, log_event
+from core.llm_clients import get_model
+from core.metrics import ERRORS, PYTEST_SECONDS, RETRIES, llm_call
+from core.tracing import current_span, traced
 
 class VerificationEngine:
     def __init__(self, api_key: str):
@@ -13,10 +16,10 @@ class VerificationEngine:
             api_key (str): The Google API Key for authentication.
         """
         self.api_key = api_key
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash',
-                                      generation_config={"response_mime_type": "application/json"})
+        # Bound to a pooled per-key client; no process-global genai.configure()
+        self.model = get_model(self.api_key, generation_config={"response_mime_type": "application/json"})
 
+    @traced("verify.analyze")
     def _analyze_requirement(self, req: Dict[str, Any]) -> str:
         """
         Helper to analyze a single requirement dict using AI.
@@ -29,6 +32,8 @@ class VerificationEngine:
         """
         req_id = req['ID']
         text = req['Requirement']
+        span = current_span()
+        span.set_attribute("req.id", req_id)
         
         # 1. Define Schema for Structured Output
         verification_schema = {
@@ -43,6 +48,9 @@ class VerificationEngine:
         
         # 2. Retry Logic (3 Attempts)
         for attempt in range(3):
+            if attempt:
+                RETRIES.inc(site="analyze_requirement")
+                span.set_attribute("retries", attempt)
             try:
                 prompt = f"""
                 You are a Lead Systems Engineer. Analyze this NASA software requirement: '{text}'.
@@ -52,13 +60,15 @@ class VerificationEngine:
                 """
                 
                 # Update generation config for this call to enforce schema
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        response_mime_type="application/json",
-                        response_schema=verification_schema
+                with llm_call("analyze_requirement") as call:
+                    response = self.model.generate_content(
+                        prompt,
+                        generation_config=genai.types.GenerationConfig(
+                            response_mime_type="application/json",
+                            response_schema=verification_schema
+                        )
                     )
-                )
+                    call.record(response)
                 
                 result = json.loads(response.text)
                 
@@ -67,6 +77,7 @@ class VerificationEngine:
                 
                 # Success! Update DB
                 db_status = "Analyzed"
+                span.set_attribute("method", method)
                 update_verification_result(req_id, db_status, method, rationale)
                 
                 return f"Plan Generated for {req_id}: {method} ({db_status})"
@@ -77,6 +88,8 @@ class VerificationEngine:
                 continue
         
         # 3. Fallback (If all retries fail)
+        ERRORS.inc(site="analyze_requirement")
+        span.set_status("ERROR", "all attempts failed")
         error_msg = f"Failed to analyze {req_id} after 3 attempts."
         log_event(error_msg, level="ERROR")
         
@@ -144,6 +157,7 @@ class VerificationEngine:
         yield log_msg
         yield "Verification complete."
 
+    @traced("verify.generate")
     def generate_test_code(self, requirement_text: str) -> str:
         """
         Generates Python pytest code for a given requirement.
@@ -169,19 +183,60 @@ class VerificationEngine:
         
         try:
             # Use a simpler generation config for code (text output)
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(response_mime_type="text/plain")
-            )
+            with llm_call("generate_test_code") as call:
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(response_mime_type="text/plain")
+                )
+                call.record(response)
             
             # Clean up potential markdown if the model ignores instructions
             code = response.text.replace("```python", "").replace("```", "").strip()
+            current_span().set_attribute("code.lines", code.count("\n") + 1)
             
             return code
         except Exception as e:
+            ERRORS.inc(site="generate_test_code")
+            current_span().set_status("ERROR", str(e))
             log_event(f"Code generation failed: {str(e)}", level="ERROR")
             return f"# Error generating code: {str(e)}"
 
+    def generate_text(self, prompt: str, site: str = "generate_text") -> str:
+        """
+        Runs a free-form text prompt (no JSON response schema).
+
+        Args:
+            prompt (str): The prompt to send to the model.
+            site (str): Call-site label for the LLM metrics.
+
+        Returns:
+            str: The model's plain-text answer.
+        """
+        with llm_call(site) as call:
+            response = self.model.generate_content(
+                prompt,
+                generation_config=genai.types.GenerationConfig(response_mime_type="text/plain")
+            )
+            call.record(response)
+        return response.text.strip()
+
+    @traced("verify.analyze_failure")
+    def analyze_failure(self, requirement_text: str, code: str, log: str) -> str:
+        """
+        Explains why a generated test failed.
+
+        Args:
+            requirement_text (str): The requirement the test verifies.
+            code (str): The pytest code that was executed.
+            log (str): The pytest output.
+
+        Returns:
+            str: A short explanation and suggested approach.
+        """
+        prompt = f"The following pytest code for requirement '{requirement_text}' failed.\n\nCODE:\n{code}\n\nLOG:\n{log}\n\nProvide a concise 1-3 sentence explanation of why it failed and what the different approach should be. Do not generate code, just the explanation."
+        return self.generate_text(prompt, site="analyze_failure")
+
+    @traced("verify.execute")
     def execute_test_code(self, code_str: str) -> Dict[str, str]:
         """
         Executes the generated test code using pytest in a subprocess.
@@ -199,6 +254,8 @@ class VerificationEngine:
         # Create a temporary test file in the system tmp directory that exists in the Docker container
         filename = f"/tmp/temp_test_{uuid.uuid4().hex}.py"
         
+        start = time.perf_counter()
+        status = "Error"
         try:
             with open(filename, "w") as f:
                 f.write(code_str)
@@ -227,6 +284,8 @@ class VerificationEngine:
         except Exception as e:
             return {"status": "Error", "log": f"Execution failed: {str(e)}"}
         finally:
+            PYTEST_SECONDS.observe(time.perf_counter() - start, status=status)
+            current_span().set_attribute("status", status)
             # Cleanup
             if os.path.exists(filename):
                 os.remove(filename)
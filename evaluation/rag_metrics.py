@@ -1,6 +1,14 @@
 import os
+import sys
 from typing import Dict, Any, List
-import google.generativeai as genai
+
+# Add project root to path for imports if running from this directory
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.llm_clients import get_model
+from core.metrics import ERRORS, llm_call
 
 class RAGEvaluator:
     """
@@ -16,9 +24,8 @@ class RAGEvaluator:
         if not api_key:
             raise ValueError("Google Gemini API key required for RAG evaluation.")
             
-        genai.configure(api_key=api_key)
         # Using flash for fast, cost-effective evaluation
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = get_model(api_key, 'gemini-2.5-flash')
 
     def evaluate_faithfulness(self, requirement: str, generated_response: str) -> float:
         """
@@ -45,11 +52,14 @@ class RAGEvaluator:
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            with llm_call("rag_faithfulness") as call:
+                response = self.model.generate_content(prompt)
+                call.record(response)
             # Basic cleanup in case Gemini returns "0.95" or "Score: 0.95"
             score_text = response.text.strip().replace("Score:", "").strip()
             return float(score_text)
         except Exception as e:
+            ERRORS.inc(site="rag_faithfulness")
             print(f"Faithfulness evaluation failed: {e}")
             return 0.0
 
@@ -78,10 +88,13 @@ class RAGEvaluator:
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            with llm_call("rag_recall") as call:
+                response = self.model.generate_content(prompt)
+                call.record(response)
             score_text = response.text.strip().replace("Score:", "").strip()
             return float(score_text)
         except Exception as e:
+            ERRORS.inc(site="rag_recall")
             print(f"Recall evaluation failed: {e}")
             return 0.0
 
@@ -110,10 +123,13 @@ class RAGEvaluator:
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            with llm_call("rag_precision") as call:
+                response = self.model.generate_content(prompt)
+                call.record(response)
             score_text = response.text.strip().replace("Score:", "").strip()
             return float(score_text)
         except Exception as e:
+            ERRORS.inc(site="rag_precision")
             print(f"Precision evaluation failed: {e}")
             return 0.0
 
@@ -9,10 +9,21 @@ if core_path not in sys.path:
     sys.path.append(core_path)
 
 from core.engine.base_bundle import BaseBundle
+from core.engine.compact import CompactBundle
 from core.engine import cbor_utils
 
 class BufferManager:
-    def __init__(self):
+    def __init__(self, compact=False, store=None):
+        """
+        :param compact: Store CompactBundle records instead of BaseBundle objects
+            (several times less memory per bundle; bundles become immutable).
+        :param store: Optional core.engine.store.BundleStore. When given, created bundles are
+            written to it (bounded RAM, spilling to disk, expiring by lifetime) instead of
+            being kept in `self.bundles`.
+        """
+        self.compact = compact
+        self.store = store
+        self.bundle_class = CompactBundle if compact else BaseBundle
         config_path = os.path.join(os.path.dirname(__file__), 'config.json')
         with open(config_path, 'r') as f:
             self.config = json.load(f)
@@ -33,17 +44,18 @@ class BufferManager:
             "payload": payload
         }
         
-        bundle = BaseBundle(self.config['bpv6'], data)
-        self.bundles.append(bundle)
+        bundle = self.bundle_class(self.config['bpv6'], data)
+        self._keep(bundle)
         return bundle
 
     def create_bundle_v7(self, source, dest, payload):
         """Creates and stores a BPv7 bundle using generic engine."""
         # Helper to encode EID for BPv7 (as BaseBundle expects pre-encoded bytes for complex types in this prototype)
         def encode_eid(node, service):
+            if self.compact:
+                return (node, service)  # CompactBundle stores ipn EIDs natively
             # ipn scheme = 2
-            inner = b'\x82' + cbor_utils.encode_uint(node) + cbor_utils.encode_uint(service)
-            return b'\x82' + cbor_utils.encode_uint(2) + inner
+            return cbor_utils.encode([2, [node, service]])
 
         data = {
             "dest_eid": encode_eid(dest[0], dest[1]),
@@ -52,7 +64,13 @@ class BufferManager:
             "payload": payload
         }
         
-        bundle = BaseBundle(self.config['bpv7'], data)
-        self.bundles.append(bundle)
+        bundle = self.bundle_class(self.config['bpv7'], data)
+        self._keep(bundle)
         return bundle
 
+    def _keep(self, bundle):
+        if self.store is not None:
+            self.store.add_bundle(bundle)
+        else:
+            self.bundles.append(bundle)
+
@@ -1,7 +1,15 @@
 import os
-import google.generativeai as genai
+import sys
+
 from sysml_parser import SysMLv2Parser
 
+# Add project root to path for imports when running from this directory
+project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.llm_clients import get_model
+
 class SysMLGeminiPipeline:
     """
     Feeds parsed SysML v2 Architecture models into Google Gemini to automatically 
@@ -15,8 +23,7 @@ class SysMLGeminiPipeline:
         if not api_key:
             raise ValueError("Google Gemini API key required for the SysML Pipeline.")
             
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = get_model(api_key, 'gemini-2.5-flash')
         
     def verify_architecture(self, sysml_filepath: str) -> str:
         """
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+import numpy as np
+
+from examples.nasa_hdtn.buffer_manager import BufferManager
+from core.engine.base_bundle import BaseBundle
+from core.engine.batch import serialize_many
+
+# Values straddling every SDNV and CBOR length boundary
+EDGES = [0, 23, 24, 127, 128, 255, 256, 16383, 16384, 65535, 65536, 2**32 - 1, 2**32, 2**63, 2**64 - 1]
+
+def rows(buf, offsets):
+    return [buf[offsets[i]:offsets[i + 1]].tobytes() for i in range(len(offsets) - 1)]
+
+class TestBatchSerialize(unittest.TestCase):
+    def setUp(self):
+        self.manager = BufferManager()
+        self.payloads = [b"p" * length for length in (0, 1, 23, 24, 300, 5, 70000, 9, 2, 17, 128, 3, 4, 6, 7)]
+
+    def test_bpv6_matches_per_object(self):
+        config = self.manager.config['bpv6']
+        columns = {field: list(reversed(EDGES)) for field in config['primary_block']['fields']}
+        columns['source_node'] = EDGES
+        columns['proc_flags'] = 0x10
+        buf, offsets = serialize_many(config, columns, self.payloads)
+
+        expected = []
+        for i, payload in enumerate(self.payloads):
+            data = {field: values[i] if isinstance(values, list) else values for field, values in columns.items()}
+            data['payload'] = payload
+            expected.append(BaseBundle(config, data).serialize())
+        self.assertEqual(rows(buf, offsets), expected)
+        self.assertEqual(offsets[-1], len(buf))
+
+    def test_bpv7_matches_per_object(self):
+        config = self.manager.config['bpv7']
+        nodes = np.array(EDGES, dtype=np.uint64)
+        columns = {
+            "dest_eid": (nodes, 2),
+            "source_eid": (list(reversed(EDGES)), EDGES),
+            "report_to_eid": [b'\x82\x02\x82\x00\x00'] * len(EDGES),
+            "creation_timestamp": 812345678,
+            "sequence_number": np.arange(len(EDGES)),
+            "lifetime": EDGES,
+        }
+        buf, offsets = serialize_many(config, columns, self.payloads)
+
+        expected = []
+        for i, payload in enumerate(self.payloads):
+            bundle = self.manager.create_bundle_v7((list(reversed(EDGES))[i], EDGES[i]), (EDGES[i], 2), payload)
+            bundle.data.update(creation_timestamp=812345678, sequence_number=i, lifetime=EDGES[i])
+            expected.append(bundle.serialize())
+        self.assertEqual(rows(buf, offsets), expected)
+
+    def test_defaults_follow_base_bundle(self):
+        config = self.manager.config['bpv6']
+        buf, offsets = serialize_many(config, {"creation_timestamp": 5}, [b"a", b"b"])
+        bundle = BaseBundle(config, {"creation_timestamp": 5, "sequence_number": 0, "payload": b"a"})
+        self.assertEqual(rows(buf, offsets)[0], bundle.serialize())
+
+    def test_empty_batch(self):
+        buf, offsets = serialize_many(self.manager.config['bpv7'], {"lifetime": []}, [])
+        self.assertEqual(len(buf), 0)
+        self.assertEqual(list(offsets), [0])
+
+    def test_invalid_columns(self):
+        config = self.manager.config['bpv6']
+        with self.assertRaises(ValueError):
+            serialize_many(config, {"dest_node": [1, -1]}, [b"", b""])
+        with self.assertRaises(ValueError):
+            serialize_many(config, {"dest_node": np.array([1, -1])}, [b"", b""])
+        with self.assertRaises(ValueError):
+            serialize_many(config, {"dest_node": [1, 2, 3]}, [b"", b""])
+        with self.assertRaises(ValueError):
+            serialize_many(config, {"dest_node": -1}, [b""])
+        with self.assertRaises(ValueError):
+            serialize_many({"encoding": "xml"}, {}, [b""])
+
+if __name__ == '__main__':
+    unittest.main()
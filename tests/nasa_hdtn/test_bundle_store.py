@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from examples.nasa_hdtn.buffer_manager import BufferManager
+from core.engine.decoder import decode_bundle
+from core.engine.store import BundleStore, StoreFull, bundle_destination, bundle_expiry
+
+class TestBundleStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.now = 1000.0
+        self.store = BundleStore(self.tmpdir.name, ram_quota=100, disk_quota=1000, segment_size=300,
+                                 clock=lambda: self.now)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def segment_files(self):
+        return sorted(os.listdir(self.tmpdir.name))
+
+    def test_spills_oldest_to_disk(self):
+        ids = [self.store.put(bytes([i]) * 40, (i % 3, 1), 2000 + i) for i in range(10)]
+        stats = self.store.stats()
+        self.assertEqual(stats["bundles"], 10)
+        self.assertEqual(stats["in_ram"], 2)  # 100-byte RAM quota holds two 40-byte bundles
+        self.assertLessEqual(stats["ram_bytes"], 100)
+        self.assertEqual(len(self.segment_files()), 2)
+        for i in ids:
+            self.assertEqual(self.store.get(i), bytes([i]) * 40)
+        self.assertEqual(self.store.find((1, 1)), [1, 4, 7])
+
+    def test_expiry_and_segment_reclaim(self):
+        ids = [self.store.put(bytes([i]) * 40, (0, 0), 1000 + i) for i in range(10)]
+        self.assertEqual(self.store.expire(1004.5), 5)
+        self.assertNotIn(ids[0], self.store)
+        with self.assertRaises(KeyError):
+            self.store.get(ids[4])
+        self.assertEqual(self.store.get(ids[5]), bytes([5]) * 40)
+
+        # The first segment held bundles 0-6; it goes once the last of them is gone
+        self.assertEqual(len(self.segment_files()), 2)
+        self.store.remove(ids[5])
+        self.store.remove(ids[6])
+        self.assertEqual(len(self.segment_files()), 1)
+
+        self.now = 5000
+        self.assertEqual(self.store.expire(), 3)
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.stats()["ram_bytes"], 0)
+
+    def test_sparse_segment_is_compacted(self):
+        # No RAM: every bundle spills, five per 500-byte segment
+        with BundleStore(os.path.join(self.tmpdir.name, "compact"), ram_quota=0, disk_quota=2000,
+                         segment_size=500, clock=lambda: self.now) as store:
+            ids = [store.put(bytes([i]) * 100, (0, 0), 2000) for i in range(10)]
+            self.assertEqual(store.stats()["segments"], 2)
+
+            for bundle_id in ids[:3]:
+                store.remove(bundle_id)
+            self.assertEqual(store.stats()["segments"], 2)  # 40% live: left alone
+
+            # 20% live: bundle 4 moves to a new active segment and the first segment goes
+            store.remove(ids[3])
+            self.assertEqual(store.stats()["segments"], 2)
+            self.assertEqual(store.disk_bytes, 1000)
+            self.assertEqual(sorted(os.listdir(store.directory)), ["segment-000001.bin", "segment-000002.bin"])
+            for i in range(4, 10):
+                self.assertEqual(store.get(ids[i]), bytes([i]) * 100)
+            self.assertEqual(store.find((0, 0)), ids[4:])
+
+    def test_pop_destination(self):
+        for i in range(6):
+            self.store.put(bytes([i]) * 40, (i % 2, 1), 2000)
+        popped = self.store.pop_destination((1, 1), limit=2)
+        self.assertEqual(popped, [(1, bytes([1]) * 40), (3, bytes([3]) * 40)])
+        self.assertEqual(self.store.find((1, 1)), [5])
+        self.assertEqual(self.store.pop_destination((9, 9)), [])
+
+    def test_disk_quota(self):
+        # One 90-byte bundle in RAM, three per 300-byte segment, at most three segments
+        for i in range(10):
+            self.store.put(b"x" * 90, (0, 0), 2000)
+        with self.assertRaises(StoreFull):
+            self.store.put(b"x" * 90, (0, 0), 2000)
+        self.assertEqual(len(self.store), 10)
+        self.assertEqual(self.store.disk_bytes, 900)
+
+        # Oversized bundles bypass RAM and get a segment of their own
+        self.store.expire(3000)
+        bundle_id = self.store.put(b"y" * 500, (0, 0), 2000)
+        self.assertEqual(self.store.get(bundle_id), b"y" * 500)
+        self.assertEqual(self.store.stats()["in_ram"], 0)
+
+    def test_buffer_manager_writes_to_store(self):
+        for compact in (False, True):
+            manager = BufferManager(compact=compact, store=self.store)
+            v6 = manager.create_bundle_v6((1, 1), (7, 2), b"a" * 30)
+            v7 = manager.create_bundle_v7((1, 1), (8, 2), b"b" * 30)
+            self.assertEqual(manager.bundles, [])
+            self.assertEqual(bundle_destination(v6), (7, 2))
+            self.assertEqual(bundle_destination(v7), (8, 2))
+            self.assertAlmostEqual(bundle_expiry(v7), time.time() + 3600, delta=5)
+
+            [(_, data)] = self.store.pop_destination((8, 2))
+            self.assertEqual(decode_bundle(manager.config['bpv7'], data)[0].serialize(), v7.serialize())
+            self.assertEqual(self.store.pop_destination((7, 2))[0][1], v6.serialize())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core.engine import cbor_utils
+from core.engine.cbor_utils import CBORWriter, Tag, decode, decode_item, encode
+from core.engine.base_bundle import BaseBundle
+from core.engine.decoder import decode_bundle
+
+# RFC 8949 Appendix A
+VECTORS = [
+    (0, "00"), (23, "17"), (24, "1818"), (100, "1864"), (1000, "1903e8"), (1000000, "1a000f4240"),
+    (1000000000000, "1b000000e8d4a51000"), (18446744073709551615, "1bffffffffffffffff"),
+    (-1, "20"), (-100, "3863"), (-1000, "3903e7"), (-18446744073709551616, "3bffffffffffffffff"),
+    (False, "f4"), (True, "f5"), (None, "f6"), (b"", "40"), (b"\x01\x02\x03\x04", "4401020304"),
+    ("", "60"), ("IETF", "6449455446"), ("ü", "62c3bc"), ("水", "63e6b0b4"),
+    ([], "80"), ([1, [2, 3], [4, 5]], "8301820203820405"), ({}, "a0"),
+    ({"a": 1, "b": [2, 3]}, "a26161016162820203"),
+    (Tag(1, 1363896240), "c11a514b67b0"),
+    (list(range(1, 26)), "98190102030405060708090a0b0c0d0e0f101112131415161718181819"),
+]
+
+class TestCborUtils(unittest.TestCase):
+    def test_rfc_vectors(self):
+        for value, expected in VECTORS:
+            self.assertEqual(encode(value).hex(), expected, value)
+            self.assertEqual(decode(bytes.fromhex(expected)), value)
+
+    def test_indefinite_lengths(self):
+        self.assertEqual(decode(bytes.fromhex("5f42010243030405ff")), b"\x01\x02\x03\x04\x05")
+        self.assertEqual(decode(bytes.fromhex("7f657374726561646d696e67ff")), "streaming")
+        self.assertEqual(decode(bytes.fromhex("9f018202039f0405ffff")), [1, [2, 3], [4, 5]])
+        self.assertEqual(decode(bytes.fromhex("bf61610161629f0203ffff")), {"a": 1, "b": [2, 3]})
+
+        writer = CBORWriter().indefinite_map_start().text_string("a").integer(-2).break_code()
+        self.assertEqual(decode(writer.getvalue()), {"a": -2})
+        self.assertEqual(cbor_utils.skip_item(writer.getvalue()), len(writer.getvalue()))
+
+    def test_canonical(self):
+        value = {"b": 1, "a": 2, 100: 0, -1: 0, "aa": 0, 10: 0}
+        self.assertEqual(
+            encode(value, canonical=True),
+            encode({10: 0, 100: 0, -1: 0, "a": 2, "b": 1, "aa": 0})
+        )
+        self.assertEqual(encode(1.5, canonical=True).hex(), "f93e00")
+        self.assertEqual(encode(100000.0, canonical=True).hex(), "fa47c35000")
+        self.assertEqual(encode(1.1, canonical=True).hex(), "fb3ff199999999999a")
+        self.assertEqual(decode(encode(1.1, canonical=True)), 1.1)
+        class Key(int):
+            __hash__ = object.__hash__
+        with self.assertRaises(ValueError):
+            encode({1: "a", Key(1): "b"}, canonical=True)  # distinct in Python, same CBOR key
+
+    def test_errors(self):
+        for value in (2**64, -2**64 - 1):
+            with self.assertRaises(ValueError):
+                encode(value)
+        with self.assertRaises(TypeError):
+            encode(object())
+        with self.assertRaises(ValueError):
+            decode(b"\x00\x00")  # trailing bytes
+        with self.assertRaises(ValueError):
+            decode(b"\x1c")  # reserved additional info
+        with self.assertRaises(IndexError):
+            decode_item(b"\x44ab")
+
+    def test_bpv7_primary_block_longer_than_23_fields(self):
+        fields = ["version"] + [f"field_{i}" for i in range(23)] + ["dest_eid", "creation_timestamp_array"]
+        config = {"version": 7, "encoding": "cbor", "primary_block": {"fields": fields}}
+        data = {f"field_{i}": i * 1000 for i in range(23)}
+        data.update(dest_eid=encode([2, [5, 6]]), creation_timestamp=1, sequence_number=2, payload=b"x")
+        encoded = BaseBundle(config, data).serialize()
+
+        primary = decode_item(encoded, 1)[0]
+        self.assertEqual(len(primary), len(fields))
+        self.assertEqual(primary[-2:], [[2, [5, 6]], [1, 2]])
+        self.assertEqual(decode_bundle(config, encoded)[0].data["field_22"], 22000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from examples.nasa_hdtn.buffer_manager import BufferManager
+from core.engine import cbor_utils
+from core.engine.base_bundle import BaseBundle
+from core.engine.compact import CompactBundle
+
+class TestCompactBundle(unittest.TestCase):
+    def setUp(self):
+        self.manager = BufferManager()
+        self.compact = BufferManager(compact=True)
+
+    def pair(self, version, source, dest, payload):
+        regular = getattr(self.manager, f"create_bundle_{version}")(source, dest, payload)
+        compact = getattr(self.compact, f"create_bundle_{version}")(source, dest, payload)
+        # Both stamp "now"; align in case the second ticked over
+        regular.data['creation_timestamp'] = compact.field('creation_timestamp')
+        return regular, compact
+
+    def test_same_bytes_as_base_bundle(self):
+        for version in ('v6', 'v7'):
+            for source, dest in (((1, 1), (2, 2)), ((2**40, 3), (70000, 2**33))):
+                regular, compact = self.pair(version, source, dest, b"Hello " + version.encode())
+                self.assertEqual(compact.serialize(), regular.serialize())
+                # compact.data also lists the fields BaseBundle leaves to default to 0
+                self.assertEqual({key: compact.data[key] for key in regular.data}, regular.data)
+                self.assertEqual(compact.serialized_size(), len(regular.serialize()))
+
+    def test_serialized_forms_agree(self):
+        _, compact = self.pair('v7', (1, 1), (2, 2), b"x" * 100)
+        buf = bytearray(compact.serialized_size() + 4)
+        self.assertEqual(compact.serialize_into(buf, 4), len(buf))
+        self.assertEqual(bytes(buf[4:]), compact.serialize())
+        with self.assertRaises(ValueError):
+            compact.serialize_into(buf, 5)
+        self.assertEqual(b"".join(compact.serialize_iov()), compact.serialize())
+        compact.payload = b"y" * 50
+        self.assertIn(b"y" * 50, compact.serialize())
+        self.assertNotIn(b"x" * 100, compact.serialize())
+        self.assertEqual(compact.serialized_size(), len(compact.serialize()))
+
+    def test_compact_storage(self):
+        _, small = self.pair('v6', (1, 1), (2, 2), b"")
+        _, large = self.pair('v6', (2**40, 1), (2, 2), b"")
+        self.assertFalse(hasattr(small, '__dict__'))
+        self.assertLess(len(small._record), len(large._record))
+        self.assertEqual(large.field('source_node'), 2**40)
+        self.assertEqual(small.version, 6)
+
+    def test_eids(self):
+        config = self.manager.config['bpv7']
+        bundle = CompactBundle(config, {"dest_eid": cbor_utils.encode([2, [5, 6]]), "source_eid": (7, 8)})
+        self.assertEqual(bundle.eid('dest_eid'), (5, 6))
+        self.assertEqual(bundle.eid('source_eid'), (7, 8))
+        self.assertEqual(bundle.eid('report_to_eid'), (0, 0))
+        with self.assertRaises(ValueError):
+            CompactBundle(config, {"dest_eid": cbor_utils.encode([1, "none"])})
+
+    def test_invalid_fields(self):
+        with self.assertRaises(ValueError):
+            CompactBundle(self.manager.config['bpv6'], {"dest_node": -1})
+        with self.assertRaises(ValueError):
+            CompactBundle(self.manager.config['bpv6'], {"dest_node": 2**64})
+        with self.assertRaises(ValueError):
+            CompactBundle({"encoding": "xml"}, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import random
+import sys
+import os
+import subprocess
+from unittest import mock
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+import numpy as np
+
+from examples.nasa_hdtn.buffer_manager import BufferManager
+from core.engine import cbor_utils, crc
+from core.engine.batch import serialize_many
+from core.engine.crc import CRC16_X25, CRC32C, crc16_x25, crc32c, crc_bytes, crc_iov
+from core.engine.crc import _crc32c_scalar
+from core.engine.decoder import CRCError, decode_bundle, iter_bundles
+
+class TestCRC(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(49)
+
+    def test_check_values(self):
+        # Standard "123456789" check values of both algorithms
+        self.assertEqual(crc16_x25(b"123456789"), 0x906E)
+        self.assertEqual(crc32c(b"123456789"), 0xE3069283)
+        self.assertEqual(crc16_x25(b""), 0)
+        self.assertEqual(crc32c(b""), 0)
+        self.assertEqual(crc_bytes(CRC16_X25, 0x906E), b'\x90\x6e')
+        self.assertEqual(crc_bytes(CRC32C, 0xE3069283), b'\xe3\x06\x92\x83')
+
+    def test_incremental_matches_whole(self):
+        for size in (0, 1, 7, 8, 9, 1000, 65536, 300001):
+            data = self.rng.randbytes(size)
+            cut = self.rng.randrange(size + 1)
+            for crc_type, function in ((CRC16_X25, crc16_x25), (CRC32C, crc32c)):
+                with self.subTest(size=size, crc_type=crc_type):
+                    self.assertEqual(function(data[cut:], function(data[:cut])), function(data))
+                    pieces = [memoryview(data)[:cut], bytearray(data[cut:])]
+                    self.assertEqual(crc_iov(crc_type, pieces), function(data))
+
+    def test_lanes_match_table_loop(self):
+        # Sizes around the lane threshold, with stripes that do not divide evenly
+        for size in (65535, 65536, 65537, 1 << 20, (1 << 23) + 4099):
+            data = self.rng.randbytes(size)
+            expected = _crc32c_scalar(memoryview(data), 0xFFFFFFFF) ^ 0xFFFFFFFF
+            self.assertEqual(crc32c(data), expected, size)
+            self.assertEqual(crc32c(np.frombuffer(data, dtype=np.uint8)), expected, size)
+
+    def test_numpy_is_optional(self):
+        # Bundles without large CRC buffers never load numpy; without numpy, large ones use the table loop
+        code = "import sys; import core.engine.base_bundle; print('numpy' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.join(current_dir, '..', '..'), capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+        data = self.rng.randbytes(1 << 16)
+        with mock.patch.object(crc, "_lane_tables", False):
+            self.assertEqual(crc32c(data), _crc32c_scalar(memoryview(data), 0xFFFFFFFF) ^ 0xFFFFFFFF)
+
+class TestBundleCRC(unittest.TestCase):
+    def setUp(self):
+        self.manager = BufferManager()
+        self.config = self.manager.config['bpv7']
+
+    def bundle(self, crc_type, payload=b"Hello CRC"):
+        bundle = self.manager.create_bundle_v7((1, 1), (2, 1), payload)
+        bundle.data.update(creation_timestamp=812345678, sequence_number=7, crc_type=crc_type)
+        return bundle
+
+    def test_blocks_carry_valid_crcs(self):
+        for crc_type, function, length in ((CRC16_X25, crc16_x25, 2), (CRC32C, crc32c, 4)):
+            with self.subTest(crc_type=crc_type):
+                encoded = self.bundle(crc_type).serialize()
+                primary, primary_end = cbor_utils.decode_item(encoded, 1)
+                payload_block, payload_end = cbor_utils.decode_item(encoded, primary_end)
+                self.assertEqual(len(primary), len(self.config['primary_block']['fields']) + 1)
+                self.assertEqual(payload_block[:5], [1, 1, 0, crc_type, b"Hello CRC"])
+                # Each CRC covers its block with the CRC value zeroed
+                for start, end, value in ((1, primary_end, primary[-1]), (primary_end, payload_end, payload_block[-1])):
+                    block = encoded[start:end - length] + bytes(length)
+                    self.assertEqual(value, crc_bytes(crc_type, function(block)))
+
+    def test_serialization_forms_agree(self):
+        for crc_type in (CRC16_X25, CRC32C):
+            bundle = self.bundle(crc_type, os.urandom(100000))
+            encoded = bundle.serialize()
+            self.assertEqual(b"".join(bundle.serialize_iov()), encoded)
+            self.assertEqual(bundle.serialized_size(), len(encoded))
+            buf = bytearray(len(encoded) + 3)
+            self.assertEqual(bundle.serialize_into(buf, 3), len(buf))
+            self.assertEqual(bytes(buf[3:]), encoded)
+
+    def test_verify_on_decode(self):
+        for crc_type in (CRC16_X25, CRC32C):
+            encoded = self.bundle(crc_type).serialize()
+            decoded, _ = decode_bundle(self.config, encoded, verify_crc=True)
+            self.assertEqual(decoded.serialize(), encoded)
+            # A creation timestamp byte, a payload byte and the payload block's CRC value
+            for position in (encoded.index(bytes.fromhex('306b694e')), encoded.index(b"CRC"), len(encoded) - 2):
+                corrupted = bytearray(encoded)
+                corrupted[position] ^= 0x40
+                with self.assertRaises(CRCError):
+                    decode_bundle(self.config, corrupted, verify_crc=True)
+                # Without verification the CRC is only skipped
+                decode_bundle(self.config, corrupted)
+
+    def test_stream_verification(self):
+        stream = b"".join(self.bundle(crc_type).serialize() for crc_type in (0, 1, 2, 1))
+        decoded = list(iter_bundles(self.config, [stream[i:i + 7] for i in range(0, len(stream), 7)], verify_crc=True))
+        self.assertEqual([b.data['crc_type'] for b in decoded], [0, 1, 2, 1])
+
+    def test_rejects_unknown_crc_type(self):
+        with self.assertRaises(ValueError):
+            self.bundle(3).serialize()
+        with self.assertRaises(ValueError):
+            serialize_many(self.config, {'crc_type': 1}, [b"x"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import random
+import sys
+import os
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from examples.nasa_hdtn.buffer_manager import BufferManager
+from core.engine.decoder import (
+    BundleStreamParser, DecodeError, IncompleteBundle, decode_all, decode_bundle, iter_bundles
+)
+from core.engine.sdnv import decode_sdnv, encode_sdnv
+from core.engine import cbor_utils
+
+EDGES = [0, 23, 24, 127, 128, 255, 256, 65535, 65536, 2**32 - 1, 2**32, 2**64 - 1]
+
+class TestDecoder(unittest.TestCase):
+    def setUp(self):
+        self.manager = BufferManager()
+        self.rng = random.Random(1234)
+
+    def random_value(self):
+        return self.rng.choice(EDGES + [self.rng.randrange(2**40)])
+
+    def random_bundles(self, version, count):
+        bundles = []
+        for _ in range(count):
+            payload = os.urandom(self.rng.choice([0, 1, 23, 24, 255, 256, self.rng.randrange(5000)]))
+            source, dest = (self.random_value(), self.random_value()), (self.random_value(), self.random_value())
+            if version == 'bpv6':
+                bundle = self.manager.create_bundle_v6(source, dest, payload)
+                fields = self.manager.config['bpv6']['primary_block']['fields']
+            else:
+                bundle = self.manager.create_bundle_v7(source, dest, payload)
+                fields = ['proc_flags', 'lifetime']
+                bundle.data['crc_type'] = self.rng.choice((0, 1, 2))  # none, CRC-16, CRC-32C
+            for field in fields + ['creation_timestamp', 'sequence_number']:
+                if 'node' not in field and 'service' not in field:
+                    bundle.data[field] = self.random_value()
+            bundles.append(bundle)
+        return bundles
+
+    def test_round_trip(self):
+        for version in ('bpv6', 'bpv7'):
+            config = self.manager.config[version]
+            for bundle in self.random_bundles(version, 200):
+                encoded = bundle.serialize()
+                decoded, end = decode_bundle(config, encoded)
+                self.assertEqual(end, len(encoded))
+                self.assertEqual(decoded.serialize(), encoded)
+                self.assertEqual(bytes(decoded.payload), bundle.payload)
+                for field, value in bundle.data.items():
+                    if field != 'payload':
+                        self.assertEqual(decoded.data[field], value, (version, field))
+
+    def test_payload_is_not_copied(self):
+        for version in ('bpv6', 'bpv7'):
+            data = bytearray(b"".join(bundle.serialize() for bundle in self.random_bundles(version, 5)))
+            bundles = list(decode_all(self.manager.config[version], data))
+            self.assertEqual(len(bundles), 5)
+            for bundle in bundles:
+                self.assertIsInstance(bundle.payload, memoryview)
+                self.assertIs(bundle.payload.obj, data)
+
+    def test_stream_parser_any_chunking(self):
+        for version in ('bpv6', 'bpv7'):
+            config = self.manager.config[version]
+            originals = [bundle.serialize() for bundle in self.random_bundles(version, 30)]
+            stream = b"".join(originals)
+            for _ in range(20):
+                chunks, offset = [], 0
+                while offset < len(stream):
+                    size = self.rng.choice([1, 2, 7, 64, 1000, 100000])
+                    chunks.append(bytearray(stream[offset:offset + size]))
+                    offset += size
+                decoded = [bundle.serialize() for bundle in iter_bundles(config, chunks)]
+                # Reusing/mutating the caller's chunk buffers must not corrupt decoded bundles
+                for chunk in chunks:
+                    chunk[:] = b"\x00" * len(chunk)
+                self.assertEqual(decoded, originals)
+
+    def test_truncated_and_malformed(self):
+        for version in ('bpv6', 'bpv7'):
+            config = self.manager.config[version]
+            encoded = self.random_bundles(version, 1)[0].serialize()
+            for cut in range(len(encoded)):
+                with self.assertRaises(IncompleteBundle):
+                    decode_bundle(config, encoded[:cut])
+
+            parser = BundleStreamParser(config)
+            bundles = parser.feed(encoded + encoded[:5])
+            self.assertEqual([bundle.serialize() for bundle in bundles], [encoded])
+            with self.assertRaises(IncompleteBundle):
+                parser.close()
+
+        with self.assertRaises(DecodeError):
+            decode_bundle(self.manager.config['bpv6'], b'\x07\x00')
+        with self.assertRaises(DecodeError):
+            decode_bundle(self.manager.config['bpv7'], b'\x80')
+        v7 = self.manager.create_bundle_v7((1, 1), (2, 2), b"x").serialize()
+        with self.assertRaises(DecodeError):
+            decode_bundle(self.manager.config['bpv7'], v7[:2] + b'\x06' + v7[3:])  # wrong version
+        with self.assertRaises(ValueError):
+            decode_bundle({"encoding": "xml"}, v7)
+
+    def test_primitives(self):
+        for value in EDGES:
+            self.assertEqual(decode_sdnv(b"\xff" + encode_sdnv(value), 1), (value, 1 + len(encode_sdnv(value))))
+            encoded = cbor_utils.encode_uint(value)
+            self.assertEqual(cbor_utils.decode_head(encoded), (0, value, len(encoded)))
+        with self.assertRaises(IndexError):
+            decode_sdnv(b"\x81")
+        nested = b'\x9f\x82\x01\x62hi\xa1\x00\x43abc\xff'
+        self.assertEqual(cbor_utils.skip_item(nested + b'\x00'), len(nested))
+
+if __name__ == '__main__':
+    unittest.main()
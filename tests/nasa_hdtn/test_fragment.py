@@ -0,0 +1,134 @@
+import unittest
+import sys
+import os
+import io
+import mmap
+import random
+import tempfile
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from examples.nasa_hdtn.buffer_manager import BufferManager
+from core.engine import cbor_utils
+from core.engine.decoder import decode_bundle, iter_bundles
+from core.engine.fragment import (FRAGMENT_FLAG, IntervalSet, Reassembler, fragment,
+                                  fragment_config)
+
+class TestIntervalSet(unittest.TestCase):
+    def test_merges_overlapping_and_adjacent(self):
+        ranges = IntervalSet()
+        ranges.add(10, 20)
+        ranges.add(30, 40)
+        ranges.add(20, 25)   # adjacent to [10, 20)
+        ranges.add(35, 50)   # overlaps [30, 40)
+        self.assertEqual(list(ranges), [(10, 25), (30, 50)])
+        self.assertEqual(ranges.covered(), 35)
+        self.assertEqual(ranges.gaps(60), [(0, 10), (25, 30), (50, 60)])
+        ranges.add(0, 100)
+        self.assertEqual(list(ranges), [(0, 100)])
+        self.assertEqual(ranges.gaps(100), [])
+
+    def test_ignores_empty_ranges(self):
+        ranges = IntervalSet()
+        ranges.add(5, 5)
+        self.assertEqual(len(ranges), 0)
+
+class TestFragmentation(unittest.TestCase):
+    def setUp(self):
+        self.manager = BufferManager()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.payload = random.Random(7).randbytes(100000)
+        self.cases = {
+            'bpv6': {"source_node": 5, "source_service": 1, "dest_node": 9, "dest_service": 2,
+                     "creation_timestamp": 812345678, "sequence_number": 3},
+            'bpv7': {"source_eid": cbor_utils.encode([2, [5, 1]]), "dest_eid": cbor_utils.encode([2, [9, 2]]),
+                     "report_to_eid": cbor_utils.encode([2, [0, 0]]), "creation_timestamp": 812345678, "sequence_number": 3},
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def reassemble(self, version, fragments):
+        reassembler = Reassembler(os.path.join(self.tmpdir.name, version))
+        paths = [reassembler.add(decode_bundle(self.manager.config[version], data)[0]) for data in fragments]
+        completed = [path for path in paths if path]
+        self.assertEqual(len(completed), 1)
+        self.assertEqual(reassembler.pending(), {})
+        with open(completed[0], 'rb') as f:
+            return f.read()
+
+    def test_fragments_respect_max_size(self):
+        for version, data in self.cases.items():
+            with self.subTest(version=version):
+                config = self.manager.config[version]
+                fragments = [b.serialize() for b in fragment(config, data, self.payload, 1500)]
+                self.assertGreater(len(fragments), 60)
+                self.assertTrue(all(len(f) <= 1500 for f in fragments))
+                self.assertEqual(self.reassemble(version, fragments), self.payload)
+
+    def test_file_and_mmap_sources_match_bytes(self):
+        path = os.path.join(self.tmpdir.name, 'payload.bin')
+        with open(path, 'wb') as f:
+            f.write(self.payload)
+        config = self.manager.config['bpv7']
+        data = self.cases['bpv7']
+        expected = [b.serialize() for b in fragment(config, data, self.payload, 4096)]
+        with open(path, 'rb') as f:
+            self.assertEqual([b.serialize() for b in fragment(config, data, f, 4096)], expected)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                fragments = [b.serialize() for b in fragment(config, data, mapped, 4096)]
+                self.assertEqual(fragments, expected)
+
+    def test_reassembles_shuffled_duplicated_fragments(self):
+        for version, data in self.cases.items():
+            with self.subTest(version=version):
+                config = self.manager.config[version]
+                fragments = [b.serialize() for b in fragment(config, data, io.BytesIO(self.payload), 2000)]
+                rng = random.Random(1)
+                rng.shuffle(fragments)
+                # Duplicates arrive before the last fragment completes the ADU
+                fragments[-1:-1] = fragments[:5]
+                self.assertEqual(self.reassemble(version, fragments), self.payload)
+
+    def test_overlapping_fragments(self):
+        config = self.manager.config['bpv6']
+        data = self.cases['bpv6']
+        # Fragments cut at two different sizes overlap each other
+        small = [b.serialize() for b in fragment(config, data, self.payload, 3000)]
+        large = [b.serialize() for b in fragment(config, data, self.payload, 7000)]
+        self.assertEqual(self.reassemble('bpv6', small[::2] + large[1::2] + small[1::2]), self.payload)
+
+    def test_fragment_fields_decode(self):
+        config = self.manager.config['bpv7']
+        fragments = list(fragment(config, self.cases['bpv7'], self.payload, 30000))
+        stream = b"".join(b.serialize() for b in fragments)
+        decoded = list(iter_bundles(config, [stream[i:i + 999] for i in range(0, len(stream), 999)]))
+        self.assertEqual([b.data['fragment_offset'] for b in decoded], [b.data['fragment_offset'] for b in fragments])
+        self.assertTrue(all(b.data['total_adu_length'] == len(self.payload) for b in decoded))
+        self.assertTrue(all(b.data['proc_flags'] & FRAGMENT_FLAG for b in decoded))
+        self.assertIs(decoded[0].config, fragment_config(config))
+
+    def test_pending_reports_gaps(self):
+        config = self.manager.config['bpv6']
+        fragments = list(fragment(config, self.cases['bpv6'], self.payload, 20000))
+        reassembler = Reassembler(self.tmpdir.name)
+        for bundle in fragments[1:]:
+            self.assertIsNone(reassembler.add(bundle))
+        (gaps,) = reassembler.pending().values()
+        self.assertEqual(gaps, [(0, fragments[1].data['fragment_offset'])])
+        reassembler.close()
+        self.assertEqual([name for name in os.listdir(self.tmpdir.name) if name.endswith('.part')], [])
+
+    def test_rejects_non_fragments_and_tiny_max_size(self):
+        reassembler = Reassembler(self.tmpdir.name)
+        bundle = self.manager.create_bundle_v6((1, 1), (2, 1), b"whole")
+        with self.assertRaises(ValueError):
+            reassembler.add(bundle)
+        with self.assertRaises(ValueError):
+            fragment(self.manager.config['bpv6'], self.cases['bpv6'], self.payload, 20)
+
+if __name__ == '__main__':
+    unittest.main()
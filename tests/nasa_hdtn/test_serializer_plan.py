@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from examples.nasa_hdtn.buffer_manager import BufferManager
+from core.engine.base_bundle import BaseBundle
+from core.engine.plan import ConfigCache, compile_plan, get_plan
+from core.engine.sdnv import encode_sdnv
+
+class TestSerializerPlan(unittest.TestCase):
+    def setUp(self):
+        self.manager = BufferManager()
+
+    def fixed_time(self, bundle):
+        bundle.data['creation_timestamp'] = 812345678
+        bundle.data['sequence_number'] = 7
+        return bundle
+
+    def test_bpv6_bytes(self):
+        bundle = self.fixed_time(self.manager.create_bundle_v6((1, 1), (2, 2), b"Hello BPv6"))
+        self.assertEqual(
+            bundle.serialize().hex(),
+            "06120002020101000000008383add24e079c100001020a48656c6c6f2042507636"
+        )
+
+    def test_bpv7_bytes(self):
+        bundle = self.fixed_time(self.manager.create_bundle_v7((10, 1), (20, 2), b"Hello BPv7"))
+        self.assertEqual(
+            bundle.serialize().hex(),
+            "9f8807000082028214028202820a018202820000821a306b694e07190e1085010100004a48656c6c6f2042507637ff"
+        )
+
+    def test_serialize_into(self):
+        bundles = [
+            self.manager.create_bundle_v6((1, 1), (2, 2), b"Hello BPv6"),
+            self.manager.create_bundle_v7((10, 1), (20, 2), bytearray(b"Hello BPv7")),
+        ]
+        expected = b"".join(bundle.serialize() for bundle in bundles)
+        buf = bytearray(3 + len(expected))
+        offset = 3
+        for bundle in bundles:
+            self.assertEqual(bundle.serialized_size(), len(bundle.serialize()))
+            offset = bundle.serialize_into(buf, offset)
+        self.assertEqual(offset, len(buf))
+        self.assertEqual(bytes(buf[3:]), expected)
+
+        with self.assertRaises(ValueError):
+            bundles[1].serialize_into(bytearray(len(bundles[1].serialize()) - 1))
+        with self.assertRaises(ValueError):
+            bundles[1].serialize_into(memoryview(buf), len(buf) - 1)
+
+    def test_serialize_iov_shares_payload(self):
+        payload = b"x" * 4096
+        for bundle in (self.manager.create_bundle_v6((1, 1), (2, 2), payload),
+                       self.manager.create_bundle_v7((10, 1), (20, 2), payload)):
+            iov = bundle.serialize_iov()
+            self.assertIsInstance(iov[1], memoryview)
+            self.assertIs(iov[1].obj, payload)
+            self.assertEqual(b"".join(iov), bundle.serialize())
+
+    def test_plans_are_cached_per_config(self):
+        config = self.manager.config['bpv7']
+        self.assertIs(get_plan(config), get_plan(config))
+        self.assertIsNot(get_plan(config), get_plan(dict(config)))
+        self.assertEqual(len(get_plan(config).field_encoders), len(config['primary_block']['fields']))
+
+    def test_config_cache_is_bounded(self):
+        cache = ConfigCache(compile_plan, max_size=2)
+        configs = [dict(self.manager.config['bpv7']) for _ in range(3)]
+        first, second = cache.get(configs[0]), cache.get(configs[1])
+        self.assertIs(cache.get(configs[0]), first)  # now most recently used
+        cache.get(configs[2])  # evicts configs[1]
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get(configs[0]), first)
+        self.assertIsNot(cache.get(configs[1]), second)
+        self.assertEqual(len(cache), 2)
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            compile_plan({"encoding": "xml"})
+        with self.assertRaises(ValueError):
+            BaseBundle({"encoding": "xml"}, {}).serialize()
+
+    def test_sdnv(self):
+        self.assertEqual(encode_sdnv(0), b'\x00')
+        self.assertEqual(encode_sdnv(127), b'\x7f')
+        self.assertEqual(encode_sdnv(128), b'\x81\x00')
+        self.assertEqual(encode_sdnv(0x3FFF), b'\xff\x7f')
+        with self.assertRaises(ValueError):
+            encode_sdnv(-1)
+
+if __name__ == '__main__':
+    unittest.main()
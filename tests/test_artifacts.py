@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core import db
+
+class TestArtifactStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+
+    def tearDown(self):
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def query(self, sql):
+        conn = sqlite3.connect(db.DB_PATH)
+        rows = conn.execute(sql).fetchall()
+        conn.close()
+        return rows
+
+    def test_artifacts_are_compressed_and_deduplicated(self):
+        """Verify identical logs are stored once, compressed, and loaded per requirement."""
+        db.init_db()
+        db.save_requirements(
+            [{"ID": "REQ-1", "Requirement": "Shall A"}, {"ID": "REQ-2", "Requirement": "Shall B"}],
+            "spec.pdf", "1"
+        )
+        log = "FAILED test_x.py::test_thing - AssertionError\n" * 200
+        db.update_execution_result("REQ-1", "Fail", log)
+        db.update_execution_result("REQ-2", "Fail", log)
+
+        ((count, size, stored),) = self.query('SELECT COUNT(*), SUM(size), SUM(LENGTH(data)) FROM artifacts')
+        self.assertEqual(count, 1)
+        self.assertLess(stored, size)
+        self.assertEqual(db.get_requirement_by_id("REQ-2")["Execution Log"], log)
+
+    def test_list_query_skips_artifacts(self):
+        """Verify list results only expose whether code exists."""
+        db.init_db()
+        db.save_requirements([{"ID": "REQ-1", "Requirement": "Shall A"}], "spec.pdf", "1")
+        db.update_generated_code("REQ-1", "def test_a():\n    assert True\n")
+
+        (req,) = db.get_requirements(source_file="spec.pdf")
+        self.assertTrue(req["Has Generated Code"])
+        self.assertNotIn("Generated Code", req)
+        self.assertEqual(db.get_requirement_by_id("REQ-1")["Generated Code"], "def test_a():\n    assert True\n")
+
+    def test_legacy_inline_columns_are_migrated(self):
+        """Verify inline generated_code/execution_log columns move to the artifacts table."""
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute('''
+            CREATE TABLE requirements (
+                id TEXT PRIMARY KEY, req_id TEXT, req_name TEXT, text TEXT, section TEXT,
+                source_file TEXT, status TEXT, priority TEXT, source_type TEXT,
+                verification_method TEXT, rationale TEXT, generated_code TEXT,
+                verification_status TEXT, execution_log TEXT, last_run_timestamp DATETIME,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO requirements (id, text, source_file, generated_code, execution_log) VALUES ('REQ-1', 'Shall A', 'spec.pdf', 'code', 'log')")
+        conn.commit()
+        conn.close()
+
+        db.init_db()
+
+        columns = [row[1] for row in self.query('PRAGMA table_info(requirements)')]
+        self.assertNotIn("generated_code", columns)
+        self.assertNotIn("execution_log", columns)
+        req = db.get_requirement_by_id("REQ-1")
+        self.assertEqual((req["Generated Code"], req["Execution Log"]), ("code", "log"))
+
+    def test_replaced_artifacts_are_released(self):
+        """Verify regenerating or re-running drops the previous artifact unless it is shared."""
+        db.init_db()
+        db.save_requirements(
+            [{"ID": "REQ-1", "Requirement": "Shall A"}, {"ID": "REQ-2", "Requirement": "Shall B"}],
+            "spec.pdf", "1"
+        )
+        db.update_generated_code("REQ-1", "code v1")
+        db.update_generated_code("REQ-1", "code v2")
+        db.update_execution_result("REQ-1", "Fail", "log run 1")
+        db.update_execution_result("REQ-2", "Fail", "log run 1")  # shared with REQ-1
+        db.update_execution_result("REQ-1", "Pass", "log run 2")
+        self.assertEqual(self.query('SELECT COUNT(*) FROM artifacts'), [(3,)])  # code v2, both logs
+
+        db.update_execution_result("REQ-2", "Pass", "log run 2")
+        self.assertEqual(self.query('SELECT COUNT(*) FROM artifacts'), [(2,)])
+        self.assertEqual(db.get_requirement_by_id("REQ-1")["Generated Code"], "code v2")
+
+        # Re-ingesting replaces the code and clears the log
+        db.save_requirements([{"ID": "REQ-1", "Requirement": "Shall A", "Generated Code": "code v3"}], "spec.pdf", "1")
+        self.assertEqual(self.query('SELECT COUNT(*) FROM artifacts'), [(2,)])  # code v3, REQ-2's log
+        db.save_requirements([{"ID": "REQ-2", "Requirement": "Shall B"}], "spec.pdf", "1")
+        self.assertEqual(self.query('SELECT COUNT(*) FROM artifacts'), [(1,)])
+
+    def test_orm_artifacts(self):
+        """Verify detached requirements accept artifacts and share stored content on flush."""
+        from sqlalchemy import create_engine
+
+        db.init_db()
+        # Importing the API models creates data/ in the working directory
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            import api.database as models
+            from api import main, schemas
+        finally:
+            os.chdir(cwd)
+        engine = create_engine(f"sqlite:///{db.DB_PATH}")
+        self.addCleanup(engine.dispose)
+        session = models.SessionLocal(bind=engine)
+        self.addCleanup(session.close)
+
+        session.add(models.Requirement(id="REQ-1", generated_code="shared code"))
+        session.commit()
+        session.add(models.Requirement(id="REQ-2", generated_code="shared code"))
+        session.add(models.Requirement(id="REQ-3", generated_code="shared code", execution_log="log"))
+        session.commit()
+        self.assertEqual(self.query('SELECT COUNT(*) FROM artifacts'), [(2,)])
+        self.assertEqual(session.get(models.Requirement, "REQ-3").generated_code, "shared code")
+
+        req = session.get(models.Requirement, "REQ-3")
+        previous = req.execution_log_ref
+        req.execution_log = "log 2"
+        session.flush()
+        models.release_artifacts(session, previous)
+        session.commit()
+        self.assertEqual(self.query('SELECT COUNT(*) FROM artifacts'), [(2,)])
+        self.assertEqual(req.execution_log, "log 2")
+
+        # Editing through PUT /requirements releases what the edit replaced
+        main.update_requirement("REQ-3", schemas.RequirementUpdate(generated_code="own code", execution_log="log 3"), db=session)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM artifacts'), [(3,)])  # shared code, own code, log 3
+        main.update_requirement("REQ-3", schemas.RequirementUpdate(generated_code="shared code"), db=session)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM artifacts'), [(2,)])
+
+if __name__ == '__main__':
+    unittest.main()
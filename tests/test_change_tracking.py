@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core import db
+
+class TestChangeTracking(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+        db.init_db()
+        db.save_requirements([
+            {"ID": "R1", "Requirement": "The system shall log telemetry."},
+            {"ID": "R2", "Requirement": "The system shall downlink data."},
+        ], "spec.pdf", None)
+
+    def tearDown(self):
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def seqs(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        rows = dict(conn.execute('SELECT id, change_seq FROM requirements').fetchall())
+        counter = conn.execute('SELECT seq FROM change_counter').fetchone()[0]
+        conn.close()
+        return rows, counter
+
+    def tombstones(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        rows = dict(conn.execute('SELECT id, change_seq FROM requirement_tombstones').fetchall())
+        conn.close()
+        return rows
+
+    def changes(self, **kwargs):
+        from sqlalchemy import create_engine
+
+        # Importing the API creates data/ in the working directory
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            import api.database as models
+            from api import main
+        finally:
+            os.chdir(cwd)
+        engine = create_engine(f"sqlite:///{db.DB_PATH}")
+        session = models.SessionLocal(bind=engine)
+        try:
+            return main.requirement_changes(limit=500, db=session, **kwargs)
+        finally:
+            session.close()
+            engine.dispose()
+
+    def test_writes_advance_sequence(self):
+        rows, counter = self.seqs()
+        self.assertEqual(sorted(rows.values()), [1, 2])
+        self.assertEqual(counter, 2)
+
+        db.update_verification_result("R1", "Analyzed", "Test", "Because.")
+        rows, counter = self.seqs()
+        self.assertEqual(rows, {"R1": 3, "R2": 2})
+        self.assertEqual(counter, 3)
+
+        db.update_generated_code("R2", "def test_x(): pass")
+        rows, counter = self.seqs()
+        self.assertEqual(rows["R2"], 4)
+
+    def test_deletes_leave_tombstones(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("DELETE FROM requirements WHERE id = 'R1'")
+        conn.commit()
+        conn.close()
+        _, counter = self.seqs()
+        self.assertEqual(self.tombstones(), {"R1": counter})
+
+        # Re-creating the requirement revives it
+        db.save_requirements([{"ID": "R1", "Requirement": "The system shall log telemetry."}], "spec.pdf", None)
+        rows, counter = self.seqs()
+        self.assertEqual(rows["R1"], counter)
+        self.assertEqual(self.tombstones(), {})
+
+    def test_moving_to_another_project_leaves_tombstone(self):
+        """Verify re-ingesting a requirement from another document tombstones it in the old project."""
+        db.save_requirements([{"ID": "R1", "Requirement": "The system shall log telemetry."}], "other.pdf", None)
+        rows, counter = self.seqs()
+        tombstone = self.tombstones()["R1"]
+        self.assertGreater(tombstone, 2)
+        self.assertGreater(rows["R1"], 2)
+        self.assertEqual(max(tombstone, rows["R1"]), counter)
+
+        changes = self.changes(since=2, source_file="spec.pdf")
+        self.assertEqual((changes["changed"], changes["deleted"]), ([], ["R1"]))
+        self.assertEqual([r.id for r in self.changes(since=2, source_file="other.pdf")["changed"]], ["R1"])
+        # Unfiltered clients see the row still exists
+        changes = self.changes(since=2)
+        self.assertEqual(([r.id for r in changes["changed"]], changes["deleted"]), (["R1"], []))
+
+        # Moving back replaces the tombstone with one in the project it leaves this time
+        db.save_requirements([{"ID": "R1", "Requirement": "The system shall log telemetry."}], "spec.pdf", None)
+        conn = sqlite3.connect(db.DB_PATH)
+        self.assertEqual(conn.execute("SELECT source_file FROM requirement_tombstones").fetchall(), [("other.pdf",)])
+        conn.close()
+
+    def test_project_versions_only_move_forward(self):
+        """Verify a project's version changes when rows leave it and never returns to an old value."""
+        seen = [db.get_change_version("spec.pdf")]
+
+        def step():
+            version = db.get_change_version("spec.pdf")
+            self.assertGreater(version, max(seen))
+            seen.append(version)
+
+        db.save_requirements([{"ID": "R2", "Requirement": "The system shall downlink data."}], "other.pdf", None)
+        step()  # R2 moved out
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("DELETE FROM requirements WHERE id = 'R1'")
+        conn.commit()
+        conn.close()
+        step()
+        # Re-creating R1 elsewhere drops spec.pdf's newest tombstone; its version must not fall back
+        db.save_requirements([{"ID": "R1", "Requirement": "The system shall log telemetry."}], "other.pdf", None)
+        self.assertGreaterEqual(db.get_change_version("spec.pdf"), max(seen))
+        self.assertGreater(db.get_change_version("other.pdf"), 0)
+        self.assertEqual(db.get_change_version("missing.pdf"), 0)
+
+if __name__ == '__main__':
+    unittest.main()
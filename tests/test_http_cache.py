@@ -0,0 +1,127 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from api.http_cache import ResponseCache, cached_response, etag_matches, make_etag, negotiate_encoding, response_cache
+import api.http_cache as http_cache
+from core import db
+
+class TestResponseCache(unittest.TestCase):
+    def test_entries_are_validated_by_etag(self):
+        cache = ResponseCache(max_entries=2, max_bytes=100)
+        cache.put("/a", '"v1"', b"one")
+        self.assertEqual(cache.get("/a", '"v1"'), b"one")
+        self.assertIsNone(cache.get("/a", '"v2"'))
+        self.assertIsNone(cache.get("/a", '"v1"'))  # stale entry was dropped
+
+    def test_bounded_by_entries_and_bytes(self):
+        cache = ResponseCache(max_entries=2, max_bytes=10)
+        cache.put("/a", "e", b"1234")
+        cache.put("/b", "e", b"1234")
+        cache.put("/c", "e", b"1234")
+        self.assertIsNone(cache.get("/a", "e"))
+        cache.put("/d", "e", b"12345678")
+        self.assertIsNone(cache.get("/b", "e"))
+        self.assertIsNone(cache.get("/c", "e"))
+        self.assertEqual(cache.get("/d", "e"), b"12345678")
+
+    def test_if_none_match(self):
+        etag = make_etag("/x?", 3)
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(f'"other", W/{etag}', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches(None, etag))
+        self.assertFalse(etag_matches(make_etag("/x?", 4), etag))
+
+    def test_negotiate_encoding(self):
+        self.assertEqual(negotiate_encoding(None), "identity")
+        self.assertEqual(negotiate_encoding("gzip, deflate"), "gzip")
+        self.assertEqual(negotiate_encoding("gzip;q=0, identity"), "identity")
+        expected = "br" if http_cache.brotli is not None else "gzip"
+        self.assertEqual(negotiate_encoding("gzip, deflate, br"), expected)
+
+class TestCachedResponse(unittest.TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.version = 1
+        self.builds = 0
+        self.copies = 1
+        app = FastAPI()
+
+        @app.get("/items")
+        def items(request: Request):
+            def build():
+                self.builds += 1
+                return [{"n": self.version}] * self.copies
+            return cached_response(request, self.version, build)
+
+        self.client = TestClient(app)
+
+    def test_conditional_get(self):
+        first = self.client.get("/items")
+        self.assertEqual(first.json(), [{"n": 1}])
+        self.assertEqual(first.headers["cache-control"], "no-cache")
+
+        not_modified = self.client.get("/items", headers={"If-None-Match": first.headers["etag"]})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.headers["etag"], first.headers["etag"])
+
+        self.assertEqual(self.client.get("/items").json(), [{"n": 1}])
+        self.assertEqual(self.builds, 1)  # second full response came from the cache
+
+        self.version = 2
+        changed = self.client.get("/items", headers={"If-None-Match": first.headers["etag"]})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json(), [{"n": 2}])
+        self.assertNotEqual(changed.headers["etag"], first.headers["etag"])
+
+    def test_compressed_variants(self):
+        self.copies = 500  # above COMPRESS_MIN_BYTES
+        plain = self.client.get("/items", headers={"Accept-Encoding": "identity"})
+        gzipped = self.client.get("/items", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("content-encoding", plain.headers)
+        self.assertEqual(gzipped.headers["content-encoding"], "gzip")
+        self.assertEqual(gzipped.json(), plain.json())  # decoded by the client
+        self.assertNotEqual(gzipped.headers["etag"], plain.headers["etag"])
+        self.assertLess(int(gzipped.headers["content-length"]), int(plain.headers["content-length"]))
+        self.assertEqual(self.builds, 1)
+
+        revalidated = self.client.get("/items", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]})
+        self.assertEqual(revalidated.status_code, 304)
+
+class TestDataVersions(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def test_versions_follow_writes(self):
+        db.save_requirements([{"ID": "A1", "Requirement": "a"}], "a.pdf", None)
+        db.save_requirements([{"ID": "B1", "Requirement": "b"}], "b.pdf", None)
+        a, b, total = db.get_change_version("a.pdf"), db.get_change_version("b.pdf"), db.get_change_version()
+        projects = db.get_table_version("projects")
+
+        db.update_verification_result("B1", "Analyzed", "Test", "r")
+        self.assertEqual(db.get_change_version("a.pdf"), a)
+        self.assertGreater(db.get_change_version("b.pdf"), b)
+        self.assertGreater(db.get_change_version(), total)
+
+        db.upsert_project_metadata("a.pdf", "Spec A")
+        self.assertGreater(db.get_table_version("projects"), projects)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from cryptography.fernet import Fernet
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core import db, jobs
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.get_log_sink().flush()
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def expire_leases(self):
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("UPDATE jobs SET lease_expires = 0 WHERE status = 'running'")
+        conn.commit()
+        conn.close()
+
+    def test_claim_in_order_and_complete(self):
+        first = jobs.enqueue_job("analyze", {"req_id": "R1"}, secret="key-1")
+        second = jobs.enqueue_job("analyze", {"req_id": "R2"})
+
+        job = jobs.claim_job("worker-a")
+        self.assertEqual(job['id'], first)
+        self.assertEqual(job['secret'], "key-1")
+        self.assertEqual(job['attempts'], 1)
+        self.assertEqual(jobs.claim_job("worker-b")['id'], second)
+        self.assertIsNone(jobs.claim_job("worker-c"))
+
+        jobs.finish_job(first, "worker-a", "succeeded", result={"message": "ok"})
+        done = jobs.get_job(first)
+        self.assertEqual(done['status'], "succeeded")
+        self.assertEqual(done['result'], {"message": "ok"})
+        self.assertEqual(done['progress'], 1.0)
+        self.assertNotIn('secret', done)
+
+        conn = sqlite3.connect(db.DB_PATH)
+        self.assertIsNone(conn.execute('SELECT secret FROM jobs WHERE id = ?', (first,)).fetchone()[0])
+        conn.close()
+
+    def test_secret_is_stored_encrypted(self):
+        job_id = jobs.enqueue_job("analyze", {"req_id": "R1"}, secret="key-1")
+        conn = sqlite3.connect(db.DB_PATH)
+        stored = conn.execute('SELECT secret FROM jobs WHERE id = ?', (job_id,)).fetchone()[0]
+        conn.close()
+        self.assertNotIn("key-1", stored)
+
+        # A server restart reloads the key from the key file, readable by its owner only
+        self.assertEqual(os.stat(jobs.secret_key_path()).st_mode & 0o777, 0o600)
+        with mock.patch.object(jobs, "_secret_key", None):
+            restarted = jobs.claim_job("worker-a")
+            self.assertEqual(restarted['secret'], "key-1")
+            self.assertFalse(restarted['secret_lost'])
+        self.expire_leases()
+
+        # A job sealed under another key (the key file was replaced) can't get its key back
+        original_key = jobs.secret_key()
+        self.addCleanup(jobs.set_secret_key, original_key)
+        jobs.set_secret_key(Fernet.generate_key())
+        seen = []
+        self.assertTrue(jobs.process_next_job("worker-a", {"analyze": lambda p, key, c: seen.append(key)}))
+        self.assertEqual(seen, [])
+        failed = jobs.get_job(job_id)
+        self.assertEqual(failed['status'], "failed")
+        self.assertIn("resubmit", failed['error'])
+
+    def test_expired_lease_is_reclaimed_then_failed(self):
+        job_id = jobs.enqueue_job("analyze", {"req_id": "R1"}, max_attempts=2)
+        jobs.claim_job("crashed-1")
+        self.expire_leases()
+
+        retry = jobs.claim_job("worker-b")
+        self.assertEqual(retry['id'], job_id)
+        self.assertEqual(retry['attempts'], 2)
+        # The first worker lost its lease and can no longer report
+        self.assertTrue(jobs.heartbeat(job_id, "crashed-1"))
+        jobs.finish_job(job_id, "crashed-1", "succeeded")
+        self.assertEqual(jobs.get_job(job_id)['status'], "running")
+
+        self.expire_leases()
+        self.assertIsNone(jobs.claim_job("worker-c"))
+        failed = jobs.get_job(job_id)
+        self.assertEqual(failed['status'], "failed")
+        self.assertIn("Worker lost", failed['error'])
+
+    def test_cancel(self):
+        queued = jobs.enqueue_job("analyze", {"req_id": "R1"})
+        self.assertEqual(jobs.cancel_job(queued), "cancelled")
+        self.assertIsNone(jobs.claim_job("worker-a"))
+        self.assertIsNone(jobs.cancel_job("missing"))
+
+        seen = []
+
+        def handler(payload, api_key, context):
+            jobs.cancel_job(context.job_id)
+            seen.append(api_key)
+            context.progress(0.5, "halfway")
+            seen.append("not reached")
+
+        running = jobs.enqueue_job("slow", {}, secret="key")
+        self.assertTrue(jobs.process_next_job("worker-a", {"slow": handler}))
+        self.assertEqual(seen, ["key"])
+        self.assertEqual(jobs.get_job(running)['status'], "cancelled")
+
+    def test_process_next_job(self):
+        def handler(payload, api_key, context):
+            context.progress(0.5, "halfway")
+            if payload.get("boom"):
+                raise RuntimeError("boom")
+            return {"doubled": payload["n"] * 2}
+
+        ok = jobs.enqueue_job("double", {"n": 21})
+        bad = jobs.enqueue_job("double", {"n": 1, "boom": True})
+        unknown = jobs.enqueue_job("nope", {})
+        handlers = {"double": handler}
+
+        for _ in range(3):
+            self.assertTrue(jobs.process_next_job("worker-a", handlers))
+        self.assertFalse(jobs.process_next_job("worker-a", handlers))
+
+        self.assertEqual(jobs.get_job(ok)['result'], {"doubled": 42})
+        self.assertEqual(jobs.get_job(ok)['message'], "halfway")
+        self.assertEqual(jobs.get_job(bad)['status'], "failed")
+        self.assertEqual(jobs.get_job(bad)['error'], "boom")
+        self.assertEqual(jobs.get_job(unknown)['status'], "failed")
+
+    def test_dead_workers_are_reaped_and_replaced(self):
+        stale = os.path.join(jobs.metrics_dir(), "worker-1.json")
+        os.makedirs(jobs.metrics_dir())
+        with open(stale, "w") as f:
+            f.write("{}")
+        jobs.clear_metrics_snapshots()
+        self.assertEqual(os.listdir(jobs.metrics_dir()), [])
+
+        job_id = jobs.enqueue_job("nope", {})
+        pool = jobs.WorkerPool(1, poll_interval=0.05)
+        pool.start()
+        try:
+            for _ in range(300):
+                if os.listdir(jobs.metrics_dir()):
+                    break
+                time.sleep(0.05)
+            self.assertEqual(jobs.get_job(job_id)['status'], "failed")
+            self.assertEqual(len(os.listdir(jobs.metrics_dir())), 1)
+
+            # A worker that dies (crash, OOM kill) is dropped with its snapshot on the next reap
+            pool._processes[0].kill()
+            pool._processes[0].join()
+            pool.reap()
+            self.assertEqual(pool._processes, [])
+            self.assertEqual(os.listdir(jobs.metrics_dir()), [])
+
+            # maintain() also brings the pool back to strength
+            self.assertEqual(pool.maintain(), 1)
+            self.assertTrue(pool._processes[0].is_alive())
+            self.assertEqual(pool._processes[0].name, "asv-worker-1")
+            retried = jobs.enqueue_job("nope", {})
+            for _ in range(300):
+                if jobs.get_job(retried)['status'] == "failed":
+                    break
+                time.sleep(0.05)
+            self.assertEqual(jobs.get_job(retried)['status'], "failed")
+            self.assertEqual(pool.maintain(), 0)
+        finally:
+            pool.stop()
+
+class TestJobScheduling(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def drain(self):
+        order = []
+        while True:
+            job = jobs.claim_job("worker")
+            if job is None:
+                return order
+            order.append(job['payload']['name'])
+
+    def test_fair_share_across_flows(self):
+        for i in range(4):
+            jobs.enqueue_job("analyze", {"name": f"a{i}"}, secret="key-a", project="big.pdf")
+        for i in range(2):
+            jobs.enqueue_job("analyze", {"name": f"b{i}"}, secret="key-b", project="small.pdf")
+        self.assertEqual(self.drain(), ["a0", "b0", "a1", "b1", "a2", "a3"])
+
+    def test_flow_weights(self):
+        jobs.set_flow_weight(jobs.flow_key("key-a", "p.pdf"), 2.0)
+        for i in range(4):
+            jobs.enqueue_job("analyze", {"name": f"a{i}"}, secret="key-a", project="p.pdf")
+            jobs.enqueue_job("analyze", {"name": f"b{i}"}, secret="key-b", project="p.pdf")
+        # Two jobs of a for each of b; ties go to the longest-waiting flow
+        self.assertEqual(self.drain()[:6], ["a0", "b0", "a1", "a2", "b1", "a3"])
+
+    def test_priority_within_flow(self):
+        for name, priority in (("m", "Medium"), ("h", "High"), ("c", "Critical")):
+            jobs.enqueue_job("analyze", {"name": name}, project="p.pdf", priority=priority)
+        self.assertEqual(self.drain(), ["c", "h", "m"])
+
+    def test_interactive_lane_first_unless_bulk_starves(self):
+        jobs.enqueue_job("ingest", {"name": "bulk"})
+        jobs.enqueue_job("analyze", {"name": "fast"})
+        metrics = jobs.get_queue_metrics()
+        self.assertEqual(metrics["bulk"]["queued"], 1)
+        self.assertEqual(metrics["interactive"]["queued"], 1)
+        self.assertEqual(self.drain(), ["fast", "bulk"])
+
+        with mock.patch.object(jobs, "BULK_MAX_WAIT", -1):
+            jobs.enqueue_job("analyze", {"name": "fast"})
+            jobs.enqueue_job("ingest", {"name": "bulk"})
+            self.assertEqual(self.drain(), ["bulk", "fast"])
+
+        metrics = jobs.get_queue_metrics()
+        self.assertEqual(metrics["bulk"]["started"], 2)
+        self.assertEqual(metrics["interactive"]["running"], 2)
+        self.assertGreaterEqual(metrics["bulk"]["wait_p95"], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
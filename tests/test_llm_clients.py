@@ -0,0 +1,102 @@
+import asyncio
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core.llm_clients import ClientPool, key_fingerprint
+from core.verification_engine import VerificationEngine
+
+class FakeClient:
+    def __init__(self, api_key):
+        self.api_key = api_key
+
+class TestClientPool(unittest.TestCase):
+    def test_reuses_client_per_key(self):
+        pool = ClientPool(max_size=4, factory=FakeClient)
+        first = pool.get_client("key-a")
+        self.assertIs(pool.get_client("key-a"), first)
+        self.assertIsNot(pool.get_client("key-b"), first)
+        self.assertEqual(pool.get_client("key-b").api_key, "key-b")
+        self.assertEqual(pool.stats(), {"size": 2, "hits": 2, "misses": 2, "evictions": 0})
+        self.assertNotIn("key-a", pool._clients)
+        self.assertIn(key_fingerprint("key-a"), pool._clients)
+
+    def test_evicts_least_recently_used(self):
+        pool = ClientPool(max_size=2, factory=FakeClient)
+        a = pool.get_client("key-a")
+        pool.get_client("key-b")
+        pool.get_client("key-a")  # key-b is now least recently used
+        pool.get_client("key-c")
+        self.assertEqual(len(pool), 2)
+        self.assertIs(pool.get_client("key-a"), a)
+        self.assertNotIn(key_fingerprint("key-b"), pool._clients)
+        self.assertEqual(pool.evictions, 1)
+
+    def test_concurrent_first_use_yields_one_client(self):
+        pool = ClientPool(max_size=4, factory=FakeClient)
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(pool.get_client("key-a"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len({id(client) for client in seen}), 1)
+
+    def test_models_are_bound_to_their_key(self):
+        pool = ClientPool(max_size=4, factory=FakeClient, async_factory=FakeClient)
+        model_a = pool.get_model("key-a", generation_config={"response_mime_type": "application/json"})
+        model_b = pool.get_model("key-b")
+        self.assertEqual(model_a._client.api_key, "key-a")
+        self.assertEqual(model_b._client.api_key, "key-b")
+        self.assertIs(pool.get_model("key-a")._client, model_a._client)
+
+    def test_async_clients_per_event_loop(self):
+        pool = ClientPool(max_size=4, factory=FakeClient, async_factory=FakeClient)
+        model_a, model_b = pool.get_model("key-a"), pool.get_model("key-b")
+
+        async def resolve():
+            # Attribute access is how the SDK uses the client inside generate_content_async
+            return model_a._async_client.api_key, model_b._async_client.api_key, pool.get_async_client("key-a")
+
+        first = asyncio.run(resolve())
+        self.assertEqual(first[:2], ("key-a", "key-b"))
+        self.assertIsNot(asyncio.run(resolve())[2], first[2])  # a new loop gets its own client
+        with self.assertRaises(RuntimeError):
+            model_a._async_client.generate_content  # no running loop
+
+    def test_models_from_plain_threads(self):
+        # Sync endpoints and job handlers run outside any event loop
+        errors = []
+
+        def build():
+            try:
+                ClientPool(max_size=4).get_model("key-a")
+                VerificationEngine("key-a")
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=build)
+        thread.start()
+        thread.join()
+        self.assertEqual(errors, [])
+
+    def test_unsupported_sdk_is_rejected(self):
+        pool = ClientPool(max_size=4, factory=FakeClient, async_factory=FakeClient)
+
+        class NoClientModel:
+            def __init__(self, model_name, **kwargs):
+                pass
+
+        with mock.patch("core.llm_clients.genai.GenerativeModel", NoClientModel):
+            with self.assertRaises(RuntimeError):
+                pool.get_model("key-a")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core.log_sink import LogSink
+
+class TestLogSink(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "logs.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE system_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                level TEXT,
+                message TEXT
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_sink(self, **kwargs):
+        sink = LogSink(lambda: sqlite3.connect(self.db_path), **kwargs)
+        self.addCleanup(sink.close)
+        return sink
+
+    def rows(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('SELECT level, message FROM system_logs ORDER BY id').fetchall()
+        conn.close()
+        return rows
+
+    def test_entries_are_buffered_until_flush(self):
+        """Verify entries stay in memory until a flush and keep emission order."""
+        sink = self.make_sink(flush_size=1000, flush_interval=60)
+        sink.emit("first", "INFO")
+        sink.emit("second", "ERROR")
+        sink.emit("third", "INFO")
+        self.assertEqual(self.rows(), [])
+        self.assertEqual(sink.pending, 3)
+
+        sink.flush()
+        self.assertEqual(self.rows(), [("INFO", "first"), ("ERROR", "second"), ("INFO", "third")])
+        self.assertEqual(sink.pending, 0)
+
+    def test_backpressure_drops_lowest_priority(self):
+        """Verify a full buffer sheds INFO entries before ERROR entries."""
+        sink = self.make_sink(flush_size=1000, flush_interval=60, max_buffer=3)
+        sink.emit("error", "ERROR")
+        sink.emit("info-1", "INFO")
+        sink.emit("info-2", "INFO")
+        sink.emit("warn", "WARN")      # evicts info-1
+        sink.emit("debug", "DEBUG")    # lower than everything buffered: rejected
+        self.assertEqual(sink.dropped, {"INFO": 1, "DEBUG": 1})
+
+        sink.flush()
+        rows = self.rows()
+        self.assertEqual(rows[:3], [("ERROR", "error"), ("INFO", "info-2"), ("WARN", "warn")])
+        self.assertEqual(rows[3][0], "WARN")
+        self.assertIn("dropped 1 DEBUG, 1 INFO", rows[3][1])
+
+    def test_failed_flush_is_retried(self):
+        """Verify a batch that hits a database error is kept, capped, and written by the next flush."""
+        sink = self.make_sink(flush_size=1000, flush_interval=60, max_buffer=3)
+        sink.emit("info-1", "INFO")
+        sink.emit("error", "ERROR")
+
+        locker = sqlite3.connect(self.db_path)
+        locker.execute("BEGIN EXCLUSIVE")
+        sink.connect = lambda: sqlite3.connect(self.db_path, timeout=0)
+        sink.flush()
+        self.assertEqual(sink.pending, 2)
+        sink.emit("info-2", "INFO")
+        sink.emit("warn", "WARN")  # over capacity: the oldest INFO goes, as for any overflow
+        locker.rollback()
+        locker.close()
+
+        sink.flush()
+        rows = self.rows()
+        self.assertEqual(rows[:3], [("ERROR", "error"), ("INFO", "info-2"), ("WARN", "warn")])
+        self.assertIn("dropped 1 INFO", rows[3][1])
+        self.assertEqual(sink.pending, 0)
+
+    def test_retention_by_row_count(self):
+        """Verify retention keeps only the newest max_rows rows."""
+        sink = self.make_sink(flush_size=1000, flush_interval=60, max_rows=5, retention_interval=0)
+        for i in range(12):
+            sink.emit(f"msg-{i}")
+        sink.flush()
+        self.assertEqual([m for _, m in self.rows()], [f"msg-{i}" for i in range(7, 12)])
+
+    def test_retention_by_age(self):
+        """Verify retention deletes rows older than max_age_days."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO system_logs (timestamp, level, message) VALUES ('2000-01-01 00:00:00', 'INFO', 'old')")
+        conn.commit()
+        conn.close()
+
+        sink = self.make_sink(flush_size=1000, flush_interval=60, max_age_days=1, retention_interval=0)
+        sink.emit("new")
+        sink.flush()
+        self.assertEqual(self.rows(), [("INFO", "new")])
+
+    def test_background_thread_flushes_on_size(self):
+        """Verify the writer thread flushes once flush_size entries are pending."""
+        sink = self.make_sink(flush_size=2, flush_interval=60)
+        sink.emit("a")
+        sink.emit("b")
+        for _ in range(100):
+            if len(self.rows()) == 2:
+                break
+            time.sleep(0.02)
+        self.assertEqual(len(self.rows()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
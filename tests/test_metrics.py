@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core import db
+from core.metrics import (
+    Counter, Gauge, Histogram, Registry, DB_WRITE_SECONDS, LLM_CALLS, LLM_TOKENS, llm_call
+)
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.calls = Counter("calls_total", "Calls.", ("site",), registry=self.registry)
+        self.latency = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0), registry=self.registry)
+
+    def test_render_exposition_format(self):
+        self.calls.inc(site="a")
+        self.calls.inc(2, site='quote"d')
+        self.latency.observe(0.05)
+        self.latency.observe(0.5)
+        self.latency.observe(5)
+        Gauge("depth", "Depth.", ("lane",), registry=self.registry, callback=lambda: {("bulk",): 3})
+
+        text = self.registry.render()
+        self.assertIn("# TYPE calls_total counter", text)
+        self.assertIn('calls_total{site="a"} 1\n', text)
+        self.assertIn('calls_total{site="quote\\"d"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3\n', text)
+        self.assertIn("latency_seconds_sum 5.55\n", text)
+        self.assertIn("latency_seconds_count 3\n", text)
+        self.assertIn('depth{lane="bulk"} 3\n', text)
+
+    def test_labels_are_checked(self):
+        with self.assertRaises(ValueError):
+            self.calls.inc(other="x")
+        with self.assertRaises(ValueError):
+            Counter("calls_total", "Duplicate.", registry=self.registry)
+
+    def test_snapshots_are_merged(self):
+        self.calls.inc(site="a")
+        self.latency.observe(0.5)
+        worker = Registry()
+        Counter("calls_total", "Calls.", ("site",), registry=worker).inc(4, site="a")
+        Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0), registry=worker).observe(0.05)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            worker.write_snapshot(os.path.join(tmpdir, "worker-1.json"))
+            text = self.registry.render(snapshot_dir=tmpdir)
+        self.assertIn('calls_total{site="a"} 5\n', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn("latency_seconds_count 2\n", text)
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def test_llm_call_counts_outcomes_and_tokens(self):
+        before = LLM_CALLS.collect()
+        response = SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=120, candidates_token_count=30))
+        with llm_call("test_site") as call:
+            call.record(response)
+        with self.assertRaises(RuntimeError):
+            with llm_call("test_site"):
+                raise RuntimeError("quota exceeded")
+
+        after = LLM_CALLS.collect()
+        for outcome in ("ok", "error"):
+            key = ("test_site", outcome)
+            self.assertEqual(after[key] - before.get(key, 0), 1)
+        self.assertGreaterEqual(LLM_TOKENS.collect()[("test_site", "prompt")], 120)
+
+    def test_db_writes_are_timed(self):
+        before = DB_WRITE_SECONDS.collect().get(("save_requirements",), [[0], 0.0])
+        db.save_requirements([{"ID": "R1", "Requirement": "The system shall log."}], "spec.pdf", None)
+        after = DB_WRITE_SECONDS.collect()[("save_requirements",)]
+        self.assertEqual(sum(after[0]) - sum(before[0]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
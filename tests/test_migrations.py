@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core import migrations
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmpdir.name, "project.db"))
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def test_fresh_database_reaches_latest_version(self):
+        """Verify all migrations run once and are skipped afterwards."""
+        self.assertEqual(migrations.migrate(self.conn), migrations.SCHEMA_VERSION)
+        self.assertEqual(migrations.get_schema_version(self.conn), migrations.SCHEMA_VERSION)
+        self.assertEqual(migrations.migrate(self.conn), 0)
+
+    def test_unversioned_database_is_upgraded(self):
+        """Verify databases created before versioning (user_version 0) migrate cleanly."""
+        self.conn.execute('CREATE TABLE requirements (id TEXT PRIMARY KEY, req_id TEXT, req_name TEXT, text TEXT, section TEXT, source_file TEXT, status TEXT, priority TEXT, source_type TEXT)')
+        self.conn.execute('CREATE TABLE projects (filename TEXT PRIMARY KEY, title TEXT, req_count INTEGER, last_updated TIMESTAMP)')
+        self.conn.execute("INSERT INTO requirements (id, text, source_file, status) VALUES ('R1', 'Shall', 'a.pdf', 'Pending')")
+        self.conn.commit()
+
+        migrations.migrate(self.conn)
+
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(requirements)')]
+        self.assertIn("verification_status", columns)
+        self.assertEqual(self.conn.execute("SELECT req_count FROM projects WHERE filename = 'a.pdf'").fetchone(), (1,))
+
+    def test_failed_migration_rolls_back(self):
+        """Verify a failing step leaves the version untouched."""
+        def broken(cursor):
+            cursor.execute('CREATE TABLE half_done (x)')
+            raise sqlite3.OperationalError("boom")
+
+        with mock.patch.object(migrations, "MIGRATIONS", migrations.MIGRATIONS + [broken]), \
+             mock.patch.object(migrations, "SCHEMA_VERSION", migrations.SCHEMA_VERSION + 1):
+            with self.assertRaises(sqlite3.OperationalError):
+                migrations.migrate(self.conn)
+        self.assertEqual(migrations.get_schema_version(self.conn), 0)
+        self.assertIsNone(self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import pstats
+import sys
+import tempfile
+import time
+import unittest
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import api.profiling as profiling
+from api.profiling import ProfilingMiddleware, list_profiles, profile_path, require_admin, to_pstats
+from core import db
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        self.original_token = profiling.ADMIN_TOKEN
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+        profiling.ADMIN_TOKEN = "s3cret"
+
+        app = FastAPI()
+        app.add_middleware(ProfilingMiddleware)
+
+        @app.get("/slow")
+        def slow():
+            busy(0.05)
+            return {"ok": True}
+
+        @app.get("/admin", dependencies=[Depends(require_admin)])
+        def admin():
+            return {"ok": True}
+
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        profiling.ADMIN_TOKEN = self.original_token
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def test_profile_requires_admin_token(self):
+        self.assertNotIn("x-profile-id", self.client.get("/slow", headers={"X-Profile": "1"}).headers)
+        self.assertNotIn("x-profile-id", self.client.get("/slow?_profile=1", headers={"X-Admin-Token": "wrong"}).headers)
+        self.assertEqual(self.client.get("/admin", headers={"X-Admin-Token": "wrong"}).status_code, 403)
+        self.assertEqual(self.client.get("/admin", headers={"X-Admin-Token": "s3cret"}).status_code, 200)
+
+        profiling.ADMIN_TOKEN = None
+        self.assertNotIn("x-profile-id", self.client.get("/slow?_profile=1", headers={"X-Admin-Token": "s3cret"}).headers)
+        self.assertEqual(self.client.get("/admin", headers={"X-Admin-Token": "s3cret"}).status_code, 404)
+        self.assertEqual(list_profiles(), [])
+
+    def test_non_ascii_admin_token(self):
+        # Header bytes outside ASCII are refused, not a server error
+        high_byte = {"X-Profile": "1", "X-Admin-Token": b"s3cr\xe9t"}
+        self.assertNotIn("x-profile-id", self.client.get("/slow", headers=high_byte).headers)
+        self.assertEqual(self.client.get("/admin", headers={"X-Admin-Token": b"\xff"}).status_code, 403)
+
+        profiling.ADMIN_TOKEN = "s3cr\u00e9t"
+        utf8 = "s3cr\u00e9t".encode("utf-8")
+        self.assertEqual(self.client.get("/admin", headers={"X-Admin-Token": utf8}).status_code, 200)
+        self.assertIn("x-profile-id", self.client.get("/slow", headers={"X-Profile": "1", "X-Admin-Token": utf8}).headers)
+
+    def test_profiled_request(self):
+        response = self.client.get("/slow", headers={"X-Profile": "1", "X-Admin-Token": "s3cret"})
+        self.assertEqual(response.json(), {"ok": True})
+        profile_id = response.headers["x-profile-id"]
+
+        self.assertEqual([p["id"] for p in list_profiles()], [profile_id])
+        self.assertEqual(list_profiles()[0]["name"], "GET /slow")
+        self.assertIsNotNone(profile_path(profile_id, "speedscope"))
+        self.assertIsNone(profile_path("../etc", "pstats"))
+
+        stats = pstats.Stats(profile_path(profile_id, "pstats")).stats
+        busy_key = next(key for key in stats if key[2] == "busy")
+        self.assertGreater(stats[busy_key][3], 0.03)  # cumulative seconds, sampled
+
+    def test_pstats_from_samples(self):
+        a, b, c = ("a", "f.py", 1), ("b", "f.py", 5), ("c", "f.py", 9)
+        stats = to_pstats([((a, b), 0.001), ((a, b), 0.001), ((a, c), 0.001)])
+        self.assertEqual(stats[("f.py", 1, "a")][:4], (3, 3, 0.0, 0.003))
+        self.assertEqual(stats[("f.py", 5, "b")][:4], (2, 2, 0.002, 0.002))
+        self.assertEqual(stats[("f.py", 5, "b")][4], {("f.py", 1, "a"): (2, 2, 0.0, 0.002)})
+
+if __name__ == '__main__':
+    unittest.main()
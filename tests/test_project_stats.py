@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core import db
+
+class TestProjectAggregates(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+
+    def tearDown(self):
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def recount(self, filename):
+        """Aggregates computed the slow way, for comparison."""
+        conn = sqlite3.connect(db.DB_PATH)
+        expected = {"total": conn.execute('SELECT COUNT(*) FROM requirements WHERE source_file = ?', (filename,)).fetchone()[0]}
+        for dim in db.STAT_DIMENSIONS:
+            rows = conn.execute(f"SELECT COALESCE({dim}, ''), COUNT(*) FROM requirements WHERE source_file = ? GROUP BY 1", (filename,))
+            expected[dim] = dict(rows.fetchall())
+        conn.close()
+        return expected
+
+    def assertStatsMatch(self, filename):
+        stats = db.get_project_stats(filename)
+        expected = self.recount(filename)
+        for key, value in expected.items():
+            self.assertEqual(stats[key], value, key)
+
+    def test_counts_follow_writes(self):
+        """Verify triggers keep totals and breakdowns equal to a full recount."""
+        db.init_db()
+        db.save_requirements([{"ID": f"REQ-{i}", "Requirement": "Shall"} for i in range(5)], "a.pdf", "1", "Spec A")
+        db.update_verification_result("REQ-0", "Analyzed", "Test", "Because")
+        db.update_verification_result("REQ-1", "Error", "Manual Review", "AI Processing Failed")
+        db.update_execution_result("REQ-0", "Pass", "ok")
+        db.update_execution_result("REQ-2", "Fail", "boom")
+        self.assertStatsMatch("a.pdf")
+
+        stats = db.get_project_stats("a.pdf")
+        self.assertEqual((stats["title"], stats["total"]), ("Spec A", 5))
+        self.assertEqual((stats["pass"], stats["fail"], stats["error"]), (1, 1, 0))
+
+        # Re-ingesting resets results without double counting
+        db.save_requirements([{"ID": "REQ-0", "Requirement": "Shall"}], "a.pdf", "1")
+        self.assertStatsMatch("a.pdf")
+        self.assertEqual(db.get_project_stats("a.pdf")["pass"], 0)
+
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("DELETE FROM requirements WHERE id IN ('REQ-1', 'REQ-2')")
+        conn.commit()
+        conn.close()
+        self.assertStatsMatch("a.pdf")
+        self.assertEqual(db.get_project_stats("missing.pdf"), None)
+
+    def test_existing_data_is_backfilled_once(self):
+        """Verify aggregates are counted for databases created before project_stats existed."""
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute('CREATE TABLE requirements (id TEXT PRIMARY KEY, req_id TEXT, req_name TEXT, text TEXT, section TEXT, source_file TEXT, status TEXT, priority TEXT, source_type TEXT)')
+        conn.executemany("INSERT INTO requirements (id, text, source_file, status) VALUES (?, 'Shall', ?, ?)",
+                         [("R1", "a.pdf", "Pending"), ("R2", "a.pdf", "Analyzed"), ("R3", "b.pdf", "Pending")])
+        conn.commit()
+        conn.close()
+
+        db.init_db()
+        self.assertStatsMatch("a.pdf")
+        self.assertStatsMatch("b.pdf")
+        self.assertEqual(db.get_project_stats("b.pdf")["title"], "b.pdf")
+
+if __name__ == '__main__':
+    unittest.main()
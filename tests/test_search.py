@@ -0,0 +1,72 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core import db
+
+class TestRequirementSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+        db.init_db()
+        db.save_requirements([
+            {"ID": "REQ-1", "Requirement Name": "Custody Transfer", "Requirement": "The node shall accept custody of bundles."},
+            {"ID": "REQ-2", "Requirement Name": "Telemetry", "Requirement": "The node shall downlink telemetry every second."},
+        ], "a.pdf", "1")
+        db.save_requirements([
+            {"ID": "REQ-3", "Requirement Name": "Storage", "Requirement": "Bundles shall be stored until expiry.", "Rationale": "Custody may be delayed."},
+        ], "b.pdf", "1")
+
+    def tearDown(self):
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def ids(self, *args, **kwargs):
+        results, _ = db.search_requirements(*args, **kwargs)
+        return [hit["id"] for hit in results]
+
+    def test_ranking_and_snippets(self):
+        """Verify name matches outrank rationale matches and snippets highlight terms."""
+        results, has_more = db.search_requirements("custody")
+        self.assertEqual([hit["id"] for hit in results], ["REQ-1", "REQ-3"])
+        self.assertFalse(has_more)
+        self.assertIn("<mark>", results[0]["snippet"])
+
+    def test_project_filter_prefix_and_pagination(self):
+        """Verify project filtering, prefix terms and page boundaries."""
+        self.assertEqual(self.ids("custody", source_file="b.pdf"), ["REQ-3"])
+        self.assertEqual(sorted(self.ids("bund*")), ["REQ-1", "REQ-3"])
+        first, has_more = db.search_requirements("shall", limit=2)
+        self.assertTrue(has_more)
+        second, has_more = db.search_requirements("shall", limit=2, offset=2)
+        self.assertFalse(has_more)
+        self.assertEqual(len({hit["id"] for hit in first + second}), 3)
+
+    def test_index_follows_updates_and_reingestion(self):
+        """Verify triggers keep the index in sync with edits and re-ingestion."""
+        db.update_requirement("REQ-2", "The node shall relay housekeeping data.", "Pending", "High", "Modified")
+        self.assertEqual(self.ids("downlink"), [])
+        self.assertEqual(self.ids("housekeeping"), ["REQ-2"])
+
+        db.save_requirements([{"ID": "REQ-1", "Requirement": "The node shall route bundles."}], "a.pdf", "1")
+        self.assertEqual(self.ids("accept"), [])
+
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.execute("INSERT INTO requirements_fts (requirements_fts) VALUES ('integrity-check')")
+        conn.close()
+
+    def test_user_input_is_escaped(self):
+        """Verify FTS syntax characters in user input do not raise."""
+        self.assertEqual(self.ids('shall "AND (NOT'), [])
+        self.assertEqual(self.ids("   "), [])
+
+if __name__ == '__main__':
+    unittest.main()
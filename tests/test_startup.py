@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from typing import Dict
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '../'))
+sys.path.append(project_root)
+
+# Cumulative `import api.main` time allowed (ms). Loading the AI stack at import would blow it.
+IMPORT_BUDGET_MS = float(os.environ.get("ASV_IMPORT_BUDGET_MS", "1500"))
+# Only needed by ingestion / LLM endpoints, which import them on first use
+HEAVY_MODULES = ("google.generativeai", "pypdf")
+
+def import_profile(module: str) -> Dict[str, int]:
+    """Cumulative import time (microseconds) per module, from `python -X importtime`."""
+    env = dict(os.environ, PYTHONPATH=project_root, PYTHONWARNINGS="ignore")
+    with tempfile.TemporaryDirectory() as tmpdir:  # the API creates data/ in its working directory
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=tmpdir, env=env, capture_output=True, text=True, check=True
+        )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+class TestStartup(unittest.TestCase):
+    def test_api_import_skips_heavy_modules(self):
+        profile = import_profile("api.main")
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, profile, f"{module} is imported at API startup")
+
+    def test_api_import_time_budget(self):
+        # Best of two runs; the first may pay for a cold file cache
+        elapsed_ms = min(import_profile("api.main")["api.main"] for _ in range(2)) / 1000
+        self.assertLess(elapsed_ms, IMPORT_BUDGET_MS, f"import api.main took {elapsed_ms:.0f}ms")
+
+if __name__ == '__main__':
+    unittest.main()
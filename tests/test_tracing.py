@@ -0,0 +1,115 @@
+import concurrent.futures
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.join(current_dir, '../')
+sys.path.append(project_root)
+
+from core import db, jobs, tracing
+from core.tracing import InMemoryExporter, JsonlExporter, bind_context, current_span, start_span
+
+class TestSpans(unittest.TestCase):
+    def setUp(self):
+        self.exporter = InMemoryExporter()
+        tracing.set_exporter(self.exporter)
+
+    def tearDown(self):
+        tracing.set_exporter(None)
+
+    def test_nesting_and_attributes(self):
+        with start_span("ingest", {"file": "spec.pdf"}) as root:
+            with start_span("ingest.scan") as scan:
+                scan.set_attribute("pages.selected", 3)
+            self.assertIs(current_span(), root)
+        self.assertIsNone(current_span())
+
+        scan, root = self.exporter.spans  # exported as they end
+        self.assertEqual(scan.parent_span_id, root.span_id)
+        self.assertEqual(scan.trace_id, root.trace_id)
+        self.assertIsNone(root.parent_span_id)
+        self.assertEqual(scan.attributes, {"pages.selected": 3})
+        self.assertEqual(root.status, "OK")
+        self.assertLessEqual(root.start_ns, scan.start_ns)
+        self.assertGreaterEqual(root.end_ns, scan.end_ns)
+
+    def test_errors_mark_span(self):
+        with self.assertRaises(ValueError):
+            with start_span("verify.analyze"):
+                raise ValueError("bad JSON")
+        span = self.exporter.spans[0]
+        self.assertEqual(span.status, "ERROR")
+        self.assertIn("bad JSON", span.status_message)
+
+    def test_context_follows_into_threads(self):
+        def batch(index):
+            with start_span("ingest.batch", {"batch.index": index}):
+                pass
+
+        with start_span("ingest.extract") as parent:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(bind_context(batch), i) for i in range(3)]
+                concurrent.futures.wait(futures)
+
+        batches = [s for s in self.exporter.spans if s.name == "ingest.batch"]
+        self.assertEqual(len(batches), 3)
+        self.assertTrue(all(s.parent_span_id == parent.span_id for s in batches))
+
+class TestJobTraces(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmpdir.name, "project.db")
+        db.init_db()
+        self.trace_file = os.path.join(self.tmpdir.name, "traces.jsonl")
+        tracing.set_exporter(JsonlExporter(self.trace_file))
+
+    def tearDown(self):
+        tracing.set_exporter(None)
+        db.get_log_sink().flush()
+        db.DB_PATH = self.original_path
+        self.tmpdir.cleanup()
+
+    def test_default_exporter_is_shared(self):
+        tracing.set_exporter(None)
+        exporter = tracing.default_exporter()
+        self.assertEqual(exporter.path, os.path.join(self.tmpdir.name, "traces.jsonl"))
+        self.assertIs(tracing.default_exporter(), exporter)
+
+        with start_span("first"):
+            pass
+        with start_span("second"):
+            pass
+        self.assertIs(tracing.default_exporter(), exporter)
+        with open(self.trace_file) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_job_timeline(self):
+        def handler(payload, api_key, context):
+            with start_span("verify.generate", {"req.id": payload["req_id"]}):
+                with start_span("llm.generate_test_code") as llm:
+                    llm.set_attribute("llm.output_tokens", 42)
+            return {}
+
+        job_id = jobs.enqueue_job("generate", {"req_id": "R1"})
+        other = jobs.enqueue_job("generate", {"req_id": "R2"})
+        jobs.process_next_job("worker-a", {"generate": handler})
+        jobs.process_next_job("worker-a", {"generate": handler})
+
+        spans = tracing.load_trace(job_id[:12], self.trace_file)
+        self.assertEqual([s["name"] for s in spans], ["llm.generate_test_code", "verify.generate", "job.generate"])
+        self.assertTrue(all(s["trace_id"] == job_id for s in spans))
+        self.assertNotIn(other, {s["trace_id"] for s in spans})
+
+        timeline = tracing.render_timeline(spans, width=20).splitlines()
+        self.assertIn(job_id, timeline[0])
+        self.assertTrue(timeline[1].startswith("job.generate"))
+        self.assertTrue(timeline[2].startswith("  verify.generate"))
+        self.assertTrue(timeline[3].startswith("    llm.generate_test_code"))
+        self.assertIn("llm.output_tokens=42", timeline[3])
+
+if __name__ == '__main__':
+    unittest.main()
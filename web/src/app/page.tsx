@@ -18,9 +18,12 @@ type Requirement = {
   source_type: string
   verification_method: string
   rationale: string
-  generated_code: string
   verification_status: string
-  execution_log: string
+  has_generated_code: boolean
+  has_execution_log: boolean
+  // Only present once the single-requirement view has been loaded
+  generated_code?: string
+  execution_log?: string
 }
 
 type Project = {
@@ -50,6 +53,10 @@ export default function Home() {
   const [generateAllProgress, setGenerateAllProgress] = useState({ current: 0, total: 0 })
   const fileInputRef = useRef<HTMLInputElement>(null)
 
+  // Mirror of the listed requirements and the delta sync cursor it is current to
+  const requirementsRef = useRef<Requirement[]>([])
+  const changeCursorRef = useRef(0)
+
   const [apiKey, setApiKey] = useState('')
 
   useEffect(() => {
@@ -64,6 +71,7 @@ export default function Home() {
 
   // Filters
   const [searchQuery, setSearchQuery] = useState('')
+  const [searchHits, setSearchHits] = useState<Set<string> | null>(null)
   const [filterStatus, setFilterStatus] = useState<string>('All')
   const [filterPriority, setFilterPriority] = useState<string>('All')
   const [filterMethod, setFilterMethod] = useState<string>('All')
@@ -92,6 +100,7 @@ export default function Home() {
           : `${API_BASE}/requirements`
 
         const res = await fetch(url)
+        changeCursorRef.current = Number(res.headers.get('X-Change-Cursor') || 0)
         const data = await res.json()
         setRequirements(data)
 
@@ -111,6 +120,68 @@ export default function Home() {
     fetchReqs()
   }, [selectedProject])
 
+  useEffect(() => {
+    requirementsRef.current = requirements
+  }, [requirements])
+
+  // Fetch requirements changed since the last sync and merge them into the list
+  const syncRequirements = async (): Promise<Requirement[]> => {
+    let merged = requirementsRef.current
+    let hasMore = true
+    while (hasMore) {
+      const params = new URLSearchParams({ since: String(changeCursorRef.current) })
+      if (selectedProject && selectedProject !== 'All Projects') params.set('source_file', selectedProject)
+      const res = await fetch(`${API_BASE}/requirements/changes?${params}`)
+      const page = await res.json()
+
+      const changed = new Map<string, Requirement>(page.changed.map((r: Requirement) => [r.id, r]))
+      const deleted = new Set<string>(page.deleted)
+      merged = merged.filter(r => !deleted.has(r.id)).map(r => changed.get(r.id) ?? r)
+      const known = new Set(merged.map(r => r.id))
+      merged = merged.concat(page.changed.filter((r: Requirement) => !known.has(r.id)))
+
+      changeCursorRef.current = page.cursor
+      hasMore = page.has_more
+    }
+    requirementsRef.current = merged
+    setRequirements(merged)
+    return merged
+  }
+
+  // Full-text search runs server-side (FTS5); debounce keystrokes
+  useEffect(() => {
+    const q = searchQuery.trim()
+    if (!q) {
+      setSearchHits(null)
+      return
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q: q.split(/\s+/).map(t => t + '*').join(' '), limit: '100' })
+        if (selectedProject && selectedProject !== 'All Projects') params.set('source_file', selectedProject)
+        const res = await fetch(`${API_BASE}/requirements/search?${params}`)
+        const data = await res.json()
+        setSearchHits(new Set((data.results || []).map((hit: { id: string }) => hit.id)))
+      } catch (err) {
+        console.error("Search failed:", err)
+        setSearchHits(null)
+      }
+    }, 250)
+    return () => clearTimeout(timer)
+  }, [searchQuery, selectedProject])
+
+  // List rows omit generated code and logs; load them when a requirement is opened
+  useEffect(() => {
+    if (!selectedReq || selectedReq.generated_code !== undefined) return
+    const reqId = selectedReq.id
+    fetch(`${API_BASE}/requirements/${encodeURIComponent(reqId)}`)
+      .then(res => res.json())
+      .then(detail => {
+        setSelectedReq(prev => prev && prev.id === reqId ? { ...prev, ...detail } : prev)
+      })
+      .catch(err => console.error("Failed to fetch requirement details:", err))
+  }, [selectedReq])
+
   const handleFileUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
     const file = e.target.files?.[0]
     if (!file) return
@@ -123,7 +194,8 @@ export default function Home() {
       const key = apiKey || localStorage.getItem('google_api_key') || 'DEMO_KEY'
       formData.append('api_key', key)
 
-      const res = await fetch(`${API_BASE}/ingest`, {
+      // Extraction runs in a background job; poll it until it finishes
+      const res = await fetch(`${API_BASE}/jobs/ingest`, {
         method: 'POST',
         body: formData
       })
@@ -133,6 +205,16 @@ export default function Home() {
         throw new Error(errorData.detail || 'Upload failed')
       }
 
+      const { job_id } = await res.json()
+      let job = { status: 'queued', error: null as string | null }
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 1000))
+        job = await (await fetch(`${API_BASE}/jobs/${job_id}`)).json()
+      }
+      if (job.status !== 'succeeded') {
+        throw new Error(job.error || `Ingestion ${job.status}`)
+      }
+
       // Refresh projects
       const projRes = await fetch(`${API_BASE}/projects`)
       const projData = await projRes.json()
@@ -182,13 +264,9 @@ export default function Home() {
         })
       }
 
-      // Refresh data completely
-      const url = selectedProject && selectedProject !== 'All Projects'
-        ? `${API_BASE}/requirements?source_file=${selectedProject}`
-        : `${API_BASE}/requirements`
-      const reqRes = await fetch(url)
-      const data = await reqRes.json()
-      setRequirements(data)
+      // Pull only the rows that changed
+
+      const data = await syncRequirements()
 
       if (selectedReq) {
         const updated = data.find((r: Requirement) => r.id === selectedReq.id)
@@ -210,7 +288,7 @@ export default function Home() {
 
   const handleGenerateAll = async () => {
     // Find all analyzed requirements that don't have generated code yet
-    let eligibleReqs = requirements.filter(r => r.status === 'Analyzed' && (!r.generated_code || r.generated_code.trim() === ''))
+    let eligibleReqs = requirements.filter(r => r.status === 'Analyzed' && !r.has_generated_code)
     if (eligibleReqs.length === 0) {
       // Also allow re-generating for all analyzed reqs that already have code
       eligibleReqs = requirements.filter(r => r.status === 'Analyzed')
@@ -242,13 +320,9 @@ export default function Home() {
         })
       }
 
-      // Refresh requirements data
-      const url = selectedProject && selectedProject !== 'All Projects'
-        ? `${API_BASE}/requirements?source_file=${selectedProject}`
-        : `${API_BASE}/requirements`
-      const reqRes = await fetch(url)
-      const data = await reqRes.json()
-      setRequirements(data)
+      // Pull only the rows that changed
+
+      const data = await syncRequirements()
 
       if (selectedReq) {
         const updated = data.find((r: Requirement) => r.id === selectedReq.id)
@@ -317,13 +391,9 @@ export default function Home() {
         throw new Error("Analysis failed")
       }
 
-      // Refresh requirements to get the updated status and rationale
-      const url = selectedProject && selectedProject !== 'All Projects'
-        ? `${API_BASE}/requirements?source_file=${selectedProject}`
-        : `${API_BASE}/requirements`
-      const reqRes = await fetch(url)
-      const data = await reqRes.json()
-      setRequirements(data)
+      // Pull only the rows that changed
+
+      const data = await syncRequirements()
 
       const updated = data.find((r: Requirement) => r.id === selectedReq.id)
       if (updated) setSelectedReq(updated)
@@ -352,7 +422,7 @@ export default function Home() {
       const data = await res.json()
 
       // Update local state
-      const updatedReq = { ...selectedReq, generated_code: data.code }
+      const updatedReq = { ...selectedReq, generated_code: data.code, has_generated_code: true }
       setSelectedReq(updatedReq)
       setRequirements(reqs => reqs.map(r => r.id === updatedReq.id ? updatedReq : r))
 
@@ -383,7 +453,8 @@ export default function Home() {
       const updatedReq = {
         ...selectedReq,
         verification_status: data.status,
-        execution_log: data.log
+        execution_log: data.log,
+        has_execution_log: true
       }
       setSelectedReq(updatedReq)
       setRequirements(reqs => reqs.map(r => r.id === updatedReq.id ? updatedReq : r))
@@ -402,8 +473,10 @@ export default function Home() {
 
   const filteredReqs = requirements.filter(req => {
     const matchSearch = req.id.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      (req.req_name || '').toLowerCase().includes(searchQuery.toLowerCase()) ||
-      (req.text || '').toLowerCase().includes(searchQuery.toLowerCase())
+      (searchHits
+        ? searchHits.has(req.id)
+        : (req.req_name || '').toLowerCase().includes(searchQuery.toLowerCase()) ||
+          (req.text || '').toLowerCase().includes(searchQuery.toLowerCase()))
 
     const matchStatus = filterStatus === 'All' || req.status === filterStatus
     const matchPri = filterPriority === 'All' || req.priority === filterPriority
@@ -820,7 +893,7 @@ export default function Home() {
                         <button className="secondary-btn" style={{ flex: 1, fontSize: '0.8rem', padding: '0.5rem' }} onClick={handleGenerateCode} disabled={isGenerating}>
                           {isGenerating ? 'Regenerating...' : '↻ Regenerate'}
                         </button>
-                        <button className="secondary-btn" style={{ flex: 1, fontSize: '0.8rem', padding: '0.5rem' }} onClick={() => { navigator.clipboard.writeText(selectedReq.generated_code); alert('Code copied to clipboard!') }}>
+                        <button className="secondary-btn" style={{ flex: 1, fontSize: '0.8rem', padding: '0.5rem' }} onClick={() => { navigator.clipboard.writeText(selectedReq.generated_code ?? ''); alert('Code copied to clipboard!') }}>
                           📋 Copy Code
                         </button>
                       </div>